@@ -1,54 +1,111 @@
+import importlib
 import logging
+from collections.abc import Mapping
 
-from conflator import Conflator
-
-import covjsonkit.decoder.BoundingBox
-import covjsonkit.decoder.Circle
-import covjsonkit.decoder.Frame
-import covjsonkit.decoder.Grid
-import covjsonkit.decoder.Path
-import covjsonkit.decoder.Position
-import covjsonkit.decoder.Shapefile
-import covjsonkit.decoder.TimeSeries
-import covjsonkit.decoder.VerticalProfile
-import covjsonkit.decoder.Wkt
-import covjsonkit.encoder.BoundingBox
-import covjsonkit.encoder.Circle
-import covjsonkit.encoder.Frame
-import covjsonkit.encoder.Grid
-import covjsonkit.encoder.Path
-import covjsonkit.encoder.Position
-import covjsonkit.encoder.Shapefile
-import covjsonkit.encoder.TimeSeries
-import covjsonkit.encoder.VerticalProfile
-import covjsonkit.encoder.Wkt
-
-from .config import CovjsonKitConfig
-
-features_encoder = {
-    "pointseries": covjsonkit.encoder.TimeSeries.TimeSeries,
-    "verticalprofile": covjsonkit.encoder.VerticalProfile.VerticalProfile,
-    "boundingbox": covjsonkit.encoder.BoundingBox.BoundingBox,
-    "shapefile": covjsonkit.encoder.Shapefile.Shapefile,
-    "frame": covjsonkit.encoder.Frame.Frame,
-    "path": covjsonkit.encoder.Path.Path,
-    "polygon": covjsonkit.encoder.Wkt.Wkt,
-    "circle": covjsonkit.encoder.Circle.Circle,
-    "grid": covjsonkit.encoder.Grid.Grid,
-    "position": covjsonkit.encoder.Position.Position,
-}
-features_decoder = {
-    "pointseries": covjsonkit.decoder.TimeSeries.TimeSeries,
-    "verticalprofile": covjsonkit.decoder.VerticalProfile.VerticalProfile,
-    "boundingbox": covjsonkit.decoder.BoundingBox.BoundingBox,
-    "shapefile": covjsonkit.decoder.Shapefile.Shapefile,
-    "frame": covjsonkit.decoder.Frame.Frame,
-    "path": covjsonkit.decoder.Path.Path,
-    "polygon": covjsonkit.decoder.Wkt.Wkt,
-    "circle": covjsonkit.decoder.Circle.Circle,
-    "grid": covjsonkit.decoder.Grid.Grid,
-    "position": covjsonkit.decoder.Position.Position,
-}
+from .config import CovjsonKitConfig, load_config
+from .param_db import preload_catalogues
+
+
+class FeatureRegistry(Mapping):
+    def __init__(self, group, features):
+        """
+        Mapping of feature names to encoder or decoder classes, imported on first use.
+
+        Built-in features are given as ``"module:Class"`` strings so that importing
+        ``covjsonkit.api`` does not pull in every feature module (and with them
+        xarray, pandas, scipy or rasterio). Third-party features are discovered
+        from the ``group`` entry point group, e.g. in a ``pyproject.toml``::
+
+            [project.entry-points."covjsonkit.encoders"]
+            swath = "mypackage.swath:SwathEncoder"
+
+        Args:
+            group (str): Entry point group searched for names that are not built in.
+            features (dict): Built-in feature names mapped to ``"module:Class"`` targets.
+        """
+        self.group = group
+        self._targets = dict(features)
+        self._classes = {}
+        self._entry_points_loaded = False
+
+    def register(self, name, target):
+        """Register a feature class, or a ``"module:Class"`` string to import lazily."""
+        self._classes.pop(name, None)
+        if isinstance(target, str):
+            self._targets[name] = target
+        else:
+            self._targets[name] = f"{target.__module__}:{target.__qualname__}"
+            self._classes[name] = target
+
+    def __getitem__(self, name):
+        feature = self._classes.get(name)
+        if feature is not None:
+            return feature
+        if name not in self._targets:
+            self._load_entry_points()
+        target = self._targets[name]
+        if not isinstance(target, str):
+            feature = target.load()
+        else:
+            module_name, _, attr = target.partition(":")
+            feature = getattr(importlib.import_module(module_name), attr)
+        self._classes[name] = feature
+        return feature
+
+    def __iter__(self):
+        self._load_entry_points()
+        return iter(self._targets)
+
+    def __len__(self):
+        self._load_entry_points()
+        return len(self._targets)
+
+    def _load_entry_points(self):
+        if self._entry_points_loaded:
+            return
+        self._entry_points_loaded = True
+        from importlib.metadata import entry_points
+
+        eps = entry_points()
+        if hasattr(eps, "select"):
+            eps = eps.select(group=self.group)
+        else:  # Python < 3.10
+            eps = eps.get(self.group, [])
+        for ep in eps:
+            # Built-in features cannot be shadowed by plugins
+            self._targets.setdefault(ep.name, ep)
+
+
+features_encoder = FeatureRegistry(
+    "covjsonkit.encoders",
+    {
+        "pointseries": "covjsonkit.encoder.TimeSeries:TimeSeries",
+        "verticalprofile": "covjsonkit.encoder.VerticalProfile:VerticalProfile",
+        "boundingbox": "covjsonkit.encoder.BoundingBox:BoundingBox",
+        "shapefile": "covjsonkit.encoder.Shapefile:Shapefile",
+        "frame": "covjsonkit.encoder.Frame:Frame",
+        "path": "covjsonkit.encoder.Path:Path",
+        "polygon": "covjsonkit.encoder.Wkt:Wkt",
+        "circle": "covjsonkit.encoder.Circle:Circle",
+        "grid": "covjsonkit.encoder.Grid:Grid",
+        "position": "covjsonkit.encoder.Position:Position",
+    },
+)
+features_decoder = FeatureRegistry(
+    "covjsonkit.decoders",
+    {
+        "pointseries": "covjsonkit.decoder.TimeSeries:TimeSeries",
+        "verticalprofile": "covjsonkit.decoder.VerticalProfile:VerticalProfile",
+        "boundingbox": "covjsonkit.decoder.BoundingBox:BoundingBox",
+        "shapefile": "covjsonkit.decoder.Shapefile:Shapefile",
+        "frame": "covjsonkit.decoder.Frame:Frame",
+        "path": "covjsonkit.decoder.Path:Path",
+        "polygon": "covjsonkit.decoder.Wkt:Wkt",
+        "circle": "covjsonkit.decoder.Circle:Circle",
+        "grid": "covjsonkit.decoder.Grid:Grid",
+        "position": "covjsonkit.decoder.Position:Position",
+    },
+)
 
 
 class Covjsonkit:
@@ -57,7 +114,8 @@ class Covjsonkit:
         Initializes the Covjsonkit instance.
 
         If no configuration is provided, it attempts to load the default configuration
-        from predefined locations using the Conflator library. If a configuration dictionary
+        from predefined locations using the Conflator library. The default configuration
+        is only read once per process and shared by all instances. If a configuration dictionary
         is provided, it validates and initializes the instance with the given configuration.
 
         Args:
@@ -69,13 +127,17 @@ class Covjsonkit:
         """
         # If no config check default locations
         if config is None:
-            self.conf = Conflator(app_name="covjsonkit", model=CovjsonKitConfig).load()
+            self.conf = load_config()
             logging.debug("Config loaded from file: %s", self.conf)  # noqa: E501
         # else initialise with provided config
         else:
             self.conf = CovjsonKitConfig.model_validate(config)
             logging.debug("Config loaded from dictionary: %s", self.conf)  # noqa: E501
 
+    def preload_param_db(self):
+        """Load the configured parameter database so the first encode does not pay for it."""
+        preload_catalogues(self.conf.param_db)
+
     def encode(self, type, domaintype):
         if domaintype == "timeseries":
             domaintype = "PointSeries"
@@ -85,6 +147,11 @@ class Covjsonkit:
         return feature(self.conf, domaintype)
 
     def decode(self, covjson):
+        if isinstance(covjson, str):
+            # Path of a CoverageJSON file, possibly with .npy range sidecars
+            from .utils import read_covjson
+
+            covjson = read_covjson(covjson)
         if "domainType" not in covjson:
             requesttype = covjson["domain"]["domainType"]
         else:
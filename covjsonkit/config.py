@@ -1,5 +1,29 @@
-from conflator import ConfigModel
+from functools import lru_cache
+
+from conflator import ConfigModel, Conflator
 
 
 class CovjsonKitConfig(ConfigModel):
     param_db: str = "ecmwf"
+    # Write each distinct domain of a MultiPoint collection once, under "domains"
+    shared_domains: bool = False
+    # Keep range values as float64 NumPy arrays instead of lists of floats
+    numpy_ranges: bool = False
+    # "float32" writes range values with float32 precision
+    range_dtype: str = "float64"
+    # Decimal places of the range values per parameter name, or "default" for the others
+    range_decimals: dict[str, int] = {}
+    # Write evenly spaced domain axes as {"start", "stop", "num"} instead of their values
+    compact_axes: bool = False
+    # Gather and convert the range values of this many dates and ensemble members at once, in threads
+    workers: int = 1
+
+
+@lru_cache(maxsize=None)
+def load_config():
+    """Load the configuration from the default locations.
+
+    The files and environment are only probed on the first call; later calls
+    return the same ``CovjsonKitConfig``.
+    """
+    return Conflator(app_name="covjsonkit", model=CovjsonKitConfig).load()
@@ -1,9 +1,13 @@
-import json
 from abc import ABC, abstractmethod
 
 from covjsonkit.Coverage import Coverage
 from covjsonkit.CoverageCollection import CoverageCollection
-from covjsonkit.utils import coverage_to_coveragecollection
+from covjsonkit.utils import (
+    coverage_to_coveragecollection,
+    expand_regular_axes,
+    read_covjson,
+    resolve_shared_domains,
+)
 
 
 class Decoder(ABC):
@@ -44,11 +48,15 @@ class Decoder(ABC):
         if isinstance(covjson, dict):
             self.covjson = covjson
         elif isinstance(covjson, str):
-            with open(covjson) as json_file:
-                self.covjson = json.load(json_file)
+            self.covjson = read_covjson(covjson)
         else:
             raise TypeError("Covjson must be dictionary or covjson file")
 
+        # Coverages of a collection may refer to shared domains by id
+        self.covjson = resolve_shared_domains(self.covjson)
+        # Regular axes may be written as start/stop/num
+        self.covjson = expand_regular_axes(self.covjson)
+
         self.type = self.get_type()
         if self.type == "Coverage":
             self.covjson = coverage_to_coveragecollection(self.covjson)
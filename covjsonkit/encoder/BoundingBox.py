@@ -1,9 +1,17 @@
 import logging
 import time
+from functools import partial
 
 import pandas as pd
 
-from .encoder import Encoder, normalize_step_value
+from .encoder import (
+    Encoder,
+    join_ranges,
+    normalize_step_value,
+    xarray_cubes,
+    xarray_points,
+)
+from .stream import streamable
 
 
 class BoundingBox(Encoder):
@@ -19,7 +27,7 @@ class BoundingBox(Encoder):
         new_coverage["domain"] = {}
         new_coverage["ranges"] = {}
         self.add_mars_metadata(new_coverage, mars_metadata)
-        self.add_domain(new_coverage, coords)
+        self.attach_domain(new_coverage, coords)
         self.add_range(new_coverage, values)
         self.covjson["coverages"].append(new_coverage)
         # cov = Coverage.model_validate_json(json.dumps(new_coverage))
@@ -45,7 +53,7 @@ class BoundingBox(Encoder):
             coverage["ranges"][param]["dataType"] = "float"
             coverage["ranges"][param]["shape"] = [len(values[parameter])]
             coverage["ranges"][param]["axisNames"] = [str(param)]
-            coverage["ranges"][param]["values"] = values[parameter]  # [values[parameter]]
+            coverage["ranges"][param]["values"] = self.range_values(values[parameter], param)  # [values[parameter]]
 
     def add_mars_metadata(self, coverage, metadata):
         coverage["mars:metadata"] = metadata
@@ -87,36 +95,29 @@ class BoundingBox(Encoder):
 
         # Prepare coordinates
         coords = {
-            "composite": [],
+            "composite": xarray_points(dataset, ["latitude", "longitude", "levelist"]),
             "dataType": "tuple",
             "t": [str(x) for x in dataset["datetimes"].values],
         }
 
-        for point in dataset["points"].values:
-            coords["composite"].append(
-                [
-                    float(dataset.isel(points=point).latitude.values),
-                    float(dataset.isel(points=point).longitude.values),
-                    float(dataset.isel(points=point).levelist.values),
-                ]
-            )
-
-        for datetime in dataset["datetimes"].values:
-            for num in dataset["number"].values:
-                for step in dataset["steps"].values:
+        cubes = xarray_cubes(dataset)
+        for i, datetime in enumerate(dataset["datetimes"].values):
+            for j, num in enumerate(dataset["number"].values):
+                for k, step in enumerate(dataset["steps"].values):
                     dv_dict = {}
                     mars_metadata = {metadata: dataset.attrs[metadata] for metadata in dataset.attrs}
                     mars_metadata["number"] = int(num)
                     mars_metadata["step"] = normalize_step_value(step)
                     mars_metadata["Forecast date"] = str(datetime)
-                    for dv in dataset.data_vars:
-                        dv_dict[dv] = dataset[dv].sel(number=num, steps=step, datetimes=datetime).values.tolist()
+                    for dv, cube in cubes.items():
+                        dv_dict[dv] = cube[i, j, k].tolist()
 
                     self.add_coverage(mars_metadata, coords, dv_dict)
 
         # Return the generated CoverageJSON
         return self.covjson
 
+    @streamable
     def from_polytope(self, result, date_key: str = "date") -> dict:
         """Encode a polytope ``TensorIndexTree`` result into a MultiPoint (BoundingBox) CoverageJSON collection."""
         coords = {}
@@ -130,7 +131,7 @@ class BoundingBox(Encoder):
         fields["dates"] = []
         fields["levels"] = [0]
 
-        self.walk_tree(result, fields, coords, mars_metadata, range_dict, date_key=date_key)
+        table = self.walk_leaf_table(result, fields, coords, mars_metadata, range_dict, date_key=date_key)
         logging.debug("The values returned from walking tree: %s", range_dict)  # noqa: E501
         logging.debug("The coordinates returned from walking tree: %s", coords)  # noqa: E501
 
@@ -144,29 +145,6 @@ class BoundingBox(Encoder):
             }
         )
 
-        combined_dict = {}
-
-        for date in fields["dates"]:
-            if date not in combined_dict:
-                combined_dict[date] = {}
-            for level in fields["levels"]:
-                for num in fields["number"]:
-                    if num not in combined_dict[date]:
-                        combined_dict[date][num] = {}
-                    for para in fields["param"]:
-                        if para not in combined_dict[date][num]:
-                            combined_dict[date][num][para] = {}
-                        # for s, value in range_dict[date][level][num][para].items():
-                        for s in fields["step"]:
-                            key = (date, level, num, para, s)
-                            # for k, v in range_dict.items():
-                            # if k == key:
-                            if s not in combined_dict[date][num][para]:
-                                combined_dict[date][num][para][s] = range_dict[key]
-                            else:
-                                # Cocatenate arrays
-                                combined_dict[date][num][para][s] += range_dict[key]
-
         levels = fields["levels"]
         if fields["param"] == 0:
             raise ValueError("No data was returned.")
@@ -185,23 +163,25 @@ class BoundingBox(Encoder):
                 for cor in coord:
                     coords[date]["composite"].append([cor[0], cor[1], level])
 
-        for date in combined_dict.keys():
-            for num in combined_dict[date].keys():
-                val_dict = {}
-                for step in combined_dict[date][num][self.parameters[0]].keys():
-                    val_dict[step] = {}
-                for para in combined_dict[date][num].keys():
-                    for step in combined_dict[date][num][para].keys():
-                        val_dict[step][para] = combined_dict[date][num][para][step]
-                for step in val_dict.keys():
-                    mm = mars_metadata.copy()
-                    mm["number"] = num
-                    mm["step"] = normalize_step_value(step)
-                    mm["Forecast date"] = date
-                    self.add_coverage(mm, coords[date], val_dict[step])
+        # The values of each date and ensemble member are gathered just before its
+        # coverages are added, so that with sink= streaming only those are held
+        partitions = [(date, num) for date in fields["dates"] for num in fields["number"]]
+        convert = self.range_converter(fields["param"])
+        if table is not None:
+            gather = partial(_table_step_values, table, fields["param"], fields["step"], convert)
+        else:
+            gather = partial(_step_values, range_dict, levels, fields["param"], fields["step"], convert)
+        for (date, num), step_values in zip(partitions, self.map_partitions(gather, partitions)):
+            for step, val_dict in zip(fields["step"], step_values):
+                mm = mars_metadata.copy()
+                mm["number"] = num
+                mm["step"] = normalize_step_value(step)
+                mm["Forecast date"] = date
+                self.add_coverage(mm, coords[date], val_dict)
 
         return self.covjson
 
+    @streamable
     def from_polytope_month(self, result):
         coords = {}
         mars_metadata = {}
@@ -374,3 +354,28 @@ class BoundingBox(Encoder):
         logging.debug("Coverage creation: %s", delta)  # noqa: E501
 
         return self.covjson
+
+
+def _step_values(range_dict, levels, params, steps, convert, date, num):
+    """Range values of each step of one date and ensemble member, levels concatenated."""
+    step_values = []
+    for step in steps:
+        val_dict = {}
+        for para in params:
+            val_dict[para] = convert(
+                join_ranges([range_dict[(date, level, num, para, step)] for level in levels]), para
+            )
+        step_values.append(val_dict)
+    return step_values
+
+
+def _table_step_values(table, params, steps, convert, date, num):
+    """As :func:`_step_values`, picking the values out of a :class:`LeafTable`."""
+    rows = table.rows(date)
+    step_values = []
+    for step in steps:
+        val_dict = {}
+        for para in params:
+            val_dict[para] = convert(table.range(rows, number=num, param=para, step=step), para)
+        step_values.append(val_dict)
+    return step_values
@@ -4,7 +4,10 @@ from datetime import timedelta
 
 import pandas as pd
 
-from .encoder import Encoder, normalize_step_value
+from .axes import unique_axis
+from .encoder import Encoder, join_ranges, normalize_step_value
+from .stream import streamable
+from .tiles import tile_writer, tiled_range
 
 
 class Grid(Encoder):
@@ -29,14 +32,10 @@ class Grid(Encoder):
     def add_domain(self, coverage, coords):
         coverage["domain"]["type"] = "Domain"
         coverage["domain"]["axes"] = {}
-        coverage["domain"]["axes"]["t"] = {}
-        coverage["domain"]["axes"]["t"]["values"] = coords["t"]
-        coverage["domain"]["axes"]["latitude"] = {}
-        coverage["domain"]["axes"]["latitude"]["values"] = coords["latitude"]
-        coverage["domain"]["axes"]["longitude"] = {}
-        coverage["domain"]["axes"]["longitude"]["values"] = coords["longitude"]
-        coverage["domain"]["axes"]["levelist"] = {}
-        coverage["domain"]["axes"]["levelist"]["values"] = coords["levelist"]
+        coverage["domain"]["axes"]["t"] = self.domain_axis(coords["t"])
+        coverage["domain"]["axes"]["latitude"] = self.domain_axis(coords["latitude"])
+        coverage["domain"]["axes"]["longitude"] = self.domain_axis(coords["longitude"])
+        coverage["domain"]["axes"]["levelist"] = self.domain_axis(coords["levelist"])
 
     def add_range(self, coverage, values):
         for parameter in values.keys():
@@ -46,14 +45,55 @@ class Grid(Encoder):
             coverage["ranges"][param]["dataType"] = "float"
             coverage["ranges"][param]["shape"] = self.shp
             coverage["ranges"][param]["axisNames"] = ["t", "levelist", "latitude", "longitude"]
-            coverage["ranges"][param]["values"] = values[parameter]  # [values[parameter]]
+            coverage["ranges"][param]["values"] = self.range_values(values[parameter], param)  # [values[parameter]]
 
     def add_mars_metadata(self, coverage, metadata):
         coverage["mars:metadata"] = metadata
 
-    def add_if_not_close(self, my_list, number, threshold=0.01):
-        if all(abs(number - x) > threshold for x in my_list):
-            my_list.append(number)
+    def to_tiled(self, tile_shapes, url_template, store, base_url=""):
+        """
+        Replace the NdArray ranges of the encoded coverages by TiledNdArray ranges.
+
+        The values of every range are cut into tiles written to ``store`` as
+        separate NdArray documents, so clients only fetch the tiles they draw.
+        This works on the coverages kept in ``covjson``, not on output streamed
+        to a ``sink``.
+
+        Args:
+            tile_shapes (list): One tile shape per tile set, over the axes
+                ``[t, levelist, latitude, longitude]``; ``None`` keeps an axis whole,
+                e.g. ``[[1, 1, None, None]]`` for one tile per step and level.
+            url_template (str): Path of a tile. ``{coverage}`` (index of the coverage),
+                ``{parameter}`` and ``{tileset}`` are filled in here; the tiled axes,
+                e.g. ``{t}``, are left for the client to fill in with tile indices.
+            store (str or MutableMapping): Directory to write the tiles to, or a mapping
+                receiving the bytes of each tile under its path.
+            base_url (str): Prepended to ``url_template`` in the ranges.
+
+        Returns:
+            dict: The CoverageJSON collection with TiledNdArray ranges.
+        """
+        write = tile_writer(store)
+        for number, coverage in enumerate(self.covjson["coverages"]):
+            for param, ndarray in coverage["ranges"].items():
+                if ndarray.get("type") != "NdArray":
+                    continue
+                template = url_template.replace("{coverage}", str(number)).replace("{parameter}", param)
+                coverage["ranges"][param] = tiled_range(ndarray, tile_shapes, template, write, base_url)
+        return self.covjson
+
+    def grid_axes(self, composite, known):
+        """Latitude and longitude axes of the points ``composite``.
+
+        ``known`` holds the ``(composite, axes)`` already built for this result;
+        dates sharing a geometry reuse its axes instead of building them again.
+        """
+        for points, axes in known:
+            if points is composite or points == composite:
+                return axes
+        axes = (unique_axis(cor[0] for cor in composite), unique_axis(cor[1] for cor in composite))
+        known.append((composite, axes))
+        return axes
 
     def from_xarray(self, dataset):
         """
@@ -121,6 +161,7 @@ class Grid(Encoder):
         # Return the generated CoverageJSON
         return self.covjson
 
+    @streamable
     def from_polytope(self, result, date_key: str = "date") -> dict:
         """Encode a polytope ``TensorIndexTree`` result into a Grid CoverageJSON collection."""
         coords = {}
@@ -166,10 +207,9 @@ class Grid(Encoder):
                             # for k, v in range_dict.items():
                             # if k == key:
                             if s not in combined_dict[date][num][para]:
-                                combined_dict[date][num][para][s] = range_dict[key]
+                                combined_dict[date][num][para][s] = [range_dict[key]]
                             else:
-                                # Cocatenate arrays
-                                combined_dict[date][num][para][s] += range_dict[key]
+                                combined_dict[date][num][para][s].append(range_dict[key])
 
         if fields["param"] == 0:
             raise ValueError("No data was returned.")
@@ -184,19 +224,16 @@ class Grid(Encoder):
         coordinates = {}
         coordinates["t"] = [int(s.total_seconds() // 3600) if isinstance(s, timedelta) else s for s in fields["step"]]
 
+        known_axes = []
         for date in coords.keys():
             coordinates[date] = {}
             coordinates[date]["t"] = [
                 int(s.total_seconds() // 3600) if isinstance(s, timedelta) else s for s in fields["step"]
             ]
             coordinates[date]["levelist"] = list(fields["levels"])
-            coordinates[date]["latitude"] = []
-            coordinates[date]["longitude"] = []
-            for cor in coords[date]["composite"]:
-                self.add_if_not_close(coordinates[date]["latitude"], cor[0])
-                self.add_if_not_close(coordinates[date]["longitude"], cor[1])
-            coordinates[date]["latitude"] = list(coordinates[date]["latitude"])
-            coordinates[date]["longitude"] = list(coordinates[date]["longitude"])
+            latitudes, longitudes = self.grid_axes(coords[date]["composite"], known_axes)
+            coordinates[date]["latitude"] = latitudes
+            coordinates[date]["longitude"] = longitudes
 
         self.shp = [
             len(coordinates[fields["dates"][0]]["t"]),
@@ -209,9 +246,11 @@ class Grid(Encoder):
             for num in combined_dict[date].keys():
                 val_dict = {}
                 for para in combined_dict[date][num].keys():
-                    val_dict[para] = []
+                    parts = []
                     for step in combined_dict[date][num][para].keys():
-                        val_dict[para].extend(combined_dict[date][num][para][step])
+                        parts.extend(combined_dict[date][num][para][step])
+                    # Concatenate the levels of every step
+                    val_dict[para] = join_ranges(parts)
                 mm = mars_metadata.copy()
                 mm["number"] = num
                 mm["step"] = normalize_step_value(step)
@@ -220,6 +259,7 @@ class Grid(Encoder):
 
         return self.covjson
 
+    @streamable
     def from_polytope_month(self, result):
         coords = {}
         mars_metadata = {}
@@ -265,15 +305,14 @@ class Grid(Encoder):
         # Build named grid axes, one entry per date key ("YYYY-MM").
         # The t axis holds the "first of month" ISO timestamps for all dates.
         coordinates = {}
+        known_axes = []
         for date in fields["dates"]:
             coordinates[date] = {}
             coordinates[date]["t"] = [f"{date}-01T00:00:00Z"]
             coordinates[date]["levelist"] = list(fields["levels"])
-            coordinates[date]["latitude"] = []
-            coordinates[date]["longitude"] = []
-            for cor in coords.get(date, {}).get("composite", []):
-                self.add_if_not_close(coordinates[date]["latitude"], cor[0])
-                self.add_if_not_close(coordinates[date]["longitude"], cor[1])
+            latitudes, longitudes = self.grid_axes(coords.get(date, {}).get("composite", []), known_axes)
+            coordinates[date]["latitude"] = latitudes
+            coordinates[date]["longitude"] = longitudes
 
         if fields["dates"]:
             first_date = fields["dates"][0]
@@ -1,6 +1,13 @@
 import logging
 
-from .encoder import Encoder, normalize_step_value
+from .encoder import (
+    Encoder,
+    join_ranges,
+    normalize_step_value,
+    xarray_cubes,
+    xarray_points,
+)
+from .stream import streamable
 
 
 class Path(Encoder):
@@ -38,7 +45,7 @@ class Path(Encoder):
             coverage["ranges"][param]["dataType"] = "float"
             coverage["ranges"][param]["shape"] = [len(values[parameter])]
             coverage["ranges"][param]["axisNames"] = [str(param)]
-            coverage["ranges"][param]["values"] = values[parameter]  # [values[parameter]]
+            coverage["ranges"][param]["values"] = self.range_values(values[parameter], param)  # [values[parameter]]
 
     def add_mars_metadata(self, coverage, metadata):
         coverage["mars:metadata"] = metadata
@@ -84,36 +91,28 @@ class Path(Encoder):
 
         # Prepare coordinates
         coords = {
-            "composite": [],
+            "composite": xarray_points(dataset, ["time", "latitude", "longitude", "levelist"]),
             "dataType": "tuple",
         }
 
-        for point in dataset["points"].values:
-            coords["composite"].append(
-                [
-                    float(dataset.isel(points=point).time.values),
-                    float(dataset.isel(points=point).latitude.values),
-                    float(dataset.isel(points=point).longitude.values),
-                    float(dataset.isel(points=point).levelist.values),
-                ]
-            )
-
-        for datetime in dataset["datetimes"].values:
-            for num in dataset["number"].values:
-                for step in dataset["steps"].values:
+        cubes = xarray_cubes(dataset)
+        for i, datetime in enumerate(dataset["datetimes"].values):
+            for j, num in enumerate(dataset["number"].values):
+                for k, step in enumerate(dataset["steps"].values):
                     dv_dict = {}
                     mars_metadata = {metadata: dataset.attrs[metadata] for metadata in dataset.attrs}
                     mars_metadata["number"] = int(num)
                     mars_metadata["step"] = normalize_step_value(step)
                     mars_metadata["Forecast date"] = str(datetime)
-                    for dv in dataset.data_vars:
-                        dv_dict[dv] = dataset[dv].sel(number=num, steps=step, datetimes=datetime).values.tolist()
+                    for dv, cube in cubes.items():
+                        dv_dict[dv] = cube[i, j, k].tolist()
 
                     self.add_coverage(mars_metadata, coords, dv_dict)
 
         # Return the generated CoverageJSON
         return self.covjson
 
+    @streamable
     def from_polytope(self, result, date_key: str = "date") -> dict:
         """Encode a polytope ``TensorIndexTree`` result into a Trajectory (Path) CoverageJSON collection."""
         coords = {}
@@ -193,12 +192,11 @@ class Path(Encoder):
                             # if k == key:
                             if s not in combined_dict[date][num][para]:
                                 if key in range_dict:
-                                    combined_dict[date][num][para][s] = range_dict[key]
+                                    combined_dict[date][num][para][s] = [range_dict[key]]
                                 # combined_dict[date][num][para][s] = range_dict[key]
                             else:
-                                # Cocatenate arrays
                                 if key in range_dict:
-                                    combined_dict[date][num][para][s] += range_dict[key]
+                                    combined_dict[date][num][para][s].append(range_dict[key])
 
         logging.debug("The values returned from combined dicts: %s", combined_dict)  # noqa: E501
 
@@ -216,10 +214,11 @@ class Path(Encoder):
             for num in combined_dict[date].keys():
                 val_dict = {}
                 for para in combined_dict[date][num].keys():
-                    if para not in val_dict:
-                        val_dict[para] = []
+                    parts = []
                     for step in combined_dict[date][num][para].keys():
-                        val_dict[para].extend(combined_dict[date][num][para][step])
+                        parts.extend(combined_dict[date][num][para][step])
+                    # Concatenate the levels of every step
+                    val_dict[para] = join_ranges(parts)
                 mm = mars_metadata.copy()
                 mm["number"] = num
                 mm["Forecast date"] = date
@@ -229,6 +228,7 @@ class Path(Encoder):
 
         return self.covjson
 
+    @streamable
     def from_polytope_month(self, result):
         coords = {}
         mars_metadata = {}
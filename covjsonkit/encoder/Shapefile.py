@@ -1,6 +1,13 @@
 import logging
 
-from .encoder import Encoder, normalize_step_value
+from .encoder import (
+    Encoder,
+    join_ranges,
+    normalize_step_value,
+    xarray_cubes,
+    xarray_points,
+)
+from .stream import streamable
 
 
 class Shapefile(Encoder):
@@ -16,7 +23,7 @@ class Shapefile(Encoder):
         new_coverage["domain"] = {}
         new_coverage["ranges"] = {}
         self.add_mars_metadata(new_coverage, mars_metadata)
-        self.add_domain(new_coverage, coords)
+        self.attach_domain(new_coverage, coords)
         self.add_range(new_coverage, values)
         self.covjson["coverages"].append(new_coverage)
         # cov = Coverage.model_validate_json(json.dumps(new_coverage))
@@ -42,7 +49,7 @@ class Shapefile(Encoder):
             coverage["ranges"][param]["dataType"] = "float"
             coverage["ranges"][param]["shape"] = [len(values[parameter])]
             coverage["ranges"][param]["axisNames"] = [str(param)]
-            coverage["ranges"][param]["values"] = values[parameter]  # [values[parameter]]
+            coverage["ranges"][param]["values"] = self.range_values(values[parameter], param)  # [values[parameter]]
 
     def add_mars_metadata(self, coverage, metadata):
         coverage["mars:metadata"] = metadata
@@ -84,36 +91,29 @@ class Shapefile(Encoder):
 
         # Prepare coordinates
         coords = {
-            "composite": [],
+            "composite": xarray_points(dataset, ["longitude", "latitude", "levelist"]),
             "dataType": "tuple",
             "t": [str(x) for x in dataset["datetimes"].values],
         }
 
-        for point in dataset["points"].values:
-            coords["composite"].append(
-                [
-                    float(dataset.isel(points=point).longitude.values),
-                    float(dataset.isel(points=point).latitude.values),
-                    float(dataset.isel(points=point).levelist.values),
-                ]
-            )
-
-        for datetime in dataset["datetimes"].values:
-            for num in dataset["number"].values:
-                for step in dataset["steps"].values:
+        cubes = xarray_cubes(dataset)
+        for i, datetime in enumerate(dataset["datetimes"].values):
+            for j, num in enumerate(dataset["number"].values):
+                for k, step in enumerate(dataset["steps"].values):
                     dv_dict = {}
                     mars_metadata = {metadata: dataset.attrs[metadata] for metadata in dataset.attrs}
                     mars_metadata["number"] = int(num)
                     mars_metadata["step"] = normalize_step_value(step)
                     mars_metadata["Forecast date"] = str(datetime)
-                    for dv in dataset.data_vars:
-                        dv_dict[dv] = dataset[dv].sel(number=num, steps=step, datetimes=datetime).values.tolist()
+                    for dv, cube in cubes.items():
+                        dv_dict[dv] = cube[i, j, k].tolist()
 
                     self.add_coverage(mars_metadata, coords, dv_dict)
 
         # Return the generated CoverageJSON
         return self.covjson
 
+    @streamable
     def from_polytope(self, result, date_key: str = "date") -> dict:
         """Encode a polytope ``TensorIndexTree`` result into a MultiPoint (Shapefile) CoverageJSON collection."""
         coords = {}
@@ -160,10 +160,9 @@ class Shapefile(Encoder):
                             for k, v in range_dict.items():
                                 if k == key:
                                     if s not in combined_dict[date][num][para]:
-                                        combined_dict[date][num][para][s] = v
+                                        combined_dict[date][num][para][s] = [v]
                                     else:
-                                        # Cocatenate arrays
-                                        combined_dict[date][num][para][s] += v
+                                        combined_dict[date][num][para][s].append(v)
 
         levels = fields["levels"]
         for para in fields["param"]:
@@ -185,7 +184,8 @@ class Shapefile(Encoder):
                     val_dict[step] = {}
                 for para in combined_dict[date][num].keys():
                     for step in combined_dict[date][num][para].keys():
-                        val_dict[step][para] = combined_dict[date][num][para][step]
+                        # Concatenate the levels
+                        val_dict[step][para] = join_ranges(combined_dict[date][num][para][step])
                 for step in val_dict.keys():
                     mm = mars_metadata.copy()
                     mm["number"] = num
@@ -195,6 +195,7 @@ class Shapefile(Encoder):
 
         return self.covjson
 
+    @streamable
     def from_polytope_month(self, result):
         coords = {}
         mars_metadata = {}
@@ -1,10 +1,10 @@
 import logging
 import time
-from datetime import datetime, timedelta
 
 import pandas as pd
 
-from .encoder import Encoder
+from .encoder import Encoder, forecast_times
+from .stream import streamable
 
 
 class TimeSeries(Encoder):
@@ -46,9 +46,9 @@ class TimeSeries(Encoder):
             coverage["ranges"][param]["dataType"] = "float"
             coverage["ranges"][param]["shape"] = [len(values[parameter])]
             coverage["ranges"][param]["axisNames"] = [str(param)]
-            coverage["ranges"][param]["values"] = values[
-                parameter
-            ]  # [values[parameter][val][0] for val in values[parameter].keys()]
+            coverage["ranges"][param]["values"] = self.range_values(
+                values[parameter], param
+            )  # [values[parameter][val][0] for val in values[parameter].keys()]
 
     def add_mars_metadata(self, coverage, metadata):
         coverage["mars:metadata"] = metadata
@@ -123,6 +123,7 @@ class TimeSeries(Encoder):
 
         return self.covjson
 
+    @streamable
     def from_polytope(self, result, date_key: str = "date") -> dict:
         """Encode a polytope ``TensorIndexTree`` result into a PointSeries CoverageJSON collection.
 
@@ -177,6 +178,8 @@ class TimeSeries(Encoder):
 
         points = len(coords[fields["dates"][0]]["composite"])
 
+        # Every point of a date shares the same time axis
+        times = forecast_times(fields["dates"], fields["step"])
         for date in fields["dates"]:
             coordinates[date] = []
             for i, point in enumerate(range(points)):
@@ -185,29 +188,9 @@ class TimeSeries(Encoder):
                         "latitude": [coords[date]["composite"][i][0]],
                         "longitude": [coords[date]["composite"][i][1]],
                         "levelist": [levels[0]],
+                        "t": times[date],
                     }
                 )
-                coordinates[date][i]["t"] = []
-                for level in fields["levels"]:
-                    for num in fields["number"]:
-                        for para in fields["param"]:
-                            for step in fields["step"]:
-                                date_format = "%Y%m%dT%H%M%S"
-                                new_date = pd.Timestamp(date).strftime(date_format)
-                                start_time = datetime.strptime(new_date, date_format)
-                                # add current date to list by converting it to iso format
-                                if isinstance(step, timedelta):
-                                    stamp = start_time + step
-                                else:
-                                    try:
-                                        int(step)
-                                    except ValueError:
-                                        step = step[0]
-                                    stamp = start_time + timedelta(hours=int(step))
-                                coordinates[date][i]["t"].append(stamp.isoformat() + "Z")
-                            break
-                        break
-                    break
 
         logging.debug("Coordinates created: %s", coordinates)  # noqa: E501
 
@@ -258,6 +241,7 @@ class TimeSeries(Encoder):
 
         return self.covjson
 
+    @streamable
     def from_polytope_month(self, result):
         """Convert a Polytope result for monthly-mean streams (e.g. clmn) into CovJSON.
 
@@ -369,6 +353,7 @@ class TimeSeries(Encoder):
 
         return self.covjson
 
+    @streamable
     def from_polytope_step(self, result):
         coords = {}
         mars_metadata = {}
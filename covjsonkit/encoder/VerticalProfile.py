@@ -1,10 +1,8 @@
 import logging
 import time
-from datetime import datetime, timedelta
 
-import pandas as pd
-
-from .encoder import Encoder, normalize_step_value
+from .encoder import Encoder, forecast_times, normalize_step_value
+from .stream import streamable
 
 
 class VerticalProfile(Encoder):
@@ -29,11 +27,10 @@ class VerticalProfile(Encoder):
         coverage["domain"]["axes"] = {}
         coverage["domain"]["axes"]["latitude"] = {}
         coverage["domain"]["axes"]["longitude"] = {}
-        coverage["domain"]["axes"]["levelist"] = {}
+        coverage["domain"]["axes"]["levelist"] = self.domain_axis(coords["levelist"])
         coverage["domain"]["axes"]["t"] = {}
         coverage["domain"]["axes"]["latitude"]["values"] = coords["latitude"]
         coverage["domain"]["axes"]["longitude"]["values"] = coords["longitude"]
-        coverage["domain"]["axes"]["levelist"]["values"] = coords["levelist"]
         coverage["domain"]["axes"]["t"]["values"] = coords["t"]
 
     def add_range(self, coverage, values):
@@ -44,7 +41,7 @@ class VerticalProfile(Encoder):
             coverage["ranges"][param]["dataType"] = "float"
             coverage["ranges"][param]["shape"] = [len(values[parameter])]
             coverage["ranges"][param]["axisNames"] = ["levelist"]
-            coverage["ranges"][param]["values"] = values[parameter]  # [values[parameter]]
+            coverage["ranges"][param]["values"] = self.range_values(values[parameter], param)  # [values[parameter]]
 
     def add_mars_metadata(self, coverage, metadata):
         coverage["mars:metadata"] = metadata
@@ -121,6 +118,7 @@ class VerticalProfile(Encoder):
 
         return self.covjson
 
+    @streamable
     def from_polytope(self, result, date_key: str = "date") -> dict:
         """Encode a polytope ``TensorIndexTree`` result into a VerticalProfile CoverageJSON collection."""
         coords = {}
@@ -167,29 +165,18 @@ class VerticalProfile(Encoder):
 
         points = len(coords[fields["dates"][0]]["composite"])
 
+        times = forecast_times(fields["dates"], fields["step"])
         for date in fields["dates"]:
             coordinates[date] = {}
             for i, point in enumerate(range(points)):
                 coordinates[date][i] = []
-                for step in fields["step"]:
-                    date_format = "%Y%m%dT%H%M%S"
-                    new_date = pd.Timestamp(date).strftime(date_format)
-                    start_time = datetime.strptime(new_date, date_format)
-                    # add current date to list by converting it to iso format
-                    if isinstance(step, timedelta):
-                        stamp = start_time + step
-                    else:
-                        try:
-                            int(step)
-                        except ValueError:
-                            step = step[0]
-                        stamp = start_time + timedelta(hours=int(step))
+                for stamp in times[date]:
                     coordinates[date][i].append(
                         {
                             "latitude": [coords[date]["composite"][i][0]],
                             "longitude": [coords[date]["composite"][i][1]],
                             "levelist": list(levels),
-                            "t": [stamp.isoformat() + "Z"],
+                            "t": [stamp],
                         }
                     )
 
@@ -240,6 +227,7 @@ class VerticalProfile(Encoder):
 
         return self.covjson
 
+    @streamable
     def from_polytope_month(self, result):
         coords = {}
         mars_metadata = {}
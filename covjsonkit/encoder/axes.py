@@ -0,0 +1,62 @@
+"""Building domain axes from the points of a polytope result.
+
+:func:`unique_axis` collects the distinct latitudes or longitudes of a grid
+without comparing every point with every value kept so far, and
+:func:`regular_axis` recognises evenly spaced axes, which CoverageJSON can
+write as ``{"start", "stop", "num"}`` instead of listing their values.
+"""
+
+import math
+
+import numpy as np
+
+from ..utils import regular_axis_values
+
+# Number of values lists whose compact form an encoder remembers
+COMPACT_AXES_CACHE_SIZE = 64
+
+
+def unique_axis(values, tolerance=0.01):
+    """Distinct ``values`` in first-seen order, skipping those within ``tolerance`` of a kept value.
+
+    Rather than comparing each value with every kept one, the kept values are
+    looked up in buckets of width ``tolerance``, so each value is only compared
+    with its neighbours.
+    """
+    kept = []
+    buckets = {}
+    for value in values:
+        bucket = math.floor(value / tolerance)
+        # Two buckets either side, in case the division rounds across a bucket edge
+        if any(
+            abs(value - other) <= tolerance for near in range(bucket - 2, bucket + 3) for other in buckets.get(near, ())
+        ):
+            continue
+        kept.append(value)
+        buckets.setdefault(bucket, []).append(value)
+    return kept
+
+
+def regular_axis(values, min_length=3):
+    """``{"start", "stop", "num"}`` of evenly spaced numeric ``values``, or ``None`` if they are not.
+
+    Axes shorter than ``min_length`` are left as values, where the compact form
+    saves nothing. Decoding expands the compact form with
+    :func:`~covjsonkit.utils.regular_axis_values`, so only axes it gives back
+    exactly are compacted: a 0.1 degree axis built by adding up or rounding
+    steps often differs from ``np.linspace`` in the last bit of some values.
+    """
+    if len(values) < min_length:
+        return None
+    array = np.asarray(values)
+    # Only numbers can be written as start/stop, not ISO times or level names
+    if array.ndim != 1 or array.dtype.kind not in "iuf":
+        return None
+    if not np.isfinite(array).all():
+        return None
+    start, stop, num = array[0].item(), array[-1].item(), len(array)
+    if start == stop:
+        return None
+    if not np.array_equal(regular_axis_values(start, stop, num), array):
+        return None
+    return {"start": values[0], "stop": values[-1], "num": num}
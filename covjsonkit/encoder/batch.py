@@ -0,0 +1,96 @@
+"""Encoding several polytope results of one request as a single collection.
+
+Large requests are often split across polytope workers, by parameter, date,
+ensemble member or area. :meth:`Encoder.from_polytope_many` walks each of the
+resulting trees into the same ``fields``/``coords``/``range_dict`` store that
+a single tree would have produced, so the encoder assembles one collection
+without encoding and merging a collection per piece.
+
+For every date the pieces either:
+
+* cover the same points with different range keys (a split by parameter,
+  ensemble member or step), whose keys are simply added to the store, or
+* cover different points with the same range keys (a split by area), whose
+  points and values are concatenated in the order of the pieces.
+"""
+
+import copy
+
+import numpy as np
+
+
+class ResultBatch(tuple):
+    """Polytope result trees to be walked into one store, in order."""
+
+
+def merge_walk(initial, fields, coords, mars_metadata, range_dict, part):
+    """Merge the store ``part`` of one walked piece into the shared store.
+
+    ``initial`` holds the ``fields`` the encoder started from, so that the
+    defaults of axes missing from a piece are not taken for values.
+    """
+    part_fields, part_coords, part_metadata, part_ranges = part
+
+    # Axis values are lists, or the tuples of node values
+    for name, values in part_fields.items():
+        if not isinstance(values, (list, tuple)) or values == initial.get(name):
+            continue
+        shared = fields.get(name)
+        if not isinstance(shared, (list, tuple)) or shared == initial.get(name):
+            fields[name] = list(values)
+        else:
+            fields[name] = list(shared) + [value for value in values if value not in shared]
+
+    keys_by_date = {}
+    for key in range_dict:
+        keys_by_date.setdefault(key[0], set()).add(key)
+    part_keys_by_date = {}
+    for key in part_ranges:
+        part_keys_by_date.setdefault(key[0], set()).add(key)
+
+    for date, entry in part_coords.items():
+        part_keys = part_keys_by_date.get(date, set())
+        if date not in coords:
+            coords[date] = entry
+            range_dict.update((key, part_ranges[key]) for key in part_keys)
+            continue
+        existing = coords[date]
+        keys = keys_by_date.get(date, set())
+        if entry == existing:
+            overlap = keys & part_keys
+            if overlap:
+                raise ValueError(f"Several results hold values for {sorted(overlap, key=str)[0]}")
+            range_dict.update((key, part_ranges[key]) for key in part_keys)
+        elif _same_except_points(existing, entry) and keys == part_keys:
+            existing["composite"].extend(entry["composite"])
+            for key in part_keys:
+                if isinstance(range_dict[key], list):
+                    range_dict[key].extend(part_ranges[key])
+                else:
+                    # Ranges the walker kept as arrays
+                    range_dict[key] = np.concatenate((range_dict[key], part_ranges[key]))
+        else:
+            raise ValueError(
+                f"Results for {date} neither cover the same points nor the same parameters, "
+                "members and steps, so they cannot be encoded as one collection"
+            )
+
+    mars_metadata.update(part_metadata)
+
+
+def _same_except_points(existing, entry):
+    return {name: value for name, value in existing.items() if name != "composite"} == {
+        name: value for name, value in entry.items() if name != "composite"
+    }
+
+
+def walk_batch(walk, results, fields, coords, mars_metadata, range_dict):
+    """Walk every tree of ``results`` with ``walk(tree, fields, coords, mars_metadata, range_dict)`` into one store."""
+    initial = copy.deepcopy(fields)
+    for number, tree in enumerate(results):
+        if number == 0:
+            walk(tree, fields, coords, mars_metadata, range_dict)
+            continue
+        part = (copy.deepcopy(initial), {}, {}, {})
+        walk(tree, *part)
+        merge_walk(initial, fields, coords, mars_metadata, range_dict, part)
@@ -1,7 +1,12 @@
 from __future__ import annotations
 
+import os
 from abc import ABC, abstractmethod
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import timedelta
+from functools import partial
+from itertools import product
 from typing import Any
 
 import numpy as np
@@ -10,7 +15,20 @@ import pandas as pd
 from covjson_pydantic.coverage import CoverageCollection
 from covjson_pydantic.domain import DomainType
 
-from covjsonkit.param_db import get_param_ids, get_params, get_units
+from covjsonkit.param_db import get_catalogue
+from covjsonkit.utils import NPY_RANGE_KEY
+
+from . import fragments
+from .axes import COMPACT_AXES_CACHE_SIZE, regular_axis
+from .batch import ResultBatch, walk_batch
+from .leaf_table import LeafTable
+from .stream import (
+    DEFAULT_CHUNK_SIZE,
+    DUMPS_OPTION,
+    iter_collection,
+    iter_compressed,
+    streamable,
+)
 
 try:
     # Polytope compacts unstructured-grid (e.g. ICON, Lambert LAM) leaves into a single
@@ -119,6 +137,22 @@ def sort_step_values(steps: list) -> list:
     return [step[0] for step in step_tuples]
 
 
+def join_ranges(parts):
+    """Range values of ``parts``, e.g. the levels of one step, one after the other.
+
+    The parts are lists of floats, or float64 arrays when the walker keeps the
+    ranges as arrays (see ``PlanWalker``). A single part is returned as is.
+    """
+    if len(parts) == 1:
+        return parts[0]
+    if parts and isinstance(parts[0], np.ndarray):
+        return np.concatenate(parts)
+    joined = []
+    for part in parts:
+        joined += part
+    return joined
+
+
 def normalize_step_value(step):
     """
     Normalize a step value from various formats, preserving integers when possible.
@@ -196,6 +230,588 @@ def normalize_step_value(step):
     return str(step)
 
 
+def step_offset(step):
+    """Time after the forecast date of a step: a ``timedelta`` as is, otherwise a number of hours."""
+    if isinstance(step, timedelta):
+        return step
+    try:
+        int(step)
+    except ValueError:
+        step = step[0]
+    return timedelta(hours=int(step))
+
+
+def forecast_times(dates, steps):
+    """ISO timestamps of every step of every forecast date, as ``{date: [t, ...]}``.
+
+    Dates are truncated to whole seconds and written as ``"YYYY-MM-DDTHH:MM:SSZ"``,
+    like ``(start + step).isoformat() + "Z"``. The table is computed once for all
+    dates and steps with ``datetime64`` arithmetic; the lists may be shared by
+    every coverage of a date.
+    """
+    offsets = [step_offset(step) for step in steps]
+    starts = [pd.Timestamp(date).replace(tzinfo=None).floor("s") for date in dates]
+    if any(offset % timedelta(seconds=1) for offset in offsets):
+        # Sub-second steps keep their fraction, as isoformat() writes it
+        return {
+            date: [(start.to_pydatetime() + offset).isoformat() + "Z" for offset in offsets]
+            for date, start in zip(dates, starts)
+        }
+    deltas = np.array([offset // timedelta(seconds=1) for offset in offsets], dtype="timedelta64[s]")
+    stamps = np.array([start.to_datetime64() for start in starts], dtype="datetime64[s]")
+    table = np.char.add(np.datetime_as_string(stamps[:, None] + deltas[None, :], unit="s"), "Z")
+    return {date: row for date, row in zip(dates, table.tolist())}
+
+
+def xarray_points(dataset, names):
+    """Composite axis values of the points of ``dataset``: per point, a list of its ``names`` coordinates as floats.
+
+    Every coordinate is taken from ``dataset`` as a whole array, instead of
+    indexing the dataset once per point and coordinate.
+    """
+    indices = dataset["points"].values
+    columns = []
+    for name in names:
+        coord = dataset[name]
+        values = coord.isel(points=indices).values if "points" in coord.dims else np.full(len(indices), coord.values)
+        columns.append(np.asarray(values, dtype=np.float64))
+    return np.column_stack(columns).tolist() if columns else []
+
+
+def xarray_cubes(dataset, dims=("datetimes", "number", "steps")):
+    """Values of every data variable of ``dataset`` as one NumPy array, with the axes ``dims`` first.
+
+    ``cubes[name][i, j, k]`` holds the values of the ``i``-th datetime, ``j``-th
+    member and ``k``-th step, so the encoders slice each array instead of
+    selecting every combination from the dataset.
+    """
+    return {name: dataset[name].transpose(*dims, ...).values for name in dataset.data_vars}
+
+
+def _mars_metadata_value(node, steps=True):
+    """Value of a single-valued axis node as stored in ``mars_metadata``."""
+    val = node.values[0]
+    if isinstance(val, np.datetime64):
+        val = str(val)
+    elif steps and isinstance(val, timedelta):
+        val = timedelta_to_step_string(val)
+    elif steps and node.axis.name == "step":
+        # Step is not a timedelta! Need to normalize it
+        val = normalize_step_value(val)
+    return val
+
+
+def _year_month_key(year, month):
+    return f"{int(year):04d}-{int(month):02d}"
+
+
+def tree_axis_order(tree):
+    """Axis names along the first root-to-leaf path of ``tree``, outermost first.
+
+    Polytope builds every branch of a result tree from the same datacube, so
+    one path is enough to know the order of its axes.
+    """
+    order = []
+    node = tree
+    while node.children:
+        node = node.children[0]
+        if is_merged_node(node):
+            order.extend(axis.name for axis in node.axes)
+            break
+        order.append(node.axis.name)
+    return tuple(order)
+
+
+def leaf_layout_axes(axis_order, layout_axes):
+    """Axes of a leaf result, outermost first, ordered as their tree axes appear in ``axis_order``.
+
+    ``layout_axes`` maps each axis of the leaf layout to the tree axes it comes
+    from. Polytope flattens a leaf result over its compressed axes in tree
+    order, so that order gives the strides. Axes absent from the tree hold a
+    single value and keep their place after the others.
+    """
+    position = {name: i for i, name in enumerate(axis_order)}
+
+    def tree_position(item):
+        found = [position[name] for name in item[1] if name in position]
+        return min(found) if found else len(axis_order)
+
+    return tuple(axis for axis, _ in sorted(layout_axes.items(), key=tree_position))
+
+
+class TraversalPlan:
+    def __init__(
+        self,
+        kind,
+        axis_order,
+        handlers,
+        skip_metadata,
+        key_axes,
+        layout_axes,
+        leaf_dates,
+        chunk,
+        flat,
+        steps=True,
+    ):
+        """
+        How to walk one polytope result tree, compiled from its axis order.
+
+        Use :meth:`forecast`, :meth:`step` or :meth:`month` rather than
+        instantiating directly.
+
+        Attributes:
+            kind (str): "forecast", "step" or "month".
+            axis_order (tuple): Axis names of the tree, outermost first.
+            handlers (dict): ``PlanWalker`` method name for every axis that feeds ``fields``.
+            skip_metadata (frozenset): Axes that are not recorded in ``mars_metadata``.
+            key_axes (tuple): ``fields`` entries that follow the date in a ``range_dict`` key.
+            layout_axes (dict): Tree axes of every axis of the leaf result layout. "dates"
+                refers to the dates of the leaf, "years" and "months" to the year and
+                month of its year/month dates, any other name to an entry of ``fields``.
+            strided_axes (tuple): The ``layout_axes``, outermost first, in the order of
+                their tree axes in ``axis_order``.
+            leaf_dates (str): "last" (the last date seen), "all" (every date seen) or
+                "year_month" (the year/month pairs in scope, in tree order).
+            chunk (str): Length of a leaf slice: the innermost "stride", the number
+                of "times", or the number of longitudes ("lon").
+            flat (bool): Extend ``range_dict`` lists with the slice instead of appending it.
+            steps (bool): Convert timedelta and step metadata to step values.
+        """
+        self.kind = kind
+        self.axis_order = axis_order
+        self.handlers = handlers
+        self.skip_metadata = skip_metadata
+        self.key_axes = key_axes
+        self.layout_axes = layout_axes
+        self.strided_axes = leaf_layout_axes(axis_order, layout_axes)
+        self.leaf_dates = leaf_dates
+        self.chunk = chunk
+        self.flat = flat
+        self.steps = steps
+        if "year" in axis_order and "month" in axis_order:
+            self.year_is_outer = axis_order.index("year") < axis_order.index("month")
+        else:
+            self.year_is_outer = True
+
+    @classmethod
+    def forecast(cls, tree, date_key="date"):
+        """Plan for ``walk_tree``: one date per leaf, keyed by ``(date, level, number, param, step)``."""
+        handlers = {
+            "latitude": "handle_latitude",
+            "levelist": "handle_levelist",
+            "param": "handle_param",
+            date_key: "handle_forecast_date",
+            "time": "handle_forecast_date",
+            "number": "handle_number",
+            "step": "handle_step",
+        }
+        return cls(
+            "forecast",
+            tree_axis_order(tree),
+            handlers,
+            frozenset(("latitude", "longitude", "param", date_key)),
+            key_axes=("levels", "number", "param", "step"),
+            layout_axes={"levels": ("levelist",), "number": ("number",), "param": ("param",), "step": ("step",)},
+            leaf_dates="last",
+            chunk="stride",
+            flat=True,
+        )
+
+    @classmethod
+    def step(cls, tree):
+        """Plan for ``walk_tree_step``: a ``time`` axis below ``date``, keyed by ``(date, level, number, param)``."""
+        handlers = {
+            "latitude": "handle_latitude",
+            "levelist": "handle_levelist",
+            "param": "handle_param",
+            "date": "handle_date",
+            "number": "handle_number",
+            "step": "handle_step",
+            "time": "handle_time",
+        }
+        return cls(
+            "step",
+            tree_axis_order(tree),
+            handlers,
+            frozenset(("latitude", "longitude", "param", "date", "time")),
+            key_axes=("levels", "number", "param"),
+            layout_axes={"dates": ("date",), "levels": ("levelist",), "param": ("param",)},
+            leaf_dates="all",
+            chunk="times",
+            flat=False,
+        )
+
+    @classmethod
+    def month(cls, tree):
+        """Plan for ``walk_tree_month``: ``year`` and ``month`` axes, keyed by ``("YYYY-MM", level, number, param)``."""
+        handlers = {
+            "latitude": "handle_latitude",
+            "levelist": "handle_levelist",
+            "param": "handle_param",
+            "year": "handle_year",
+            "month": "handle_month",
+            "number": "handle_number",
+        }
+        return cls(
+            "month",
+            tree_axis_order(tree),
+            handlers,
+            frozenset(("latitude", "longitude", "param", "year", "month")),
+            key_axes=("levels", "number", "param"),
+            layout_axes={"years": ("year",), "months": ("month",), "levels": ("levelist",), "param": ("param",)},
+            leaf_dates="year_month",
+            chunk="lon",
+            flat=False,
+            steps=False,
+        )
+
+
+class PlanWalker:
+    def __init__(self, plan, fields, coords, mars_metadata, range_dict, arrays=False, table=False):
+        """
+        Pre-order walk of a polytope result tree driven by a :class:`TraversalPlan`.
+
+        A walker is created once per ``Encoder.walk_tree*`` call: the axis
+        handlers named by the plan are bound once, and the tree is traversed with
+        an explicit stack, so its depth is not limited by the recursion limit.
+
+        A leaf whose result is all ``None`` marks the dates it covers as missing.
+        Once the walk is complete, missing dates are dropped from
+        ``fields["dates"]`` together with the ``range_dict`` keys other leaves
+        contributed to them. A single empty leaf therefore drops its whole
+        date, as the recursive walkers did: the encoders build every coverage
+        of a date over all of its points, so a date with a hole in it cannot
+        be encoded. This is why contributions are tracked per date rather than
+        per leaf.
+
+        With ``arrays`` and a ``flat`` plan, every ``range_dict`` key holds a
+        float64 array, missing values as NaN, instead of a list of floats. The
+        results of consecutive leaves with the same layout are kept as they are
+        and converted together into one table of a row per leaf once the walk
+        is complete; the values of a key are then a block of its columns.
+        With ``table`` as well, the leaves become a :class:`LeafTable` instead,
+        when they all share the same data axes, and ``range_dict`` stays empty.
+
+        Attributes:
+            missing (set): Dates that had an empty leaf.
+            contributions (dict): ``range_dict`` keys created for each date.
+            arrays (bool): Whether the ranges are kept as float64 arrays.
+            runs (list): ``(layout, results, points)`` of consecutive leaves, with ``arrays``.
+            table (LeafTable): The leaves, with ``table``, or None.
+        """
+        self.plan = plan
+        self.fields = fields
+        self.coords = coords
+        self.mars_metadata = mars_metadata
+        self.range_dict = range_dict
+        self.handlers = {axis: getattr(self, handler) for axis, handler in plan.handlers.items()}
+        self.layouts = {}
+        self.missing = set()
+        self.contributions = {}
+        self.arrays = arrays and plan.flat
+        self.runs = []
+        self.want_table = table
+        self.table = None
+        self.date_index = set(fields["dates"])
+        self.year_month_cache = {}
+
+    def walk(self, tree, ctx=None):
+        """Walk ``tree``. ``ctx`` is threaded from each node to its children by the axis handlers."""
+        if ctx is None:
+            ctx = {}
+        emit_leaf = self.emit_leaf
+        if not tree.children:
+            emit_leaf(self.fields["lat"], tree.values, tree.result, ctx)
+            self.finish()
+            return
+        visit = self.visit
+        stack = [(child, ctx) for child in reversed(tree.children)]
+        pop = stack.pop
+        push = stack.extend
+        while stack:
+            node, ctx = pop()
+            # Compacted unstructured leaf: values=(lat, lon), own result. Emit directly.
+            if is_merged_node(node):
+                emit_leaf(node.values[0], [node.values[1]], node.result, ctx)
+                continue
+            ctx = visit(node, ctx)
+            if node.children:
+                push((child, ctx) for child in reversed(node.children))
+            else:
+                emit_leaf(self.fields["lat"], node.values, node.result, ctx)
+        self.finish()
+
+    def finish(self):
+        """Complete ``range_dict`` and ``fields`` once every leaf has been emitted."""
+        if self.arrays:
+            if self.want_table:
+                self.table = self.leaf_table()
+            if self.table is None:
+                self.join_arrays()
+            self.runs = []
+        self.drop_missing()
+
+    def drop_missing(self):
+        """Remove the missing dates, with every range key contributed to them, from ``fields`` and ``range_dict``."""
+        if not self.missing:
+            return
+        for date in self.missing:
+            for key in self.contributions.pop(date, ()):
+                self.range_dict.pop(key, None)
+        self.fields["dates"] = [date for date in self.fields["dates"] if date not in self.missing]
+
+    def join_arrays(self):
+        """Fill ``range_dict`` with one array per key from the leaf results gathered in ``runs``."""
+        parts = {}
+        for layout, results, _ in self.runs:
+            # One row per leaf, missing values as NaN
+            table = np.array(results, dtype=np.float64)
+            for key, start, end in self.leaf_layout(*layout):
+                parts.setdefault(key, []).append(table[:, start:end].ravel())
+        for key, key_parts in parts.items():
+            self.range_dict[key] = key_parts[0] if len(key_parts) == 1 else np.concatenate(key_parts)
+            self.contributions.setdefault(key[0], []).append(key)
+
+    def leaf_table(self):
+        """The leaves gathered in ``runs`` as a :class:`LeafTable`, or None if they do not share their data axes."""
+        plan = self.plan
+        if not set(plan.strided_axes) <= set(plan.key_axes):
+            return None
+        key_values = None
+        dates, date_index, parts = [], {}, []
+        for (run_dates, run_key_values, size, _), results, points in self.runs:
+            if len(run_dates) != 1 or key_values not in (None, run_key_values):
+                return None
+            # An axis outside the leaf layout would repeat the same values under each of its keys
+            unstrided = (values for axis, values in zip(plan.key_axes, run_key_values) if axis not in plan.strided_axes)
+            if any(len(values) > 1 for values in unstrided):
+                return None
+            key_values = run_key_values
+            axes = {axis: run_key_values[plan.key_axes.index(axis)] for axis in plan.strided_axes}
+            shape = tuple(len(values) for values in axes.values())
+            lons = size // max(int(np.prod(shape)), 1)
+            if 0 in shape or size != np.prod(shape) * lons or any(len(lon) != lons for _, lon in points):
+                return None
+            # Leaf results are laid out [strided axes][longitude]; make each longitude a row
+            values = np.array(results, dtype=np.float64).reshape((len(results),) + shape + (lons,))
+            values = np.moveaxis(values, -1, 1).reshape((-1,) + shape)
+            date = date_index.setdefault(run_dates[0], len(dates))
+            if date == len(dates):
+                dates.append(run_dates[0])
+            lat = np.repeat([lat for lat, _ in points], lons)
+            lon = np.array([value for _, lon in points for value in lon], dtype=np.float64)
+            parts.append((np.full(len(lat), date, dtype=np.intp), lat, lon, values))
+        if not parts:
+            return None
+        columns = [np.concatenate(column) for column in zip(*parts)]
+        return LeafTable(dates, axes, *columns)
+
+    def visit(self, node, ctx):
+        """Record the axis of a non-leaf node; returns the context passed to its children."""
+        name = node.axis.name
+        if name not in self.plan.skip_metadata:
+            self.mars_metadata[name] = _mars_metadata_value(node, self.plan.steps)
+        handler = self.handlers.get(name)
+        if handler is not None:
+            ctx = handler(node, ctx)
+        return ctx
+
+    def handle_latitude(self, node, ctx):
+        self.fields["lat"] = node.values[0]
+        return ctx
+
+    def handle_levelist(self, node, ctx):
+        self.fields["levels"] = node.values
+        if "l" in self.fields:
+            self.fields["l"].extend(node.values)
+        return ctx
+
+    def handle_param(self, node, ctx):
+        self.fields["param"] = node.values
+        return ctx
+
+    def handle_number(self, node, ctx):
+        self.fields["number"] = node.values
+        return ctx
+
+    def handle_step(self, node, ctx):
+        self.fields["step"] = node.values
+        if "s" in self.fields:
+            self.fields["s"].extend(node.values)
+        return ctx
+
+    def handle_forecast_date(self, node, ctx):
+        dates = [f"{date}Z" for date in node.values]
+        self.mars_metadata["Forecast date"] = str(node.values[0])
+        for date in dates:
+            self.coords[date] = {"composite": [], "t": [date]}
+        self.fields["dates"].extend(dates)
+        return ctx
+
+    def handle_date(self, node, ctx):
+        self.fields["dates"].extend(f"{date}Z" for date in node.values)
+        return ctx
+
+    def handle_time(self, node, ctx):
+        for date in self.fields["dates"]:
+            self.coords[date] = {
+                "composite": [],
+                "t": [str(pd.Timestamp(date) + time).split("+")[0] + "Z" for time in node.values],
+            }
+        self.fields["times"].extend(node.values)
+        return ctx
+
+    def handle_year(self, node, ctx):
+        fields = self.fields
+        fields["years"] = list(node.values) if fields.get("years") == [] else fields["years"]
+        # If month is already fixed in context, register dates now.
+        for y in node.values:
+            for m in ctx.get("months", ()):
+                self.register_date_key(_year_month_key(y, m))
+        return dict(ctx, years=node.values)
+
+    def handle_month(self, node, ctx):
+        fields = self.fields
+        fields["months"] = list(node.values) if fields.get("months") == [] else fields["months"]
+        # If year is already fixed in context, register dates now.
+        for y in ctx.get("years", ()):
+            for m in node.values:
+                self.register_date_key(_year_month_key(y, m))
+        return dict(ctx, months=node.values)
+
+    def register_date_key(self, key):
+        if key not in self.date_index:
+            self.date_index.add(key)
+            self.fields["dates"].append(key)
+        if key not in self.coords:
+            self.coords[key] = {"composite": [], "t": [key]}
+
+    def year_month_dates(self, ctx):
+        """Register and return the year/month dates in scope of a leaf, outermost axis first."""
+        fields = self.fields
+        years = ctx.get("years", fields.get("years", []))
+        months = ctx.get("months", fields.get("months", []))
+        if not (years and months):
+            return fields["dates"]
+        # Leaves below the same year and month nodes share their dates, which are
+        # registered with the first of them. The axis values are kept in the cache
+        # entry so that their ids stay valid.
+        cached = self.year_month_cache.get((id(years), id(months)))
+        if cached is not None:
+            return cached[2]
+        for y in years:
+            for m in months:
+                self.register_date_key(_year_month_key(y, m))
+        if self.plan.year_is_outer:
+            dates = [_year_month_key(y, m) for y in years for m in months]
+        else:
+            dates = [_year_month_key(y, m) for m in months for y in years]
+        self.year_month_cache[(id(years), id(months))] = (years, months, dates)
+        return dates
+
+    def emit_leaf(self, lat, lon_values, result, ctx):
+        """Emit one spatial leaf.
+
+        Shared by the legacy longitude-leaf path (``lat`` from the parent latitude
+        node, ``lon_values`` = the leaf's list of longitudes) and the compacted
+        ``MergedTensorIndexNode`` path (single point: ``lon_values`` = [lon]).
+        """
+        plan = self.plan
+        fields = self.fields
+        if plan.leaf_dates == "year_month":
+            dates = self.year_month_dates(ctx)
+        elif plan.leaf_dates == "last":
+            dates = fields["dates"][-1:]
+        else:
+            dates = fields["dates"]
+
+        if all(val is None for val in result):
+            self.missing.update(dates)
+            return
+
+        lon_values = [float(val) for val in lon_values]
+
+        for date in dates:
+            composite = self.coords[date]["composite"]
+            for value in lon_values:
+                composite.append([lat, value])
+
+        if plan.chunk == "times":
+            chunk = len(fields["times"])
+        elif plan.chunk == "lon":
+            chunk = len(lon_values)
+        else:
+            chunk = None
+        key_values = tuple(tuple(fields[axis]) for axis in plan.key_axes)
+        layout = (tuple(dates), key_values, len(result), chunk)
+        if self.arrays:
+            # Consecutive leaves with the same layout become one table in join_arrays
+            runs = self.runs
+            if not runs or runs[-1][0] != layout:
+                runs.append((layout, [], []))
+            runs[-1][1].append(result)
+            runs[-1][2].append((lat, lon_values))
+            return
+
+        result = [float(val) if val is not None else val for val in result]
+        range_dict = self.range_dict
+        extend = plan.flat
+        for key, start, end in self.leaf_layout(*layout):
+            ranges = range_dict.get(key)
+            if ranges is None:
+                ranges = range_dict[key] = []
+                self.contributions.setdefault(key[0], []).append(key)
+            if extend:
+                ranges.extend(result[start:end])
+            else:
+                ranges.append(result[start:end])
+
+    def leaf_layout(self, dates, key_values, size, chunk):
+        """``range_dict`` key and result slice bounds of every range of a leaf.
+
+        Leaves below the same axis values share a layout, so it is computed once
+        per distinct ``(dates, key_values, size, chunk)``.
+        """
+        cache_key = (dates, key_values, size, chunk)
+        layout = self.layouts.get(cache_key)
+        if layout is not None:
+            return layout
+        plan = self.plan
+        # Strided axes outermost first, each stride dividing the previous one
+        sizes = dict(zip(plan.key_axes, map(len, key_values)), dates=len(dates))
+        if plan.leaf_dates == "year_month":
+            # Year and month are separate tree axes, other axes may sit between them
+            sizes["years"] = len(dict.fromkeys(date.split("-")[0] for date in dates)) or 1
+            sizes["months"] = len(dates) // sizes["years"]
+        stride = size
+        strides = {}
+        for axis in plan.strided_axes:
+            stride = stride / (sizes[axis] or 1)
+            strides[axis] = stride
+        if chunk is None:
+            chunk = int(stride)
+        key_strides = [strides.get(axis, 0) for axis in plan.key_axes]
+        if plan.leaf_dates == "year_month":
+            # ``dates`` come from year_month_dates, the outer of year and month first
+            if plan.year_is_outer:
+                positions = [divmod(d, sizes["months"]) for d in range(len(dates))]
+            else:
+                positions = [divmod(d, sizes["years"])[::-1] for d in range(len(dates))]
+            date_starts = [y * strides["years"] + m * strides["months"] for y, m in positions]
+        else:
+            date_starts = [d * strides.get("dates", 0) for d in range(len(dates))]
+        indexed = [list(enumerate(values)) for values in key_values]
+        layout = []
+        for date, date_start in zip(dates, date_starts):
+            for combination in product(*indexed):
+                start = int(date_start)
+                for (i, _), axis_stride in zip(combination, key_strides):
+                    start += int(i * axis_stride)
+                layout.append(((date,) + tuple(value for _, value in combination), start, start + chunk))
+        self.layouts[cache_key] = layout
+        return layout
+
+
 class Encoder(ABC):
     def __init__(self, type, domaintype):
         """
@@ -210,6 +826,7 @@ class Encoder(ABC):
             covjson (dict): The CovJSON representation being constructed.
             type (str): The type of data being encoded.
             referencing (list): A list of referencing systems used in the encoding.
+            catalogue (ParamCatalogue): The process-wide parameter database shared by all encoders.
             units (dict): Units associated with the parameters, retrieved from the database.
             params (dict): Parameters associated with the data type, retrieved from the database.
             param_ids (dict): Mapping of parameter names to their IDs.
@@ -244,9 +861,22 @@ class Encoder(ABC):
 
         self.referencing = []
 
-        self.units = get_units(self.type)
-        self.params = get_params(self.type)
-        self.param_ids = get_param_ids(self.type)
+        self.catalogue = get_catalogue(self.type)
+
+        self.shared_domains = getattr(self.type, "shared_domains", False)
+        self._domain_ids = {}
+        self.numpy_ranges = getattr(self.type, "numpy_ranges", False)
+        self.range_dtype = np.dtype(getattr(self.type, "range_dtype", "float64"))
+        if self.range_dtype not in (np.float32, np.float64):
+            raise ValueError(f"Unsupported range_dtype {self.range_dtype}, use float32 or float64")
+        self.range_decimals = getattr(self.type, "range_decimals", None) or {}
+        # Every option that stores the range values as arrays
+        self.array_ranges = self.numpy_ranges or self.range_dtype == np.float32 or bool(self.range_decimals)
+        self.compact_axes = getattr(self.type, "compact_axes", False)
+        self._compact_axes = {}
+        self.workers = getattr(self.type, "workers", 1)
+        if self.workers < 1:
+            raise ValueError(f"workers must be at least 1, got {self.workers}")
 
         domaintype = domaintype.lower()
 
@@ -280,15 +910,41 @@ class Encoder(ABC):
             )
         self.parameters = []
 
+    @property
+    def units(self):
+        return self.catalogue.units
+
+    @property
+    def params(self):
+        return self.catalogue.params
+
+    @property
+    def param_ids(self):
+        return self.catalogue.param_ids
+
     def add_parameter(self, param):
         # param_dict = get_param_from_db(param)
         # unit = get_unit_from_db(param_dict["unit_id"])
-        param_dict = self.params[str(param)]
+        param_dict = self.catalogue.get_param(param)
+        parameter = fragments.shared(
+            ("parameter", self.catalogue.provider, str(param)), lambda: self._build_parameter(param_dict)
+        )
+        # self.pydantic_coverage.parameters[param_dict["shortname"]] = Parameter.model_validate_json(
+        #    json.dumps(parameter)
+        # )
+        if "parameters" not in self.covjson:
+            self.covjson["parameters"] = {}
+            self.covjson["parameters"][param_dict["shortname"]] = parameter
+        else:
+            self.covjson["parameters"][param_dict["shortname"]] = parameter
+        self.parameters.append(param)
+
+    def _build_parameter(self, param_dict):
         if isinstance(param_dict["unit_id"], str):
             unit = {"name": param_dict["unit_id"]}
         else:
-            unit = self.units[str(param_dict["unit_id"])]
-        parameter = {
+            unit = self.catalogue.get_unit(param_dict["unit_id"])
+        return {
             "type": "Parameter",
             "description": {"en": param_dict["description"]},
             "unit": {"symbol": unit["name"]},
@@ -297,15 +953,6 @@ class Encoder(ABC):
                 "label": {"en": param_dict["name"]},
             },
         }
-        # self.pydantic_coverage.parameters[param_dict["shortname"]] = Parameter.model_validate_json(
-        #    json.dumps(parameter)
-        # )
-        if "parameters" not in self.covjson:
-            self.covjson["parameters"] = {}
-            self.covjson["parameters"][param_dict["shortname"]] = parameter
-        else:
-            self.covjson["parameters"][param_dict["shortname"]] = parameter
-        self.parameters.append(param)
 
     def add_reference(self, reference):
         # self.pydantic_coverage.referencing.append(
@@ -315,7 +962,106 @@ class Encoder(ABC):
         # for ref in reference["coordinates"]:
         #    if ref not in self.referencing:
         # self.referencing.append(ref)
-        self.covjson["referencing"] = [reference]
+        self.covjson["referencing"] = [fragments.intern(reference)]
+
+    def attach_domain(self, coverage, coords):
+        """Add the domain built from ``coords`` to ``coverage``.
+
+        With ``shared_domains`` enabled the domain is stored once under the
+        collection's ``"domains"`` and the coverage refers to it as
+        ``"#<id>"``. Coverages given the same ``coords`` object share a domain.
+        """
+        if not self.shared_domains:
+            self.add_domain(coverage, coords)
+            return
+        entry = self._domain_ids.get(id(coords))
+        if entry is None:
+            domains = self.covjson.setdefault("domains", {})
+            self.add_domain(coverage, coords)
+            domain_id = f"domain{len(domains)}"
+            domains[domain_id] = coverage["domain"]
+            # Keep coords alive so that its id is not reused
+            entry = self._domain_ids[id(coords)] = (coords, domain_id)
+        coverage["domain"] = "#" + entry[1]
+
+    def range_values(self, values, param=None):
+        """Values of the range of ``param`` as stored in a coverage.
+
+        With ``numpy_ranges``, a ``range_dtype`` of float32 or ``range_decimals``
+        they are kept as a contiguous array, missing values as NaN, rounded to
+        the decimals of ``param`` (or ``"default"``) and cast in one go. orjson
+        then writes each value with the shortest representation for that dtype,
+        without a Python object per value. ``values`` may be a list, or an
+        array as gathered by the walker for these options. Otherwise ``values``
+        is returned as given.
+        """
+        if not self.array_ranges:
+            return values
+        decimals = self.range_decimals.get(param, self.range_decimals.get("default"))
+        if (
+            decimals is None
+            and isinstance(values, np.ndarray)
+            and values.dtype == self.range_dtype
+            and values.flags.c_contiguous
+        ):
+            # Already converted, e.g. by map_partitions workers
+            return values
+        array = np.asarray(values, dtype=np.float64)
+        if decimals is not None:
+            array = np.round(array, decimals)
+        return np.ascontiguousarray(array, dtype=self.range_dtype)
+
+    def map_partitions(self, function, partitions):
+        """Yield ``function(*partition)`` for each of ``partitions``, in order.
+
+        Serially, each partition is only computed when the previous result has
+        been consumed, so coverages built from the results can be added, and
+        streamed to a ``sink``, one partition at a time. With ``workers`` above
+        1 the calls run in a thread pool, at most ``workers`` partitions ahead
+        of the one being consumed.
+        """
+        if self.workers <= 1:
+            for partition in partitions:
+                yield function(*partition)
+            return
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            pending = deque()
+            for partition in partitions:
+                pending.append(pool.submit(function, *partition))
+                if len(pending) > self.workers:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+
+    def range_converter(self, params):
+        """``convert(values, param_id)`` for the range values gathered by ``map_partitions``.
+
+        With ``workers`` it converts them as ``range_values`` does, so that the
+        NumPy rounding and casting runs in the pool threads, which release the
+        GIL for it. Serially the values are left as they are for ``add_range``.
+        """
+        if self.workers <= 1:
+            return lambda values, param: values
+        names = {param: self.convert_param_id_to_param(param) for param in params}
+        return lambda values, param: self.range_values(values, names[param])
+
+    def domain_axis(self, values):
+        """Domain axis object of ``values``.
+
+        With ``compact_axes``, evenly spaced values are written as
+        ``{"start", "stop", "num"}``. The result is kept for the most recent
+        values lists, so coverages sharing an axis only check its spacing once.
+        """
+        if not self.compact_axes:
+            return {"values": values}
+        cached = self._compact_axes.get(id(values))
+        if cached is None or cached[0] is not values:
+            if len(self._compact_axes) >= COMPACT_AXES_CACHE_SIZE:
+                # Do not keep the axes of coverages already streamed out alive
+                self._compact_axes.clear()
+            cached = (values, regular_axis(values))
+            self._compact_axes[id(values)] = cached
+        return dict(cached[1]) if cached[1] is not None else {"values": values}
 
     def convert_param_id_to_param(self, paramid):
         try:
@@ -323,19 +1069,93 @@ class Encoder(ABC):
         except BaseException:
             return paramid
         # param_dict = get_param_from_db(int(param))
-        param_dict = self.params[str(param)]
+        param_dict = self.catalogue.get_param(param)
         return param_dict["shortname"]
 
     def convert_param_to_param_id(self, param):
         if isinstance(param, int):
             return param
         # param_dict = get_param_from_db(param)
-        param_id = self.param_ids[param]
+        param_id = self.catalogue.get_param_id(param)
         return param_id
 
     def get_json(self):
         # self.covjson = self.pydantic_coverage.model_dump_json(exclude_none=True, indent=4)
-        return orjson.dumps(self.covjson)
+        covjson = self.serialisable()
+        if isinstance(covjson.get("coverages"), list):
+            share = fragments.AxisValueFragments().coverage
+            covjson["coverages"] = [share(coverage) for coverage in covjson["coverages"]]
+        return orjson.dumps(covjson, option=DUMPS_OPTION)
+
+    def iter_json(self, chunk_size=DEFAULT_CHUNK_SIZE, compression=None, level=None):
+        """Yield the bytes of :meth:`get_json` in chunks of at most ``chunk_size`` bytes.
+
+        Coverages are serialised one at a time as the chunks are consumed, so the
+        whole response is never held in memory at once. With ``compression``
+        (``"gzip"`` or ``"zstd"``, at ``level``) each chunk is compressed as it is
+        produced and the compressed bytes are yielded instead, in pieces of
+        varying size.
+        """
+        chunks = iter_collection(self.serialisable(), chunk_size)
+        if compression is None:
+            return chunks
+        return iter_compressed(chunks, compression, level)
+
+    def write_to(self, fp, chunk_size=DEFAULT_CHUNK_SIZE, compression=None, level=None):
+        """Write the bytes of :meth:`get_json` to the binary file-like ``fp``; returns the number written.
+
+        With ``compression`` the compressed bytes are written, as in :meth:`iter_json`.
+        """
+        written = 0
+        for chunk in self.iter_json(chunk_size, compression, level):
+            fp.write(chunk)
+            written += len(chunk)
+        return written
+
+    def write_npy(self, directory, name="covjson.json"):
+        """Write the collection to ``directory``, with the range values in ``.npy`` sidecar files.
+
+        The document keeps the CoverageJSON structure, but each NdArray range
+        holds a ``"covjsonkit:npy"`` path relative to it instead of its
+        ``"values"``. The values are stored as little-endian float64 arrays, or
+        float32 with ``range_dtype``, that the decoders memory-map back through
+        :func:`covjsonkit.utils.read_covjson` instead of parsing them. Returns
+        the path of the document.
+        """
+        os.makedirs(directory, exist_ok=True)
+        coverages = []
+        for number, coverage in enumerate(self.covjson["coverages"]):
+            ranges = {}
+            for param, ndarray in coverage["ranges"].items():
+                if not isinstance(ndarray, dict) or ndarray.get("type") != "NdArray" or "values" not in ndarray:
+                    ranges[param] = ndarray
+                    continue
+                path = f"ranges/{number}/{param}.npy"
+                os.makedirs(os.path.join(directory, "ranges", str(number)), exist_ok=True)
+                values = self.range_values(ndarray["values"], param)
+                values = np.asarray(values, dtype=getattr(values, "dtype", np.float64))
+                np.save(os.path.join(directory, path), values.astype(values.dtype.newbyteorder("<"), copy=False))
+                ranges[param] = {key: value for key, value in ndarray.items() if key != "values"}
+                ranges[param][NPY_RANGE_KEY] = path
+            coverages.append(dict(coverage, ranges=ranges))
+
+        covjson = self.serialisable()
+        covjson["coverages"] = coverages
+        filename = os.path.join(directory, name)
+        with open(filename, "wb") as fp:
+            for chunk in iter_collection(covjson):
+                fp.write(chunk)
+        return filename
+
+    def serialisable(self):
+        """Shallow copy of ``covjson`` to pass to ``orjson.dumps``."""
+        covjson = dict(self.covjson)
+        # Parameters and referencing are shared constants, splice in their serialised form
+        if "parameters" in covjson:
+            covjson["parameters"] = {name: fragments.fragment(param) for name, param in covjson["parameters"].items()}
+        if "referencing" in covjson:
+            covjson["referencing"] = [fragments.fragment(reference) for reference in covjson["referencing"]]
+        return covjson
 
     def walk_tree(
         self,
@@ -354,248 +1174,29 @@ class Encoder(ABC):
         instead.  Regardless of ``date_key``, values are always stored under
         ``fields["dates"]``.
         """
+        if isinstance(tree, ResultBatch):
+            walk_batch(partial(self.walk_tree, date_key=date_key), tree, fields, coords, mars_metadata, range_dict)
+            return
+        self.walk(TraversalPlan.forecast(tree, date_key=date_key), tree, fields, coords, mars_metadata, range_dict)
 
-        def create_composite_key(date, level, num, para, s):
-            return (date, level, num, para, s)
-
-        def handle_non_leaf_node(child):
-            non_leaf_axes = ["latitude", "longitude", "param", date_key]
-            if child.axis.name not in non_leaf_axes:
-                val = child.values[0]
-                if isinstance(val, np.datetime64):
-                    val = str(val)
-                elif isinstance(val, timedelta):
-                    val = timedelta_to_step_string(val)
-                elif child.axis.name == "step":
-                    # Step is not a timedelta! Need to normalize it
-                    val = normalize_step_value(val)
-                mars_metadata[child.axis.name] = val
-
-        def handle_specific_axes(child):
-            if child.axis.name == "latitude":
-                return child.values[0]
-            if child.axis.name == "levelist":
-                return child.values
-            if child.axis.name == "param":
-                return child.values
-            if child.axis.name in [date_key, "time"]:
-                dates = [f"{date}Z" for date in child.values]
-                mars_metadata["Forecast date"] = str(child.values[0])
-                for date in dates:
-                    coords[date] = {}
-                    coords[date]["composite"] = []
-                    coords[date]["t"] = [date]
-                return dates
-            if child.axis.name == "number":
-                return child.values
-            if child.axis.name == "step":
-                return child.values
-            return None
-
-        def calculate_index_bounds(level_len, num_len, para_len, step_len, l, i, j, k):  # noqa: E741
-            start_index = int(l * level_len) + int(i * num_len) + int(j * para_len) + int(k * step_len)
-            end_index = start_index + int(step_len)
-            return start_index, end_index
-
-        def append_composite_coords(dates, tree_values, lat, coords):
-            # for date in dates:
-            for value in tree_values:
-                coords[dates]["composite"].append([lat, value])
-
-        def emit_leaf(lat, lon_values, result):
-            """Emit one spatial leaf: append [lat, lon] composite coords and slice results.
-
-            Shared by the legacy longitude-leaf path (``lat`` from the parent latitude
-            node, ``lon_values`` = the leaf's list of longitudes) and the compacted
-            ``MergedTensorIndexNode`` path (single point: ``lon_values`` = [lon]).
-            """
-            lon_values = [float(val) for val in lon_values]
-            if all(val is None for val in result):
-                fields["dates"] = fields["dates"][:-1]
-                for date in fields["dates"]:
-                    for level in fields["levels"]:
-                        for num in fields["number"]:
-                            for para in fields["param"]:
-                                for s in fields["step"]:
-                                    key = create_composite_key(date, level, num, para, s)
-                                    if key in range_dict:
-                                        del range_dict[key]
-            else:
-                result = [float(val) if val is not None else val for val in result]
-                level_len = len(result) / len(fields["levels"])
-                num_len = level_len / len(fields["number"])
-                para_len = num_len / len(fields["param"])
-                step_len = para_len / len(fields["step"])
-
-                append_composite_coords(fields["dates"][-1], lon_values, lat, coords)
-
-                for l, level in enumerate(fields["levels"]):  # noqa: E741
-                    for i, num in enumerate(fields["number"]):
-                        for j, para in enumerate(fields["param"]):
-                            for k, s in enumerate(fields["step"]):
-                                start_index, end_index = calculate_index_bounds(
-                                    level_len, num_len, para_len, step_len, l, i, j, k
-                                )
-                                key = create_composite_key(fields["dates"][-1], level, num, para, s)
-                                if key not in range_dict:
-                                    range_dict[key] = []
-                                range_dict[key].extend(result[start_index:end_index])
-
-        if len(tree.children) != 0:
-            for child in tree.children:
-                # Compacted unstructured leaf: values=(lat, lon), own result. Emit directly.
-                if is_merged_node(child):
-                    emit_leaf(child.values[0], [child.values[1]], child.result)
-                    continue
-                handle_non_leaf_node(child)
-                result = handle_specific_axes(child)
-                if result is not None:
-                    if child.axis.name == "latitude":
-                        fields["lat"] = result
-                    elif child.axis.name == "levelist":
-                        fields["levels"] = result
-                        if "l" in fields:
-                            fields["l"].extend(result)
-                    elif child.axis.name == "param":
-                        fields["param"] = result
-                    elif child.axis.name in [date_key, "time"]:
-                        fields["dates"].extend(result)
-                    elif child.axis.name == "number":
-                        fields["number"] = result
-                    elif child.axis.name == "step":
-                        fields["step"] = result
-                        if "s" in fields:
-                            fields["s"].extend(result)
-
-                self.walk_tree(child, fields, coords, mars_metadata, range_dict, date_key=date_key)
-        else:
-            emit_leaf(fields["lat"], tree.values, tree.result)
+    def walk_leaf_table(self, tree, fields, coords, mars_metadata, range_dict, date_key="date"):
+        """Walk a forecast tree like :meth:`walk_tree`, into a :class:`LeafTable` where possible.
 
-    def walk_tree_step(self, tree, fields, coords, mars_metadata, range_dict):
-        def create_composite_key_step(date, level, num, para):
-            return (date, level, num, para)
-
-        def handle_non_leaf_node_step(child):
-            non_leaf_axes = ["latitude", "longitude", "param", "date", "time"]
-            if child.axis.name not in non_leaf_axes:
-                val = child.values[0]
-                if isinstance(val, np.datetime64):
-                    val = str(val)
-                elif isinstance(val, timedelta):
-                    val = timedelta_to_step_string(val)
-                elif child.axis.name == "step":
-                    # Step is not a timedelta! Need to normalize it
-                    val = normalize_step_value(val)
-                mars_metadata[child.axis.name] = val
-
-        def handle_specific_axes_step(child):
-            if child.axis.name == "latitude":
-                return child.values[0]
-            if child.axis.name == "levelist":
-                return child.values
-            if child.axis.name == "param":
-                return child.values
-            if child.axis.name in ["date"]:
-                dates = [f"{date}Z" for date in child.values]
-                # mars_metadata["Forecast date"] = str(child.values[0])
-                # for date in dates:
-                #    coords[date] = {}
-                #    coords[date]["composite"] = []
-                #    coords[date]["t"] = [date]
-                return dates
-            if child.axis.name == "number":
-                return child.values
-            if child.axis.name == "step":
-                return child.values
-            if child.axis.name == "time":
-                for date in fields["dates"]:
-                    coords[date] = {}
-                    coords[date]["composite"] = []
-                    coords[date]["t"] = []
-                    for time in child.values:
-                        datetime = pd.Timestamp(date) + time
-                        coords[date]["t"].append(str(datetime).split("+")[0] + "Z")
-                return child.values
+        Only a single tree, with ranges kept as arrays, whose leaves all share
+        their data axes makes a table. Otherwise ``range_dict`` is filled as by
+        ``walk_tree`` and None is returned.
+        """
+        if not self.array_ranges or isinstance(tree, ResultBatch):
+            self.walk_tree(tree, fields, coords, mars_metadata, range_dict, date_key=date_key)
             return None
+        plan = TraversalPlan.forecast(tree, date_key=date_key)
+        return self.walk(plan, tree, fields, coords, mars_metadata, range_dict, table=True).table
 
-        def calculate_index_bounds_step(level_len, num_len, para_len, step_len, l, i, j, k):  # noqa: E741
-            start_index = int(l * level_len) + int(i * num_len) + int(j * para_len) + int(k * step_len)
-            end_index = start_index + int(step_len)
-            return start_index, end_index
-
-        def append_composite_coords_step(dates, tree_values, lat, coords):
-            # for date in dates:
-            for value in tree_values:
-                coords[dates]["composite"].append([lat, value])
-
-        def emit_leaf_step(lat, lon_values, result):
-            """Emit one spatial leaf for the step walker (shared by legacy and merged)."""
-            lon_values = [float(val) for val in lon_values]
-            if all(val is None for val in result):
-                fields["dates"] = fields["dates"][:-1]
-                for date in fields["dates"]:
-                    for level in fields["levels"]:
-                        for num in fields["number"]:
-                            for para in fields["param"]:
-                                for s in fields["step"]:
-                                    key = create_composite_key_step(date, level, num, para)
-                                    if key in range_dict:
-                                        del range_dict[key]
-            else:
-                result = [float(val) if val is not None else val for val in result]
-                date_len = len(result) / len(fields["dates"])
-                level_len = date_len / len(fields["levels"])
-                para_len = level_len / len(fields["param"])
-
-                for date in fields["dates"]:
-                    append_composite_coords_step(date, lon_values, lat, coords)
-
-                for d, date in enumerate(fields["dates"]):
-                    for l, level in enumerate(fields["levels"]):  # noqa: E741
-                        for i, num in enumerate(fields["number"]):
-                            for j, para in enumerate(fields["param"]):
-                                key = create_composite_key_step(date, level, num, para)
-                                if key not in range_dict:
-                                    range_dict[key] = []
-                                range_dict[key].append(
-                                    result[
-                                        int(d * date_len + l * level_len + j * para_len) : int(
-                                            d * date_len + l * level_len + j * para_len + len(fields["times"])
-                                        )
-                                    ]
-                                )
-
-        if len(tree.children) != 0:
-            for child in tree.children:
-                # Compacted unstructured leaf: values=(lat, lon), own result. Emit directly.
-                if is_merged_node(child):
-                    emit_leaf_step(child.values[0], [child.values[1]], child.result)
-                    continue
-                handle_non_leaf_node_step(child)
-                result = handle_specific_axes_step(child)
-                if result is not None:
-                    if child.axis.name == "latitude":
-                        fields["lat"] = result
-                    elif child.axis.name == "levelist":
-                        fields["levels"] = result
-                        if "l" in fields:
-                            fields["l"].extend(result)
-                    elif child.axis.name == "param":
-                        fields["param"] = result
-                    elif child.axis.name in ["date"]:
-                        fields["dates"].extend(result)
-                    elif child.axis.name == "number":
-                        fields["number"] = result
-                    elif child.axis.name == "step":
-                        fields["step"] = result
-                        if "s" in fields:
-                            fields["s"].extend(result)
-                    elif child.axis.name == "time":
-                        fields["times"].extend(result)
-
-                self.walk_tree_step(child, fields, coords, mars_metadata, range_dict)
-        else:
-            emit_leaf_step(fields["lat"], tree.values, tree.result)
+    def walk_tree_step(self, tree, fields, coords, mars_metadata, range_dict):
+        if isinstance(tree, ResultBatch):
+            walk_batch(self.walk_tree_step, tree, fields, coords, mars_metadata, range_dict)
+            return
+        self.walk(TraversalPlan.step(tree), tree, fields, coords, mars_metadata, range_dict)
 
     def walk_tree_month(self, tree, fields, coords, mars_metadata, range_dict, _ctx=None):
         """Walk the result tree for monthly-mean streams (e.g. clmn).
@@ -609,164 +1210,16 @@ class Encoder(ABC):
         tree traversal, so the ordering correctly reflects the tree structure
         (e.g. month-major when the tree has month as the outer axis).
         """
-        if _ctx is None:
-            _ctx = {}
-
-        def _year_month_key(year, month):
-            return f"{int(year):04d}-{int(month):02d}"
-
-        def _register_date_key(key):
-            if key not in fields["dates"]:
-                fields["dates"].append(key)
-            if key not in coords:
-                coords[key] = {"composite": [], "t": [key]}
-
-        def handle_non_leaf_node_month(child):
-            non_leaf_axes = ["latitude", "longitude", "param", "year", "month"]
-            if child.axis.name not in non_leaf_axes:
-                val = child.values[0]
-                if isinstance(val, np.datetime64):
-                    val = str(val)
-                mars_metadata[child.axis.name] = val
-
-        def handle_specific_axes_month(child):
-            if child.axis.name == "latitude":
-                return child.values[0]
-            if child.axis.name == "levelist":
-                return child.values
-            if child.axis.name == "param":
-                return child.values
-            if child.axis.name == "year":
-                return child.values
-            if child.axis.name == "month":
-                return child.values
-            if child.axis.name == "number":
-                return child.values
-            return None
+        if isinstance(tree, ResultBatch):
+            walk_batch(self.walk_tree_month, tree, fields, coords, mars_metadata, range_dict)
+            return
+        self.walk(TraversalPlan.month(tree), tree, fields, coords, mars_metadata, range_dict, ctx=_ctx)
 
-        def append_composite_coords_month(date_key, tree_values, lat):
-            for value in tree_values:
-                coords[date_key]["composite"].append([lat, value])
-
-        def emit_leaf_month(lat, lon_values, result):
-            """Emit one spatial leaf for the month walker (shared by legacy and merged).
-
-            ``lat`` is the latitude for this leaf, ``lon_values`` the leaf's list of
-            longitudes (length 1 for a compacted ``MergedTensorIndexNode``), and
-            ``result`` its flat value array.
-            """
-            # Leaf node — ensure all (year, month) combinations from context are registered.
-            ctx_years = _ctx.get("years", fields.get("years", []))
-            ctx_months = _ctx.get("months", fields.get("months", []))
-            for y in ctx_years:
-                for m in ctx_months:
-                    _register_date_key(_year_month_key(y, m))
-
-            # Determine the dates in scope for this specific leaf. The loop order
-            # must match the actual tree axis order (outermost axis first) so that
-            # the flat result array is sliced correctly.
-            # _axis_order records axes in the order they were encountered top-down;
-            # the first entry is the outer axis at this leaf.
-            if ctx_years and ctx_months:
-                axis_order = _ctx.get("_axis_order", [])
-                # Default: if year was seen before month in the tree, year is outer.
-                year_is_outer = (
-                    axis_order.index("year") < axis_order.index("month")
-                    if ("year" in axis_order and "month" in axis_order)
-                    else True
-                )
-                if year_is_outer:
-                    leaf_dates = [_year_month_key(y, m) for y in ctx_years for m in ctx_months]
-                else:
-                    leaf_dates = [_year_month_key(y, m) for m in ctx_months for y in ctx_years]
-            else:
-                leaf_dates = fields["dates"]
-
-            lon_values = [float(val) for val in lon_values]
-            if all(val is None for val in result):
-                # Remove date entries for this leaf that produced no data.
-                for key in leaf_dates:
-                    if key in fields["dates"]:
-                        fields["dates"].remove(key)
-                    for level in fields["levels"]:
-                        for num in fields["number"]:
-                            for para in fields["param"]:
-                                rkey = (key, level, num, para)
-                                if rkey in range_dict:
-                                    del range_dict[rkey]
-            else:
-                result = [float(val) if val is not None else val for val in result]
-
-                n_dates = len(leaf_dates)
-                n_levels = len(fields["levels"])
-                n_params = len(fields["param"])
-
-                date_len = len(result) / n_dates if n_dates else len(result)
-                level_len = date_len / n_levels if n_levels else date_len
-                para_len = level_len / n_params if n_params else level_len
-
-                # Append this leaf's longitude values to composite coords for
-                # every date key in scope.
-                for date in leaf_dates:
-                    append_composite_coords_month(date, lon_values, lat)
-
-                for d, date in enumerate(leaf_dates):
-                    for l, level in enumerate(fields["levels"]):  # noqa: E741
-                        for i, num in enumerate(fields["number"]):
-                            for j, para in enumerate(fields["param"]):
-                                key = (date, level, num, para)
-                                if key not in range_dict:
-                                    range_dict[key] = []
-                                start = int(d * date_len + l * level_len + j * para_len)
-                                end = int(start + len(lon_values))
-                                range_dict[key].append(result[start:end])
-
-        if len(tree.children) != 0:
-            for child in tree.children:
-                # Compacted unstructured leaf: values=(lat, lon), own result. Emit directly.
-                if is_merged_node(child):
-                    emit_leaf_month(child.values[0], [child.values[1]], child.result)
-                    continue
-                handle_non_leaf_node_month(child)
-                result = handle_specific_axes_month(child)
-
-                # Build a child context that inherits the current year/month
-                child_ctx = dict(_ctx)
-
-                if result is not None:
-                    if child.axis.name == "latitude":
-                        fields["lat"] = result
-                    elif child.axis.name == "levelist":
-                        fields["levels"] = result
-                        if "l" in fields:
-                            fields["l"].extend(result)
-                    elif child.axis.name == "param":
-                        fields["param"] = result
-                    elif child.axis.name == "year":
-                        fields["years"] = list(result) if fields.get("years") == [] else fields["years"]
-                        child_ctx["years"] = result
-                        child_ctx["_axis_order"] = _ctx.get("_axis_order", []) + ["year"]
-                        # If month is already fixed in context, register dates now.
-                        if "months" in _ctx:
-                            for y in result:
-                                for m in _ctx["months"]:
-                                    _register_date_key(_year_month_key(y, m))
-                    elif child.axis.name == "month":
-                        fields["months"] = list(result) if fields.get("months") == [] else fields["months"]
-                        child_ctx["months"] = result
-                        # If year is already fixed in context, register dates now.
-                        if "years" in _ctx:
-                            for y in _ctx["years"]:
-                                for m in result:
-                                    _register_date_key(_year_month_key(y, m))
-                        # Track that month is the inner axis relative to year
-                        child_ctx["_axis_order"] = _ctx.get("_axis_order", []) + ["month"]
-                    elif child.axis.name == "number":
-                        fields["number"] = result
-
-                self.walk_tree_month(child, fields, coords, mars_metadata, range_dict, _ctx=child_ctx)
-        else:
-            emit_leaf_month(fields["lat"], tree.values, tree.result)
+    def walk(self, plan, tree, fields, coords, mars_metadata, range_dict, ctx=None, table=False):
+        """Walk ``tree`` as compiled in ``plan``, see :class:`TraversalPlan`. Returns the :class:`PlanWalker`."""
+        walker = PlanWalker(plan, fields, coords, mars_metadata, range_dict, self.array_ranges, table)
+        walker.walk(tree, ctx)
+        return walker
 
     @abstractmethod
     def add_coverage(self, mars_metadata, coords, values):
@@ -792,6 +1245,18 @@ class Encoder(ABC):
     def from_polytope(self, result, date_key: str = "date") -> dict:
         pass
 
+    def from_polytope_many(self, results, method="from_polytope", **kwargs) -> dict:
+        """Encode several polytope results of one request into a single collection.
+
+        The trees, e.g. from a request split by parameter, date or area across
+        polytope workers, are walked into one store and encoded once with
+        ``method`` (``"from_polytope"``, ``"from_polytope_step"``, ...), which also
+        receives ``kwargs`` such as ``sink``. See :mod:`covjsonkit.encoder.batch`
+        for how the pieces may be split.
+        """
+        return getattr(self, method)(ResultBatch(results), **kwargs)
+
+    @streamable
     def from_polytope_reforecast(self, result) -> dict:
         """Encode reforecast/reanalysis data that uses ``"hdate"`` as the time axis.
 
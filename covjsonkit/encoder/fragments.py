@@ -0,0 +1,111 @@
+"""Process-wide cache of constant CoverageJSON objects and their serialised form.
+
+Parameter and referencing objects only depend on the parameter database and
+the reference system, so they are built once per process and shared by every
+encoder. When orjson supports ``orjson.Fragment`` (orjson >= 3.9) each shared
+object is also serialised once, and :meth:`Encoder.get_json` splices those
+bytes in instead of encoding the object again.
+
+Shared objects end up in the ``covjson`` dicts returned to callers and must be
+treated as read-only; replace them rather than modifying them in place.
+
+Within a single output, :class:`AxisValueFragments` does the same for domain
+axis values that several coverages hold by reference, such as the composite
+points of a date that every ensemble member and step of a MultiPoint
+collection points to.
+"""
+
+import threading
+
+import orjson
+
+Fragment = getattr(orjson, "Fragment", None)
+
+_objects = {}
+_shared_ids = {}
+_fragments = {}
+_lock = threading.Lock()
+
+
+def shared(key, build):
+    """Return the object cached under ``key``, calling ``build()`` to create it on first use."""
+    obj = _objects.get(key)
+    if obj is None:
+        with _lock:
+            obj = _objects.get(key)
+            if obj is None:
+                obj = build()
+                _objects[key] = obj
+                _shared_ids[id(obj)] = obj
+    return obj
+
+
+def intern(obj):
+    """Return the shared object equal to ``obj``, which must be built from dicts, lists and scalars."""
+    return shared(("intern", _freeze(obj)), lambda: obj)
+
+
+def _freeze(obj):
+    if isinstance(obj, dict):
+        return tuple((key, _freeze(value)) for key, value in obj.items())
+    if isinstance(obj, (list, tuple)):
+        return (type(obj), tuple(_freeze(value) for value in obj))
+    return obj
+
+
+def fragment(obj):
+    """Return the pre-serialised form of a shared object, or ``obj`` itself if it is not shared."""
+    # Shared objects are never released, so their id() cannot be reused
+    if Fragment is None or _shared_ids.get(id(obj)) is not obj:
+        return obj
+    serialised = _fragments.get(id(obj))
+    if serialised is None:
+        serialised = Fragment(orjson.dumps(obj))
+        _fragments[id(obj)] = serialised
+    return serialised
+
+
+# Shorter value lists are cheaper to encode again than to look up
+MIN_SHARED_VALUES = 8
+
+
+class AxisValueFragments:
+    def __init__(self):
+        """
+        Serialise the domain axis ``values`` lists of one output once each.
+
+        Lists are recognised by identity. The first coverage holding a list is
+        encoded as usual; from the second on, the list is replaced by an
+        ``orjson.Fragment`` of its bytes, so the output is unchanged. Lists are
+        kept referenced so that their ids stay valid, and must not be modified
+        while the output is being written.
+        """
+        self._seen = {}
+
+    def coverage(self, coverage):
+        """Return ``coverage``, or a shallow copy with its repeated axis values spliced in as fragments."""
+        domain = coverage.get("domain")
+        if Fragment is None or not isinstance(domain, dict) or not isinstance(domain.get("axes"), dict):
+            return coverage
+        axes = None
+        for name, axis in domain["axes"].items():
+            values = axis.get("values") if isinstance(axis, dict) else None
+            if not isinstance(values, list) or len(values) < MIN_SHARED_VALUES:
+                continue
+            serialised = self._fragment(values)
+            if serialised is not None:
+                if axes is None:
+                    axes = dict(domain["axes"])
+                axes[name] = dict(axis, values=serialised)
+        if axes is None:
+            return coverage
+        return dict(coverage, domain=dict(domain, axes=axes))
+
+    def _fragment(self, values):
+        entry = self._seen.get(id(values))
+        if entry is None:
+            self._seen[id(values)] = (values, None)
+            return None
+        if entry[1] is None:
+            entry = self._seen[id(values)] = (values, Fragment(orjson.dumps(values)))
+        return entry[1]
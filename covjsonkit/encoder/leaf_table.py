@@ -0,0 +1,55 @@
+"""Columnar intermediate representation of a walked polytope result.
+
+With ranges kept as arrays, :meth:`Encoder.walk_leaf_table` walks a forecast
+tree into a :class:`LeafTable` instead of a ``range_dict``: the spatial points
+as ``lat``/``lon`` arrays with the index of their date, and every value in a
+single contiguous float64 array with one dimension per data axis. Encoders
+then pick out the values of a coverage with vectorised indexing instead of
+looking up and concatenating one range per ``(date, level, number, param,
+step)`` key.
+"""
+
+import numpy as np
+
+
+class LeafTable:
+    def __init__(self, dates, axes, date, lat, lon, values):
+        """
+        Points of a walked forecast tree, one row per point, with their values.
+
+        Attributes:
+            dates (list): Dates of the tree, in the order they were walked.
+            axes (dict): Values of each data axis ("levels", "number", "param",
+                "step"), in the order of the dimensions of ``values``.
+            index (dict): Position of every value of each axis.
+            date (ndarray): Index into ``dates`` of each point.
+            lat, lon (ndarray): Coordinates of each point.
+            values (ndarray): float64 values, shaped ``(points, *axis lengths)``,
+                NaN where the result was None.
+        """
+        self.dates = dates
+        self.axes = axes
+        self.index = {name: {value: i for i, value in enumerate(values)} for name, values in axes.items()}
+        self.date = date
+        self.lat = lat
+        self.lon = lon
+        self.values = values
+
+    @property
+    def mask(self):
+        """True where a value is missing."""
+        return np.isnan(self.values)
+
+    def rows(self, date):
+        """Indices of the points of ``date``, in walk order."""
+        return np.flatnonzero(self.date == self.dates.index(date))
+
+    def range(self, rows, **labels):
+        """Values of ``rows`` at the axis values in ``labels``.
+
+        The axes not in ``labels`` vary slowest, in their order in ``axes``,
+        and the points fastest, as in the composite domain of a MultiPoint
+        coverage with several levels.
+        """
+        index = (rows,) + tuple(self.index[name][labels[name]] if name in labels else slice(None) for name in self.axes)
+        return np.moveaxis(self.values[index], 0, -1).ravel()
@@ -0,0 +1,217 @@
+"""Streaming output of a CoverageJSON collection.
+
+``from_polytope(result, sink=fp)`` (and every other ``from_polytope*`` method)
+writes the collection to the binary file-like ``fp`` while it is encoded,
+instead of collecting every coverage in ``covjson["coverages"]`` first. Each
+coverage is serialised as soon as the encoder adds it and then released, so
+peak memory scales with one coverage rather than with the whole response.
+
+The bytes written are identical to those of :meth:`Encoder.get_json`: the
+members preceding ``"coverages"`` are written before the first coverage and
+the remaining members, such as ``"parameters"`` and ``"referencing"``, once
+the encoder is done.
+
+:func:`iter_collection` applies the same split to an already encoded
+collection, serialising it one coverage at a time into bounded chunks for
+:meth:`Encoder.iter_json` and :meth:`Encoder.write_to`.
+
+Both paths can compress the output as it is produced, with gzip or, when the
+``zstandard`` package is installed, zstd, so that neither the uncompressed nor
+the compressed response is ever held in memory as a whole.
+"""
+
+import functools
+import zlib
+
+import orjson
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+from .fragments import AxisValueFragments
+
+DEFAULT_CHUNK_SIZE = 1 << 20
+
+# Range values may be NumPy arrays (``numpy_ranges``), whose NaNs orjson writes as null
+DUMPS_OPTION = orjson.OPT_SERIALIZE_NUMPY
+
+
+class CoverageWriter:
+    def __init__(self, encoder, sink):
+        """
+        Stands in for ``covjson["coverages"]`` while an encoder streams to ``sink``.
+
+        Encoders add coverages with ``covjson["coverages"].append(coverage)``;
+        the writer serialises each one to ``sink`` instead of keeping it.
+
+        Attributes:
+            count (int): Number of coverages written.
+        """
+        self.encoder = encoder
+        self.sink = sink
+        self.count = 0
+        self._started = False
+
+    def append(self, coverage):
+        if not self._started:
+            self._write_header()
+        else:
+            self.sink.write(b",")
+        self.sink.write(orjson.dumps(coverage, option=DUMPS_OPTION))
+        self.count += 1
+
+    def __len__(self):
+        return self.count
+
+    def _write_header(self):
+        self.sink.write(collection_head(self.encoder.serialisable()))
+        self._started = True
+
+    def close(self):
+        """Write the end of the collection, including a header if no coverage was added."""
+        if not self._started:
+            self._write_header()
+        self.sink.write(collection_tail(self.encoder.serialisable()))
+
+
+def compressor(compression, level=None):
+    """Return a streaming compressor with ``compress(data)`` and ``flush()`` for ``"gzip"`` or ``"zstd"``."""
+    if compression == "gzip":
+        # wbits 31 writes a gzip header and trailer around the deflate stream
+        return zlib.compressobj(6 if level is None else level, zlib.DEFLATED, 31)
+    if compression == "zstd":
+        if zstandard is None:
+            raise ImportError("Please install 'zstandard' to use zstd compression: pip install covjsonkit[zstd]")
+        return zstandard.ZstdCompressor(level=3 if level is None else level).compressobj()
+    raise ValueError(f"Unknown compression {compression!r}, use 'gzip' or 'zstd'")
+
+
+class CompressedSink:
+    def __init__(self, sink, compression="gzip", level=None):
+        """
+        Binary file-like that compresses everything written to it into ``sink``.
+
+        :meth:`close` writes the end of the compressed stream; ``sink`` itself is
+        left open.
+        """
+        self.sink = sink
+        self._compressor = compressor(compression, level)
+
+    def write(self, data):
+        compressed = self._compressor.compress(data)
+        if compressed:
+            self.sink.write(compressed)
+        return len(data)
+
+    def close(self):
+        self.sink.write(self._compressor.flush())
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        if exc_info[0] is None:
+            self.close()
+
+
+def iter_compressed(chunks, compression, level=None):
+    """Compress a stream of byte chunks, yielding the compressed bytes as they become available."""
+    stream = compressor(compression, level)
+    for chunk in chunks:
+        compressed = stream.compress(chunk)
+        if compressed:
+            yield compressed
+    yield stream.flush()
+
+
+def _split_members(covjson):
+    """Members of a serialisable collection before and after ``"coverages"``."""
+    names = list(covjson)
+    position = names.index("coverages")
+    before = {name: covjson[name] for name in names[:position]}
+    after = {name: covjson[name] for name in names[position + 1 :]}
+    return before, after
+
+
+def collection_head(covjson):
+    """Bytes of ``covjson`` up to and including the ``[`` opening its coverages."""
+    before, _ = _split_members(covjson)
+    return orjson.dumps(before)[:-1] + (b',"coverages":[' if before else b'"coverages":[')
+
+
+def collection_tail(covjson):
+    """Bytes of ``covjson`` from the ``]`` closing its coverages to the end."""
+    _, after = _split_members(covjson)
+    return b"]" + (b"," + orjson.dumps(after)[1:] if after else b"}")
+
+
+def iter_collection(covjson, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Serialise a collection lazily, one coverage at a time, in chunks of ``chunk_size`` bytes.
+
+    The concatenated chunks equal ``orjson.dumps(covjson)``; only the last chunk
+    may be shorter than ``chunk_size``.
+    """
+    if "coverages" not in covjson:
+        return _rechunk([orjson.dumps(covjson, option=DUMPS_OPTION)], chunk_size)
+    return _rechunk(_collection_pieces(covjson), chunk_size)
+
+
+def _collection_pieces(covjson):
+    yield collection_head(covjson)
+    share = AxisValueFragments().coverage
+    for i, coverage in enumerate(covjson["coverages"]):
+        if i:
+            yield b","
+        yield orjson.dumps(share(coverage), option=DUMPS_OPTION)
+    yield collection_tail(covjson)
+
+
+def _rechunk(pieces, chunk_size):
+    buffer = bytearray()
+    for piece in pieces:
+        buffer += piece
+        if len(buffer) >= chunk_size:
+            end = len(buffer) - len(buffer) % chunk_size
+            with memoryview(buffer) as view:
+                for start in range(0, end, chunk_size):
+                    yield bytes(view[start : start + chunk_size])
+            del buffer[:end]
+    if buffer:
+        yield bytes(buffer)
+
+
+def streamable(method):
+    """Give a ``from_polytope*`` method a ``sink`` keyword that streams its output.
+
+    With ``sink=None`` the method behaves as before. Otherwise the collection is
+    written to ``sink`` and the returned ``covjson`` holds every member except
+    the coverages, whose list is left empty. ``compression`` (``"gzip"`` or
+    ``"zstd"``) compresses the bytes on their way to ``sink``, and is an error
+    without one.
+    """
+
+    @functools.wraps(method)
+    def wrapper(self, *args, sink=None, compression=None, **kwargs):
+        if compression is not None and sink is None:
+            raise ValueError("compression requires a sink to write to")
+        if sink is None or isinstance(self.covjson.get("coverages"), CoverageWriter):
+            # Not streaming, or called from another streaming from_polytope* method
+            return method(self, *args, **kwargs)
+        if compression is not None:
+            with CompressedSink(sink, compression) as compressed:
+                return wrapper(self, *args, sink=compressed, **kwargs)
+        coverages = self.covjson.get("coverages", [])
+        writer = CoverageWriter(self, sink)
+        self.covjson["coverages"] = writer
+        try:
+            for coverage in coverages:
+                writer.append(coverage)
+            method(self, *args, **kwargs)
+            writer.close()
+        finally:
+            self.covjson["coverages"] = coverages
+        return self.covjson
+
+    return wrapper
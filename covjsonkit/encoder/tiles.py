@@ -0,0 +1,120 @@
+"""CoverageJSON ``TiledNdArray`` ranges.
+
+A ``TiledNdArray`` range keeps the shape and axis names of an ``NdArray`` but
+not its values. Instead it lists one or more tile sets, each cutting the array
+into tiles of a fixed ``tileShape`` (``None`` keeps an axis whole) that are
+fetched separately from a ``urlTemplate``. The template holds one ``{axis}``
+placeholder per tiled axis, which clients fill in with the index of the tile
+along that axis::
+
+    {"tileShape": [1, 1, None, None], "urlTemplate": "2t/{t}-{levelist}.covjson"}
+
+Each tile is a standalone ``NdArray`` document holding the values of that tile.
+"""
+
+import os
+
+import numpy as np
+import orjson
+
+from .stream import DUMPS_OPTION
+
+
+def tile_bounds(shape, tile_shape):
+    """Yield the tile indices and the slices of ``shape`` covered by every tile, in C order."""
+    if len(tile_shape) != len(shape):
+        raise ValueError(f"Tile shape {list(tile_shape)} does not match range shape {list(shape)}")
+    steps = [size if tile is None else tile for size, tile in zip(shape, tile_shape)]
+    if any(step <= 0 for step in steps):
+        raise ValueError(f"Tile sizes must be positive, got {list(tile_shape)}")
+    counts = [-(-size // step) if size else 0 for size, step in zip(shape, steps)]
+    for index in np.ndindex(*counts):
+        yield index, tuple(slice(i * step, (i + 1) * step) for i, step in zip(index, steps))
+
+
+def fill_template(template, values):
+    """Replace the ``{name}`` placeholders of ``values`` in ``template``, leaving the others."""
+    for name, value in values.items():
+        template = template.replace("{" + name + "}", str(value))
+    return template
+
+
+def tiled_range(ndarray, tile_shapes, url_template, write, base_url=""):
+    """Split an ``NdArray`` range into a ``TiledNdArray`` range.
+
+    Args:
+        ndarray (dict): The NdArray range, with flat ``values`` in C order of ``shape``.
+        tile_shapes (list): One tile shape per tile set.
+        url_template (str): Path of a tile, with a ``{tileset}`` placeholder if there is
+            more than one tile set and an ``{axis}`` placeholder for every axis cut into
+            several tiles.
+        write (callable): Called with the path and the serialised bytes of each tile.
+        base_url (str): Prepended to ``url_template`` in the returned range.
+
+    Returns:
+        dict: The TiledNdArray range.
+    """
+    shape = list(ndarray["shape"])
+    axis_names = list(ndarray["axisNames"])
+    values = np.asarray(ndarray["values"], dtype=getattr(ndarray["values"], "dtype", np.float64))
+    if values.size != int(np.prod(shape)):
+        raise ValueError(f"Range has {values.size} values, expected {int(np.prod(shape))} for shape {shape}")
+    values = values.reshape(shape)
+    if len(tile_shapes) > 1 and "{tileset}" not in url_template:
+        raise ValueError("url_template needs a {tileset} placeholder when there are several tile sets")
+
+    tile_sets = []
+    for number, tile_shape in enumerate(tile_shapes):
+        template = fill_template(url_template, {"tileset": number})
+        tiled_axes = [name for name, tile in zip(axis_names, tile_shape) if tile is not None]
+        # An axis cut into a single tile can do without a placeholder
+        missing = [
+            name
+            for name, size, tile in zip(axis_names, shape, tile_shape)
+            if tile is not None and size > tile and "{" + name + "}" not in template
+        ]
+        if missing:
+            raise ValueError(f"url_template has no placeholder for the tiled axes {missing}")
+        for index, bounds in tile_bounds(shape, tile_shape):
+            tile = np.ascontiguousarray(values[bounds])
+            document = {
+                "type": "NdArray",
+                "dataType": ndarray["dataType"],
+                "axisNames": axis_names,
+                "shape": list(tile.shape),
+                "values": tile.reshape(-1),
+            }
+            path = fill_template(template, {name: index[axis_names.index(name)] for name in tiled_axes})
+            write(path, orjson.dumps(document, option=DUMPS_OPTION))
+        tile_sets.append({"tileShape": list(tile_shape), "urlTemplate": base_url + template})
+
+    return {
+        "type": "TiledNdArray",
+        "dataType": ndarray["dataType"],
+        "axisNames": axis_names,
+        "shape": shape,
+        "tileSets": tile_sets,
+    }
+
+
+def tile_writer(store):
+    """Return a ``write(path, data)`` function storing tiles in a directory or a mapping.
+
+    Every path may only be written once, so that tiles of different ranges
+    cannot silently overwrite each other.
+    """
+    written = set()
+
+    def write(path, data):
+        if path in written:
+            raise ValueError(f"Tile {path!r} written twice, add placeholders to url_template")
+        written.add(path)
+        if isinstance(store, (str, os.PathLike)):
+            filename = os.path.join(store, path)
+            os.makedirs(os.path.dirname(filename), exist_ok=True)
+            with open(filename, "wb") as fp:
+                fp.write(data)
+        else:
+            store[path] = data
+
+    return write
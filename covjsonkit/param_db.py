@@ -1,17 +1,290 @@
 import json
+import mmap
 import os
+import struct
+import threading
 from os.path import dirname
 
-from conflator import Conflator
+import orjson
 
-from .config import CovjsonKitConfig
+from .config import load_config
 
-param_dir = os.getenv("PARAM_DIR", "ecmwf")
-conf = Conflator(app_name="covjsonkit", model=CovjsonKitConfig).load()
-param_dir = conf.param_db
+_catalogues = {}
+_catalogues_lock = threading.Lock()
 
+# Indexes are built from the JSON tables on first use, see write_index. The header
+# holds the size and modification time (ns) of the JSON table an index was built
+# from, so that an index is rebuilt when its table changes.
+INDEX_MAGIC = b"CJKIDX02"
+INDEX_HEADER = struct.Struct("<8sIQQ")
+INDEX_ENTRY = struct.Struct("<IIII")
 
-def get_param_from_db(param_id):
+
+class ParamIndex:
+    def __init__(self, path):
+        """
+        Read-only, memory-mapped view of a ``.idx`` table.
+
+        Lookups binary-search the sorted key table and decode only the matching
+        record, so the table is never materialised as a dict. The mapping is
+        backed by the page cache and therefore shared between processes.
+
+        Attributes:
+            source (tuple): Size and modification time in ns of the JSON table
+                the index was built from.
+        """
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self._mmap) < INDEX_HEADER.size or self._mmap[:8] != INDEX_MAGIC:
+            self._mmap.close()
+            raise ValueError(f"{path} is not a covjsonkit parameter index")
+        _, self._count, size, mtime_ns = INDEX_HEADER.unpack_from(self._mmap, 0)
+        self.source = (size, mtime_ns)
+
+    def close(self):
+        self._mmap.close()
+
+    def __len__(self):
+        return self._count
+
+    def __contains__(self, key):
+        return self._find(key) is not None
+
+    def __getitem__(self, key):
+        value = self._find(key)
+        if value is None:
+            raise KeyError(key)
+        return orjson.loads(value)
+
+    def _find(self, key):
+        key = str(key).encode("utf-8")
+        buf = self._mmap
+        lo, hi = 0, self._count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            key_offset, key_length, value_offset, value_length = INDEX_ENTRY.unpack_from(
+                buf, INDEX_HEADER.size + mid * INDEX_ENTRY.size
+            )
+            candidate = buf[key_offset : key_offset + key_length]
+            if candidate == key:
+                return buf[value_offset : value_offset + value_length]
+            if candidate < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return None
+
+
+class ParamCatalogue:
+    def __init__(self, provider):
+        """
+        Parameter, parameter id and unit tables of a single ``param_db`` provider.
+
+        The tables are read from ``data/<provider>/`` once and shared by every
+        encoder configured with the same provider, so they must be treated as
+        read-only. Use :func:`get_catalogue` rather than instantiating directly.
+
+        Single records are resolved with :meth:`get_param`, :meth:`get_param_id`
+        and :meth:`get_unit` through a memory-mapped :class:`ParamIndex` of each
+        JSON table. The indexes are built in :func:`cache_dir` the first time a
+        table is used, and again whenever the table changes; if they cannot be
+        written the JSON tables are loaded instead. The full tables stay
+        available as ``params``, ``param_ids`` and ``units`` but are only parsed
+        when first accessed.
+
+        Attributes:
+            provider (str): Name of the data directory the tables were read from.
+            params (dict): Full parameter objects keyed by string parameter id.
+            param_ids (dict): String parameter ids keyed by shortname.
+            units (dict): Unit objects keyed by string unit id.
+        """
+        self.provider = provider
+        self._tables = {}
+        self._indexes = {}
+        self._records = {}
+        self._lock = threading.Lock()
+
+    @property
+    def params(self):
+        return self._table("param")
+
+    @property
+    def param_ids(self):
+        return self._table("param_id")
+
+    @property
+    def units(self):
+        return self._table("unit")
+
+    def get_param(self, param_id):
+        return self._record("param", str(param_id))
+
+    def get_param_id(self, shortname):
+        return self._record("param_id", str(shortname))
+
+    def get_unit(self, unit_id):
+        return self._record("unit", str(unit_id))
+
+    def _table(self, name):
+        table = self._tables.get(name)
+        if table is None:
+            with self._lock:
+                table = self._tables.get(name)
+                if table is None:
+                    table = _load_table(self.provider, f"{name}.json")
+                    self._tables[name] = table
+        return table
+
+    def _index(self, name):
+        if name not in self._indexes:
+            with self._lock:
+                if name not in self._indexes:
+                    try:
+                        index = _open_index(self.provider, name)
+                    except OSError:
+                        index = None
+                    self._indexes[name] = index
+        return self._indexes[name]
+
+    def _record(self, name, key):
+        if name in self._tables:
+            return self._tables[name][key]
+        index = self._index(name)
+        if index is None:
+            return self._table(name)[key]
+        record = self._records.get((name, key))
+        if record is None:
+            record = index[key]
+            self._records[(name, key)] = record
+        return record
+
+
+def _table_path(provider, filename):
+    return os.path.join(dirname(__file__), f"data/{provider}/{filename}")
+
+
+def _load_table(provider, filename):
+    with open(_table_path(provider, filename)) as f:
+        return json.load(f)
+
+
+def cache_dir():
+    """Directory the parameter indexes are built in.
+
+    ``$COVJSONKIT_CACHE_DIR`` if set, otherwise ``covjsonkit`` in
+    ``$XDG_CACHE_HOME`` or ``~/.cache``.
+    """
+    path = os.environ.get("COVJSONKIT_CACHE_DIR")
+    if path:
+        return path
+    return os.path.join(os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache"), "covjsonkit")
+
+
+def _index_path(provider, name):
+    return os.path.join(cache_dir(), "param_db", provider, f"{name}.idx")
+
+
+def _open_index(provider, name):
+    """Open the index of the ``name`` table of ``provider``, building it if it is missing or stale."""
+    source = os.stat(_table_path(provider, f"{name}.json"))
+    source = (source.st_size, source.st_mtime_ns)
+    path = _index_path(provider, name)
+    if os.path.exists(path):
+        try:
+            index = ParamIndex(path)
+        except ValueError:
+            index = None
+        if index is not None:
+            if index.source == source:
+                return index
+            index.close()
+    write_index(path, _load_table(provider, f"{name}.json"), source)
+    return ParamIndex(path)
+
+
+def write_index(path, table, source=(0, 0)):
+    """Write ``table`` to ``path`` as an index: a sorted-key offset table followed by packed records.
+
+    Layout, all integers little-endian:
+
+        header  INDEX_MAGIC, entry count (uint32), ``source`` size and mtime (uint64)
+        table   count * (key_offset, key_length, value_offset, value_length) as uint32,
+                sorted by the UTF-8 bytes of the key
+        blob    UTF-8 keys and compact JSON values referenced by the table
+
+    The file is written under a temporary name and then renamed, so that other
+    processes never map a partly written index.
+    """
+    items = sorted((str(key).encode("utf-8"), orjson.dumps(value)) for key, value in table.items())
+    offset = INDEX_HEADER.size + INDEX_ENTRY.size * len(items)
+    entries = bytearray()
+    blob = bytearray()
+    for key, value in items:
+        entries += INDEX_ENTRY.pack(offset + len(blob), len(key), offset + len(blob) + len(key), len(value))
+        blob += key
+        blob += value
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temporary = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(temporary, "wb") as f:
+            f.write(INDEX_HEADER.pack(INDEX_MAGIC, len(items), *source))
+            f.write(entries)
+            f.write(blob)
+        os.replace(temporary, path)
+    finally:
+        if os.path.exists(temporary):
+            os.remove(temporary)
+
+
+def __getattr__(name):
+    # Kept for callers of the former import-time globals, now resolved on access.
+    if name == "conf":
+        return load_config()
+    if name == "param_dir":
+        return load_config().param_db
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def _provider_name(conf):
+    if conf is None:
+        conf = load_config()
+    if isinstance(conf, str):
+        return conf
+    return conf.param_db
+
+
+def get_catalogue(conf=None):
+    """Return the process-wide :class:`ParamCatalogue` for ``conf``.
+
+    ``conf`` is either a ``CovjsonKitConfig`` or a provider name such as
+    ``"ecmwf"``; if omitted the default configuration is loaded. The catalogue
+    is loaded on first use and cached; concurrent first calls from several
+    threads load it only once.
+    """
+    provider = _provider_name(conf)
+    catalogue = _catalogues.get(provider)
+    if catalogue is None:
+        with _catalogues_lock:
+            catalogue = _catalogues.get(provider)
+            if catalogue is None:
+                catalogue = ParamCatalogue(provider)
+                _catalogues[provider] = catalogue
+    return catalogue
+
+
+def preload_catalogues(*providers):
+    """Load the catalogues for ``providers`` ahead of the first encode.
+
+    Intended to be called once at worker start-up (e.g. before forking) so that
+    requests never pay for reading the parameter database. Defaults to the
+    configured provider.
+    """
+    if not providers:
+        providers = (None,)
+    return [get_catalogue(provider) for provider in providers]
+
+
+def get_param_from_db(param_id, conf=None):
     """
     import requests
     url = f"https://codes.ecmwf.int/parameter-database/api/v1/param/?format=json&search={param_id}"
@@ -26,47 +299,26 @@ def get_param_from_db(param_id):
     try:
         param_id = int(param_id)
     except BaseException:
-        param_id = get_param_id_from_db(param_id)
+        param_id = get_param_id_from_db(param_id, conf)
 
-    param_path = os.path.join(dirname(__file__), f"data/{param_dir}/param.json")
-    with open(param_path) as f:
-        params = json.load(f)
-    return params[str(param_id)]
+    return get_catalogue(conf).get_param(param_id)
 
 
-def get_param_id_from_db(param_id):
-    param_id_path = os.path.join(dirname(__file__), f"data/{param_dir}/param_id.json")
-    with open(param_id_path) as f:
-        param_ids = json.load(f)
-    return param_ids[str(param_id)]
+def get_param_id_from_db(param_id, conf=None):
+    return get_catalogue(conf).get_param_id(param_id)
 
 
-def get_unit_from_db(unit_id):
-    unit_path = os.path.join(dirname(__file__), f"data/{param_dir}/unit.json")
-    with open(unit_path) as f:
-        units = json.load(f)
-    return units[str(unit_id)]
+def get_unit_from_db(unit_id, conf=None):
+    return get_catalogue(conf).get_unit(unit_id)
 
 
 def get_param_ids(conf):
-    param_dir = conf.param_db
-    param_id_path = os.path.join(dirname(__file__), f"data/{param_dir}/param_id.json")
-    with open(param_id_path) as f:
-        param_ids = json.load(f)
-    return param_ids
+    return get_catalogue(conf).param_ids
 
 
 def get_params(conf):
-    param_dir = conf.param_db
-    param_path = os.path.join(dirname(__file__), f"data/{param_dir}/param.json")
-    with open(param_path) as f:
-        params = json.load(f)
-    return params
+    return get_catalogue(conf).params
 
 
 def get_units(conf):
-    param_dir = conf.param_db
-    unit_path = os.path.join(dirname(__file__), f"data/{param_dir}/unit.json")
-    with open(unit_path) as f:
-        units = json.load(f)
-    return units
+    return get_catalogue(conf).units
@@ -1,3 +1,13 @@
+import json
+import os
+
+import numpy as np
+import orjson
+
+# Range member holding the path of the .npy file with the range values
+NPY_RANGE_KEY = "covjsonkit:npy"
+
+
 def merge_coverage_collections(collection1, collection2):
     """
     Merges two coverage collections into one.
@@ -17,6 +27,8 @@ def merge_coverage_collections(collection1, collection2):
     if collection2 == {}:
         return collection1
 
+    collection1 = resolve_shared_domains(collection1)
+    collection2 = resolve_shared_domains(collection2)
     merged_collection = collection1.copy()
 
     if collection1.get("type") != collection2.get("type"):
@@ -87,3 +99,170 @@ def coverage_to_coveragecollection(coverage: dict) -> dict:
             collection[key] = coverage[key]
 
     return collection
+
+
+def resolve_shared_domains(collection: dict) -> dict:
+    """
+    Inline the shared domains of a CoverageCollection into its coverages.
+
+    Collections encoded with ``shared_domains`` enabled hold each distinct domain
+    once in a top-level ``"domains"`` object keyed by id, and their coverages
+    refer to it as ``"domain": "#<id>"``.
+
+    Returns
+    -------
+    dict
+        A collection whose coverages carry their domain objects again. The input
+        is not modified, and is returned unchanged if it has no shared domains.
+    """
+    domains = collection.get("domains")
+    if not domains:
+        return collection
+
+    resolved = {key: value for key, value in collection.items() if key != "domains"}
+    resolved["coverages"] = []
+    for coverage in collection.get("coverages", []):
+        domain = coverage.get("domain")
+        if isinstance(domain, str):
+            if not domain.startswith("#") or domain[1:] not in domains:
+                raise ValueError(f"Coverage refers to unknown domain {domain!r}")
+            coverage = dict(coverage, domain=domains[domain[1:]])
+        resolved["coverages"].append(coverage)
+    return resolved
+
+
+class RegularAxis(dict):
+    """
+    Regular axis ``{"start", "stop", "num"}`` whose ``"values"`` are generated on first access.
+
+    ``axis["values"]`` and ``axis.get("values")`` work as for an axis listing its
+    values, so decoders need not tell the two apart, but the values of axes
+    nobody reads are never built.
+    """
+
+    def __missing__(self, key):
+        if key != "values":
+            raise KeyError(key)
+        self["values"] = values = regular_axis_values(self["start"], self["stop"], self["num"])
+        return values
+
+    def __contains__(self, key):
+        return key == "values" or super().__contains__(key)
+
+    def get(self, key, default=None):
+        return self[key] if key in self else default
+
+
+def expand_regular_axes(covjson: dict) -> dict:
+    """
+    Give the regular axes of a Coverage or CoverageCollection their values.
+
+    Axes encoded with ``compact_axes`` enabled may be written as
+    ``{"start", "stop", "num"}`` instead of listing their ``values``.
+
+    Returns
+    -------
+    dict
+        A Coverage or collection whose regular axes are :class:`RegularAxis`
+        objects, generating their ``values`` when first read. The input is not
+        modified, and is returned unchanged if it has no regular axes.
+    """
+    if "coverages" not in covjson:
+        return _expand_coverage_axes(covjson)
+    coverages = [_expand_coverage_axes(coverage) for coverage in covjson["coverages"]]
+    if all(new is old for new, old in zip(coverages, covjson["coverages"])):
+        return covjson
+    return dict(covjson, coverages=coverages)
+
+
+def _expand_coverage_axes(coverage):
+    domain = coverage.get("domain")
+    if not isinstance(domain, dict) or not any(_is_regular(axis) for axis in domain.get("axes", {}).values()):
+        return coverage
+    axes = {name: RegularAxis(axis) if _is_regular(axis) else axis for name, axis in domain["axes"].items()}
+    return dict(coverage, domain=dict(domain, axes=axes))
+
+
+def _is_regular(axis):
+    return "values" not in axis and "num" in axis
+
+
+def regular_axis_values(start, stop, num):
+    """Values of an axis written as ``{"start", "stop", "num"}``."""
+    if isinstance(start, int) and isinstance(stop, int) and (stop - start) % max(num - 1, 1) == 0:
+        # Integer axes, such as levels or steps in hours, stay integers
+        step = (stop - start) // max(num - 1, 1)
+        return [start + i * step for i in range(num)]
+    return np.linspace(start, stop, num).tolist()
+
+
+def read_covjson(path: str, mmap_mode: str = "r") -> dict:
+    """
+    Read a CoverageJSON file, loading the ``.npy`` range sidecars written next to it.
+
+    Returns
+    -------
+    dict
+        The CoverageJSON object, with the sidecar values memory-mapped as described
+        in :func:`load_npy_ranges`.
+    """
+    with open(path, "rb") as json_file:
+        data = json_file.read()
+    try:
+        covjson = orjson.loads(data)
+    except orjson.JSONDecodeError:
+        # json.dump writes missing values as NaN, which is not valid JSON
+        covjson = json.loads(data)
+    return load_npy_ranges(covjson, os.path.dirname(os.path.abspath(path)), mmap_mode)
+
+
+def load_npy_ranges(collection: dict, directory: str, mmap_mode: str = "r") -> dict:
+    """
+    Load the range values that ``Encoder.write_npy`` stored in ``.npy`` sidecar files.
+
+    Such ranges hold a ``"covjsonkit:npy"`` path, relative to ``directory``,
+    instead of their ``"values"``. The files are read with ``np.load``, memory
+    mapped with ``mmap_mode`` so that values are only read from disk when used;
+    pass ``mmap_mode=None`` to read them into memory. Paths leading out of
+    ``directory`` are rejected.
+
+    Returns
+    -------
+    dict
+        A collection whose ranges carry their ``"values"`` as NumPy arrays. The
+        input is not modified, and is returned unchanged if it has no sidecars.
+    """
+    coverages = collection.get("coverages") or []
+    if not any(_has_npy_ranges(coverage) for coverage in coverages):
+        return collection
+
+    root = os.path.realpath(directory)
+    resolved = dict(collection, coverages=[])
+    for coverage in coverages:
+        if _has_npy_ranges(coverage):
+            ranges = {
+                param: _load_npy_range(ndarray, root, mmap_mode) if NPY_RANGE_KEY in ndarray else ndarray
+                for param, ndarray in coverage["ranges"].items()
+            }
+            coverage = dict(coverage, ranges=ranges)
+        resolved["coverages"].append(coverage)
+    return resolved
+
+
+def _has_npy_ranges(coverage):
+    return any(
+        isinstance(ndarray, dict) and NPY_RANGE_KEY in ndarray for ndarray in coverage.get("ranges", {}).values()
+    )
+
+
+def _load_npy_range(ndarray, root, mmap_mode):
+    path = os.path.realpath(os.path.join(root, ndarray[NPY_RANGE_KEY]))
+    if os.path.commonpath([root, path]) != root:
+        raise ValueError(f"Range values {ndarray[NPY_RANGE_KEY]!r} are outside of {root}")
+    values = np.load(path, mmap_mode=mmap_mode, allow_pickle=False)
+    if isinstance(values, np.memmap):
+        # Plain ndarray view of the mapping, which orjson can serialise
+        values = values.view(np.ndarray)
+    loaded = {key: value for key, value in ndarray.items() if key != NPY_RANGE_KEY}
+    loaded["values"] = values
+    return loaded
@@ -0,0 +1,37 @@
+"""Start-up time budget.
+
+Short-lived batch jobs and autoscaled workers pay the import cost of
+covjsonkit on every cold start. Importing the package and its api module must
+not read configuration, the parameter database or any feature module.
+
+The budget can be overridden with ``COVJSONKIT_IMPORT_BUDGET`` (seconds) on
+slow machines.
+"""
+
+import os
+import subprocess
+import sys
+
+IMPORT_BUDGET = float(os.getenv("COVJSONKIT_IMPORT_BUDGET", "1.0"))
+
+
+def _import_time(module):
+    code = "import time\n" "start = time.perf_counter()\n" f"import {module}\n" "print(time.perf_counter() - start)\n"
+    # Best of three to smooth out a cold filesystem cache
+    timings = []
+    for _ in range(3):
+        out = subprocess.run([sys.executable, "-c", code], check=True, capture_output=True, text=True)
+        timings.append(float(out.stdout))
+    return min(timings)
+
+
+class TestImportTime:
+    def test_import_covjsonkit(self, record_property):
+        elapsed = _import_time("covjsonkit")
+        record_property("seconds", elapsed)
+        assert elapsed < IMPORT_BUDGET, f"import covjsonkit took {elapsed:.3f}s"
+
+    def test_import_covjsonkit_api(self, record_property):
+        elapsed = _import_time("covjsonkit.api")
+        record_property("seconds", elapsed)
+        assert elapsed < IMPORT_BUDGET, f"import covjsonkit.api took {elapsed:.3f}s"
@@ -0,0 +1,145 @@
+"""Tree walking throughput.
+
+``Encoder.walk_tree`` runs once per polytope request and visits every node of
+the result tree. Wide trees (many latitude nodes, as returned for bounding
+boxes and polygons) stress the per-node overhead; deep trees (many
+single-valued MARS axes above the data) stress the traversal itself.
+
+The budgets can be overridden with ``COVJSONKIT_WALK_BUDGET`` (seconds) on
+slow machines.
+"""
+
+import os
+import sys
+import time
+
+import numpy as np
+from polytope_feature.datacube.datacube_axis import IntDatacubeAxis
+from polytope_feature.datacube.tensor_index_tree import TensorIndexTree
+
+from covjsonkit.api import Covjsonkit
+
+WALK_BUDGET = float(os.getenv("COVJSONKIT_WALK_BUDGET", "2.0"))
+
+
+def _node(name, values):
+    axis = IntDatacubeAxis()
+    axis.name = name
+    return TensorIndexTree(axis=axis, values=tuple(values))
+
+
+def _chain(parent, nodes):
+    for node in nodes:
+        parent.add_child(node)
+        parent = node
+    return parent
+
+
+def wide_tree(n_lat=5000, n_lon=4, steps=(0, 6, 12), empty_every=0):
+    tree = TensorIndexTree()
+    parent = _chain(
+        tree,
+        [
+            _node("class", ("od",)),
+            _node("date", (np.datetime64("2025-01-01T00:00:00"),)),
+            _node("levtype", ("sfc",)),
+            _node("param", ("167",)),
+            _node("step", steps),
+            _node("stream", ("oper",)),
+            _node("type", ("fc",)),
+        ],
+    )
+    for i in range(n_lat):
+        lat = _node("latitude", (float(i) / 100,))
+        lon = _node("longitude", tuple(float(j) for j in range(n_lon)))
+        lon.result = [1.0] * (n_lon * len(steps))
+        if empty_every and i % empty_every == 0:
+            # Masked or out-of-domain point: polytope returns no data
+            lon.result = [None] * len(lon.result)
+        lat.add_child(lon)
+        parent.add_child(lat)
+    return tree
+
+
+def deep_tree(depth=5000):
+    tree = TensorIndexTree()
+    parent = _chain(
+        tree,
+        [_node("date", (np.datetime64("2025-01-01T00:00:00"),)), _node("param", ("167",))]
+        + [_node(f"axis{i}", (i,)) for i in range(depth)],
+    )
+    lat = _node("latitude", (1.0,))
+    lon = _node("longitude", (2.0,))
+    lon.result = [1.0]
+    _chain(parent, [lat, lon])
+    return tree
+
+
+def month_tree(n_years=30, n_lat=1000):
+    """Multi-decade monthly means (clmn), every point below one year and one month node."""
+    tree = TensorIndexTree()
+    parent = _chain(
+        tree,
+        [
+            _node("class", ("od",)),
+            _node("levtype", ("sfc",)),
+            _node("param", ("167",)),
+            _node("stream", ("clmn",)),
+            _node("year", tuple(range(1960, 1960 + n_years))),
+            _node("month", tuple(range(1, 13))),
+        ],
+    )
+    for i in range(n_lat):
+        lat = _node("latitude", (float(i) / 100,))
+        lon = _node("longitude", (0.0,))
+        lon.result = [1.0] * (n_years * 12)
+        lat.add_child(lon)
+        parent.add_child(lat)
+    return tree
+
+
+def _walk(tree):
+    encoder = Covjsonkit().encode("CoverageCollection", "BoundingBox")
+    fields = {"lat": 0, "param": 0, "number": [0], "step": [0], "dates": [], "levels": [0]}
+    coords, mars_metadata, range_dict = {}, {}, {}
+    # Best of three to smooth out allocator and cache warm-up
+    timings = []
+    for _ in range(3):
+        start = time.perf_counter()
+        encoder.walk_tree(tree, dict(fields, dates=[]), coords, mars_metadata, range_dict)
+        timings.append(time.perf_counter() - start)
+    return min(timings), range_dict
+
+
+class TestTreeWalk:
+    def test_wide_tree(self, record_property):
+        elapsed, range_dict = _walk(wide_tree())
+        record_property("seconds", elapsed)
+        assert len(range_dict[("2025-01-01T00:00:00Z", 0, 0, "167", 6)]) == 3 * 5000 * 4
+        assert elapsed < WALK_BUDGET, f"walk_tree wide (5000 lat nodes) took {elapsed:.3f}s"
+
+    def test_wide_tree_with_empty_leaves(self, record_property):
+        elapsed, range_dict = _walk(wide_tree(empty_every=2))
+        record_property("seconds", elapsed)
+        assert range_dict == {}
+        assert elapsed < WALK_BUDGET, f"walk_tree wide with every other leaf empty took {elapsed:.3f}s"
+
+    def test_month_tree(self, record_property):
+        encoder = Covjsonkit().encode("CoverageCollection", "BoundingBox")
+        tree = month_tree()
+        fields = {"lat": 0, "param": 0, "number": [0], "years": [], "months": [], "dates": [], "levels": [0]}
+        range_dict = {}
+        start = time.perf_counter()
+        encoder.walk_tree_month(tree, fields, {}, {}, range_dict)
+        elapsed = time.perf_counter() - start
+        record_property("seconds", elapsed)
+        assert len(fields["dates"]) == 30 * 12
+        assert len(range_dict[("1980-06", 0, 0, "167")]) == 1000
+        assert elapsed < WALK_BUDGET, f"walk_tree_month (30 years x 12 months, 1000 points) took {elapsed:.3f}s"
+
+    def test_deep_tree(self, record_property):
+        depth = sys.getrecursionlimit() * 5
+        elapsed, range_dict = _walk(deep_tree(depth))
+        record_property("seconds", elapsed)
+        assert range_dict[("2025-01-01T00:00:00Z", 0, 0, "167", 0)] == [1.0] * 3
+        assert elapsed < WALK_BUDGET, f"walk_tree deep ({depth} axes) took {elapsed:.3f}s"
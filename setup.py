@@ -24,5 +24,5 @@ setup(
     zip_safe=False,
     include_package_data=True,
     install_requires=requirements,
-    package_data={"covjsonkit": ["data/*.json"]},
+    package_data={"covjsonkit": ["data/*.json", "data/*/*.json"]},
 )
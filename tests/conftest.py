@@ -1,7 +1,10 @@
 import numpy as np
+import pytest
 from polytope_feature.datacube.datacube_axis import IntDatacubeAxis
 from polytope_feature.datacube.tensor_index_tree import TensorIndexTree
 
+from covjsonkit.api import Covjsonkit
+
 try:
     # Only available on polytope versions that support compacted unstructured
     # (ICON, Lambert LAM) results. Absent on released polytope, in which case
@@ -11,6 +14,17 @@ try:
 except ImportError:
     MergedTensorIndexNode = None
 
+
+@pytest.fixture(autouse=True, scope="session")
+def param_db_cache(tmp_path_factory):
+    """Build the parameter indexes in a temporary directory rather than the user's cache."""
+    monkeypatch = pytest.MonkeyPatch()
+    path = tmp_path_factory.mktemp("cache")
+    monkeypatch.setenv("COVJSONKIT_CACHE_DIR", str(path))
+    yield path
+    monkeypatch.undo()
+
+
 # -- Shared constants for reforecast tests --
 
 REFORECAST_METADATA_BASE = {
@@ -177,3 +191,38 @@ def reforecast_tree(branches, date=np.datetime64("2024-03-01")):
     for b in branches:
         root.add_child(b)
     return tree
+
+
+# -- Shared encoder fixtures --
+
+
+@pytest.fixture
+def points():
+    """Two points with values at two steps, for ``forecast_tree(points, step=(0, 6))``."""
+    return [(48.0, 11.0, [264.9, 270.1]), (50.0, 12.0, [265.1, 271.3])]
+
+
+@pytest.fixture
+def make_encoder():
+    """Factory for a CoverageCollection encoder of ``feature`` with ``config``."""
+
+    def make(feature="BoundingBox", config=None):
+        return Covjsonkit(config).encode("CoverageCollection", feature)
+
+    return make
+
+
+@pytest.fixture
+def encode(make_encoder, points):
+    """Factory for an encoder that has encoded ``tree`` with ``method``.
+
+    ``tree`` defaults to a forecast tree of ``points`` at steps 0 and 6, and
+    ``kwargs`` (e.g. ``sink``) are passed on to ``method``.
+    """
+
+    def encode(feature="BoundingBox", config=None, method="from_polytope", tree=None, **kwargs):
+        encoder = make_encoder(feature, config)
+        getattr(encoder, method)(tree if tree is not None else forecast_tree(points, step=(0, 6)), **kwargs)
+        return encoder
+
+    return encode
@@ -0,0 +1,88 @@
+import subprocess
+import sys
+
+import pytest
+
+from covjsonkit import api
+from covjsonkit.api import Covjsonkit, FeatureRegistry
+from covjsonkit.encoder.BoundingBox import BoundingBox
+
+
+def _imported_modules(code):
+    out = subprocess.run(
+        [sys.executable, "-c", code + "\nimport sys\nprint(' '.join(sorted(sys.modules)))"],
+        check=True,
+        capture_output=True,
+        text=True,
+    )
+    return set(out.stdout.split())
+
+
+class DummyEntryPoint:
+    def __init__(self, name, value):
+        self.name = name
+        self.value = value
+
+    def load(self):
+        return self.value
+
+
+class SwathEncoder:
+    def __init__(self, conf, domaintype):
+        self.conf = conf
+        self.domaintype = domaintype
+
+
+class DummyEntryPoints(list):
+    def select(self, group):
+        return [ep for ep in self if ep.group == group]
+
+
+class TestFeatureRegistry:
+    def test_import_api_does_not_import_features(self):
+        modules = _imported_modules("import covjsonkit.api")
+        assert "covjsonkit.encoder.TimeSeries" not in modules
+        assert "covjsonkit.decoder.Grid" not in modules
+        assert "xarray" not in modules
+        assert "scipy" not in modules
+
+    def test_feature_imported_on_first_use(self):
+        modules = _imported_modules(
+            "from covjsonkit.api import Covjsonkit\nCovjsonkit().encode('CoverageCollection', 'PointSeries')"
+        )
+        assert "covjsonkit.encoder.TimeSeries" in modules
+        assert "covjsonkit.encoder.BoundingBox" not in modules
+        assert "covjsonkit.decoder.TimeSeries" not in modules
+
+    def test_builtin_lookup(self):
+        assert api.features_encoder["boundingbox"] is BoundingBox
+        assert "grid" in api.features_decoder
+        with pytest.raises(KeyError):
+            api.features_encoder["not-a-feature"]
+
+    def test_register(self):
+        registry = FeatureRegistry("covjsonkit.test", {})
+        registry.register("bbox", BoundingBox)
+        registry.register("grid", "covjsonkit.encoder.Grid:Grid")
+        assert registry["bbox"] is BoundingBox
+        assert registry["grid"].__name__ == "Grid"
+        assert sorted(registry) == ["bbox", "grid"]
+
+    def test_entry_point_features(self, monkeypatch):
+        import importlib.metadata
+
+        swath = DummyEntryPoint("swath", SwathEncoder)
+        swath.group = "covjsonkit.encoders"
+        clash = DummyEntryPoint("grid", object)
+        clash.group = "covjsonkit.encoders"
+        monkeypatch.setattr(importlib.metadata, "entry_points", lambda: DummyEntryPoints([swath, clash]))
+        monkeypatch.setattr(
+            api,
+            "features_encoder",
+            FeatureRegistry("covjsonkit.encoders", {"grid": "covjsonkit.encoder.Grid:Grid"}),
+        )
+
+        encoder = Covjsonkit().encode("CoverageCollection", "Swath")
+        assert isinstance(encoder, SwathEncoder)
+        assert encoder.domaintype == "Swath"
+        assert api.features_encoder["grid"].__name__ == "Grid"
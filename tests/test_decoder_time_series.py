@@ -1,6 +1,7 @@
 # from earthkit import data
 
 import json
+import math
 from pathlib import Path
 
 from covjsonkit.api import Covjsonkit
@@ -306,6 +307,14 @@ class TestDecoder:
         data_vars = ["T"]
         assert all(var in ds.data_vars for var in data_vars)
 
+    def test_timeseries_file_with_nan(self):
+        # Written by json.dump, which writes the missing value as NaN
+        path = Path(__file__).parent / "data/test_timeseries_param_t_nan.json"
+        ds = Covjsonkit().decode(str(path)).to_xarray()
+        values = ds["T"].values.ravel()
+        assert values[0] == 285.6
+        assert math.isnan(values[1])
+
     def test_timeseries_to_xarray(self):
         # print(ds)
         # print(ds["Temperature"])
@@ -0,0 +1,104 @@
+import io
+
+import numpy as np
+import orjson
+import pytest
+from conftest import chain, forecast_tree, make_point, month_tree, node, tip
+from polytope_feature.datacube.tensor_index_tree import TensorIndexTree
+
+from covjsonkit.api import Covjsonkit
+
+POINTS = [(48.0, 11.0), (50.0, 12.0), (52.0, 13.0)]
+T2M = [264.9, 265.1, 266.3]
+MSL = [101325.0, 101200.0, 101100.0]
+
+
+def _points(values, points=POINTS):
+    return [(lat, lon, [value]) for (lat, lon), value in zip(points, values)]
+
+
+def two_param_tree():
+    """One tree holding both parameters; each leaf result is laid out [param]."""
+    tree = chain(
+        TensorIndexTree(),
+        node("class", ("od",)),
+        node("date", (np.datetime64("2025-01-01T00:00:00"),)),
+        node("domain", ("g",)),
+        node("expver", ("0001",)),
+        node("levtype", ("sfc",)),
+        node("param", ("151", "167")),
+        node("step", (0,)),
+        node("stream", ("oper",)),
+        node("type", ("fc",)),
+    )
+    parent = tip(tree)
+    for (lat, lon), msl, t2m in zip(POINTS, MSL, T2M):
+        parent.add_child(make_point(lat, lon, [msl, t2m]))
+    return tree
+
+
+def _encoder(feature="BoundingBox"):
+    return Covjsonkit().encode("CoverageCollection", feature)
+
+
+def _single(tree, feature="BoundingBox", method="from_polytope"):
+    encoder = _encoder(feature)
+    getattr(encoder, method)(tree)
+    return orjson.loads(encoder.get_json())
+
+
+def _many(trees, feature="BoundingBox", **kwargs):
+    encoder = _encoder(feature)
+    encoder.from_polytope_many(trees, **kwargs)
+    return orjson.loads(encoder.get_json())
+
+
+class TestFromPolytopeMany:
+    @pytest.mark.parametrize("feature", ["BoundingBox", "PointSeries", "Polygon"])
+    def test_split_by_parameter(self, feature):
+        pieces = [forecast_tree(_points(MSL), param="151"), forecast_tree(_points(T2M), param="167")]
+        assert _many(pieces, feature) == _single(two_param_tree(), feature)
+
+    def test_split_by_area(self):
+        pieces = [forecast_tree(_points(T2M[:2], POINTS[:2])), forecast_tree(_points(T2M[2:], POINTS[2:]))]
+        assert _many(pieces) == _single(forecast_tree(_points(T2M)))
+
+    def test_split_by_date(self):
+        dates = [np.datetime64("2025-01-01T00:00:00"), np.datetime64("2025-01-02T00:00:00")]
+        pieces = [forecast_tree(_points(T2M), date=date) for date in dates]
+        covjson = _many(pieces)
+        assert [coverage["mars:metadata"]["Forecast date"] for coverage in covjson["coverages"]] == [
+            "2025-01-01T00:00:00Z",
+            "2025-01-02T00:00:00Z",
+        ]
+        for coverage in covjson["coverages"]:
+            assert coverage["ranges"]["2t"]["values"] == T2M
+
+    def test_single_result(self):
+        assert _many([forecast_tree(_points(T2M))]) == _single(forecast_tree(_points(T2M)))
+
+    def test_month(self):
+        pieces = [
+            month_tree(_points(MSL), param="151", years=(2020,)),
+            month_tree(_points(MSL), param="151", years=(2021,)),
+        ]
+        covjson = _many(pieces, method="from_polytope_month")
+        assert covjson == _single(
+            month_tree(_points(MSL), param="151", years=(2020, 2021)), method="from_polytope_month"
+        )
+
+    def test_streamed(self):
+        pieces = [forecast_tree(_points(MSL), param="151"), forecast_tree(_points(T2M), param="167")]
+        sink = io.BytesIO()
+        _encoder().from_polytope_many(pieces, sink=sink)
+        assert orjson.loads(sink.getvalue()) == _single(two_param_tree())
+
+    def test_overlapping_results(self):
+        pieces = [forecast_tree(_points(T2M)), forecast_tree(_points(T2M))]
+        with pytest.raises(ValueError, match="Several results"):
+            _many(pieces)
+
+    def test_inconsistent_results(self):
+        pieces = [forecast_tree(_points(T2M[:2], POINTS[:2])), forecast_tree(_points(MSL[2:], POINTS[2:]), param="151")]
+        with pytest.raises(ValueError, match="cannot be encoded as one collection"):
+            _many(pieces)
@@ -0,0 +1,113 @@
+import numpy as np
+import orjson
+from conftest import chain, forecast_tree, make_point, node, tip
+from polytope_feature.datacube.tensor_index_tree import TensorIndexTree
+
+from covjsonkit.api import Covjsonkit
+from covjsonkit.utils import RegularAxis, expand_regular_axes
+
+LEVELS = {1000: 290.1, 900: 284.0, 800: 277.5, 700: 270.2}
+
+
+def _profile_tree():
+    return chain(
+        TensorIndexTree(),
+        node("class", ("od",)),
+        node("date", (np.datetime64("2025-01-01T00:00:00"),)),
+        node("domain", ("g",)),
+        node("expver", ("0001",)),
+        node("levtype", ("pl",)),
+        node("param", ("130",)),
+        node("step", (0,)),
+        node("stream", ("oper",)),
+        node("type", ("an",)),
+        node("levelist", tuple(LEVELS)),
+        make_point(48.0, 11.0, list(LEVELS.values())),
+    )
+
+
+def _grid_tree(steps):
+    tree = chain(
+        TensorIndexTree(),
+        node("class", ("od",)),
+        node("date", (np.datetime64("2025-01-01T00:00:00"),)),
+        node("domain", ("g",)),
+        node("expver", ("0001",)),
+        node("levtype", ("sfc",)),
+        node("param", ("167",)),
+        node("step", steps),
+        node("stream", ("oper",)),
+        node("type", ("an",)),
+    )
+    parent = tip(tree)
+    for i, (lat, lon) in enumerate([(48.0, 11.0), (48.0, 12.0), (50.0, 11.0), (50.0, 12.0)]):
+        parent.add_child(make_point(lat, lon, [float(i + 10 * s) for s in range(len(steps))]))
+    return tree
+
+
+def _encode(feature, tree, compact=True):
+    return Covjsonkit({"compact_axes": compact}).encode("CoverageCollection", feature).from_polytope(tree)
+
+
+class TestCompactAxes:
+    def test_vertical_profile_levels(self):
+        covjson = _encode("VerticalProfile", _profile_tree())
+        axes = covjson["coverages"][0]["domain"]["axes"]
+        assert list(axes) == ["latitude", "longitude", "levelist", "t"]
+        assert axes["levelist"] == {"start": 1000, "stop": 700, "num": 4}
+        assert axes["t"] == {"values": ["2025-01-01T00:00:00Z"]}
+
+    def test_vertical_profile_decoded(self):
+        compact = orjson.loads(orjson.dumps(_encode("VerticalProfile", _profile_tree())))
+        plain = _encode("VerticalProfile", _profile_tree(), compact=False)
+        decoded = Covjsonkit().decode(compact)
+        expected = Covjsonkit().decode(plain)
+        assert decoded.get_values() == expected.get_values()
+        assert decoded.to_xarray().equals(expected.to_xarray())
+
+    def test_grid_steps(self):
+        covjson = _encode("Grid", _grid_tree((0, 6, 12, 18)))
+        axes = covjson["coverages"][0]["domain"]["axes"]
+        assert axes["t"] == {"start": 0, "stop": 18, "num": 4}
+        assert axes["levelist"] == {"values": [0]}
+
+    def test_grid_decoded(self):
+        tree = _grid_tree((0, 6, 12))
+        compact = orjson.loads(orjson.dumps(_encode("Grid", tree)))
+        ds = Covjsonkit().decode(compact).to_xarray()
+        expected = Covjsonkit().decode(_encode("Grid", tree, compact=False)).to_xarray()
+        assert ds.equals(expected)
+
+    def test_time_series_times_kept(self):
+        # CoverageJSON only allows start/stop for numbers, not for ISO times
+        points = [(48.0, 11.0, [1.0, 2.0, 3.0, 4.0])]
+        covjson = _encode("PointSeries", forecast_tree(points, step=(0, 1, 2, 3)))
+        t = covjson["coverages"][0]["domain"]["axes"]["t"]
+        assert t["values"] == [
+            "2025-01-01T00:00:00Z",
+            "2025-01-01T01:00:00Z",
+            "2025-01-01T02:00:00Z",
+            "2025-01-01T03:00:00Z",
+        ]
+
+
+class TestRegularAxis:
+    def test_values_generated_on_access(self):
+        axis = RegularAxis({"start": 0, "stop": 360, "num": 361})
+        assert "values" in axis
+        assert not dict.__contains__(axis, "values")
+        values = axis["values"]
+        assert values == list(range(361))
+        assert axis.get("values") is values
+        assert axis.get("other", 1) == 1
+
+    def test_decoder_leaves_values_to_readers(self):
+        compact = _encode("VerticalProfile", _profile_tree())
+        axis = expand_regular_axes(compact)["coverages"][0]["domain"]["axes"]["levelist"]
+        assert isinstance(axis, RegularAxis)
+        assert not dict.__contains__(axis, "values")
+        assert axis["values"] == [1000, 900, 800, 700]
+
+    def test_float_axis(self):
+        axis = RegularAxis({"start": 35.0, "stop": 70.0, "num": 351})
+        np.testing.assert_allclose(axis["values"], [35 + 0.1 * i for i in range(351)])
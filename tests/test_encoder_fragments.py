@@ -0,0 +1,92 @@
+import orjson
+from conftest import forecast_tree
+
+from covjsonkit.api import Covjsonkit
+from covjsonkit.encoder import fragments
+
+TWO_POINTS = [(48.0, 11.0, [264.9]), (50.0, 12.0, [265.1])]
+
+
+def _encoder(feature="BoundingBox"):
+    return Covjsonkit().encode("CoverageCollection", feature)
+
+
+class TestFragments:
+    def test_parameter_shared_between_encoders(self):
+        encoder1 = _encoder()
+        encoder2 = _encoder("PointSeries")
+        encoder1.add_parameter(167)
+        encoder2.add_parameter("167")
+        assert encoder1.covjson["parameters"]["2t"] is encoder2.covjson["parameters"]["2t"]
+        assert encoder1.covjson["parameters"]["2t"] == {
+            "type": "Parameter",
+            "description": {"en": encoder1.catalogue.get_param(167)["description"]},
+            "unit": {"symbol": "K"},
+            "observedProperty": {"id": "2t", "label": {"en": "2 metre temperature"}},
+        }
+
+    def test_reference_shared_between_encoders(self):
+        covjson1 = _encoder().from_polytope(forecast_tree(TWO_POINTS))
+        covjson2 = _encoder().from_polytope(forecast_tree(TWO_POINTS))
+        assert covjson1["referencing"][0] is covjson2["referencing"][0]
+
+    def test_different_references_not_shared(self):
+        encoder1 = _encoder()
+        encoder2 = _encoder()
+        system = {"type": "GeographicCRS", "id": "http://www.opengis.net/def/crs/OGC/1.3/CRS84"}
+        encoder1.add_reference({"coordinates": ["x", "y", "z"], "system": dict(system)})
+        encoder2.add_reference({"coordinates": ["latitude", "longitude", "levelist"], "system": dict(system)})
+        assert encoder1.covjson["referencing"][0] is not encoder2.covjson["referencing"][0]
+        assert encoder2.covjson["referencing"][0]["coordinates"] == ["latitude", "longitude", "levelist"]
+
+    def test_get_json_matches_plain_serialisation(self):
+        encoder = _encoder()
+        covjson = encoder.from_polytope(forecast_tree(TWO_POINTS))
+        assert encoder.get_json() == orjson.dumps(covjson)
+        # Served from the cached fragments the second time round
+        assert _encoder().get_json() == orjson.dumps(_encoder().covjson)
+        encoder2 = _encoder()
+        encoder2.from_polytope(forecast_tree(TWO_POINTS))
+        assert encoder2.get_json() == encoder.get_json()
+
+    def test_replaced_objects_are_serialised(self):
+        encoder = _encoder()
+        covjson = encoder.from_polytope(forecast_tree(TWO_POINTS))
+        covjson["parameters"]["2t"] = {"type": "Parameter", "description": {"en": "custom"}}
+        assert orjson.loads(encoder.get_json())["parameters"]["2t"]["description"] == {"en": "custom"}
+
+    def test_fragment_of_unshared_object(self):
+        obj = {"type": "Parameter"}
+        assert fragments.fragment(obj) is obj
+
+
+MANY_POINTS = [(40.0 + i, 10.0 + i, [260.0 + i, 270.0 + i]) for i in range(fragments.MIN_SHARED_VALUES)]
+
+
+class TestAxisValueFragments:
+    def test_get_json_matches_plain_serialisation(self):
+        encoder = _encoder()
+        covjson = encoder.from_polytope(forecast_tree(MANY_POINTS, step=(0, 6)))
+        assert encoder.get_json() == orjson.dumps(covjson)
+        assert b"".join(encoder.iter_json(chunk_size=64)) == orjson.dumps(covjson)
+
+    def test_repeated_values_serialised_once(self):
+        covjson = _encoder().from_polytope(forecast_tree(MANY_POINTS, step=(0, 6)))
+        first, second = covjson["coverages"]
+        values = first["domain"]["axes"]["composite"]["values"]
+        assert second["domain"]["axes"]["composite"]["values"] is values
+        share = fragments.AxisValueFragments()
+        assert share.coverage(first) is first
+        spliced = share.coverage(second)
+        assert isinstance(spliced["domain"]["axes"]["composite"]["values"], fragments.Fragment)
+        assert spliced["domain"]["axes"]["t"] is second["domain"]["axes"]["t"]
+        assert second["domain"]["axes"]["composite"]["values"] is values
+        assert share.coverage(dict(second))["domain"]["axes"]["composite"]["values"] is (
+            spliced["domain"]["axes"]["composite"]["values"]
+        )
+
+    def test_short_values_left_alone(self):
+        covjson = _encoder().from_polytope(forecast_tree(TWO_POINTS, step=(0, 6)))
+        share = fragments.AxisValueFragments()
+        for coverage in covjson["coverages"]:
+            assert share.coverage(coverage) is coverage
@@ -0,0 +1,168 @@
+import random
+
+import numpy as np
+import orjson
+import pytest
+from conftest import chain, make_point, node, tip
+from polytope_feature.datacube.tensor_index_tree import TensorIndexTree
+
+from covjsonkit.api import Covjsonkit
+from covjsonkit.decoder import Grid
+from covjsonkit.encoder.axes import regular_axis, unique_axis
+from covjsonkit.utils import expand_regular_axes
+
+
+def _grid_tree(latitudes, longitudes):
+    tree = chain(
+        TensorIndexTree(),
+        node("class", ("od",)),
+        node("date", (np.datetime64("2025-01-01T00:00:00"),)),
+        node("domain", ("g",)),
+        node("expver", ("0001",)),
+        node("levtype", ("sfc",)),
+        node("param", ("167",)),
+        node("step", (0,)),
+        node("stream", ("oper",)),
+        node("type", ("an",)),
+    )
+    parent = tip(tree)
+    for i, lat in enumerate(latitudes):
+        for j, lon in enumerate(longitudes):
+            parent.add_child(make_point(lat, lon, [250.0 + i * len(longitudes) + j]))
+    return tree
+
+
+def _pairwise_unique(values, tolerance=0.01):
+    """Reference for ``unique_axis``: compare each value with every kept one."""
+    kept = []
+    for value in values:
+        if all(abs(value - other) > tolerance for other in kept):
+            kept.append(value)
+    return kept
+
+
+class TestUniqueAxis:
+    def test_matches_pairwise_comparison(self):
+        rng = random.Random(4)
+        values = [round(rng.uniform(-5, 5), rng.choice([1, 2, 3])) for _ in range(2000)]
+        # Values a fraction of the tolerance apart, including chains of them
+        values += [value + rng.choice([-0.004, 0.006, 0.011, 0.0199]) for value in values[:500]]
+        rng.shuffle(values)
+        for tolerance in (0.01, 0.05, 0.5):
+            assert unique_axis(values, tolerance) == _pairwise_unique(values, tolerance)
+
+    def test_first_seen_order(self):
+        assert unique_axis([3.0, 1.0, 3.005, 2.0, 0.995]) == [3.0, 1.0, 2.0]
+
+    def test_chained_values_compare_with_kept_values(self):
+        # 0.015 is within the tolerance of neither kept value
+        assert unique_axis([0.0, 0.008, 0.015]) == [0.0, 0.015]
+
+    def test_negative_values_near_zero(self):
+        assert unique_axis([-0.005, 0.004, 0.02]) == [-0.005, 0.02]
+
+
+class TestRegularAxis:
+    def test_regular(self):
+        values = [35 + 0.25 * i for i in range(141)]
+        assert regular_axis(values) == {"start": 35.0, "stop": 70.0, "num": 141}
+
+    def test_linspace(self):
+        values = np.linspace(70.0, 30.0, 401).tolist()
+        assert regular_axis(values) == {"start": 70.0, "stop": 30.0, "num": 401}
+
+    def test_rounded_steps_kept(self):
+        # Some of these differ from np.linspace(70.0, 30.0, 401) in the last bit
+        assert regular_axis([round(70 - 0.1 * i, 1) for i in range(401)]) is None
+
+    def test_descending(self):
+        assert regular_axis([10, 8, 6, 4]) == {"start": 10, "stop": 4, "num": 4}
+
+    @pytest.mark.parametrize(
+        "values",
+        [
+            [1.0, 2.0],
+            [1.0, 2.0, 4.0],
+            [1.0, 1.0, 1.0],
+            [0.0, 0.1, 0.2001],
+            [0, 1, 3],
+            [1.0, float("nan"), 3.0],
+            ["a", "b", "c"],
+        ],
+    )
+    def test_not_regular(self, values):
+        assert regular_axis(values) is None
+
+
+LATITUDES = [49.5, 49.75, 50.0, 50.25]
+LONGITUDES = [10.0, 10.5, 11.0]
+
+
+class TestCompactAxes:
+    def test_disabled_by_default(self):
+        covjson = Covjsonkit().encode("CoverageCollection", "Grid").from_polytope(_grid_tree(LATITUDES, LONGITUDES))
+        axes = covjson["coverages"][0]["domain"]["axes"]
+        assert axes["latitude"] == {"values": LATITUDES}
+        assert axes["longitude"] == {"values": LONGITUDES}
+
+    def test_regular_grid(self):
+        encoder = Covjsonkit({"compact_axes": True}).encode("CoverageCollection", "Grid")
+        covjson = encoder.from_polytope(_grid_tree(LATITUDES, LONGITUDES))
+        axes = covjson["coverages"][0]["domain"]["axes"]
+        assert axes["latitude"] == {"start": 49.5, "stop": 50.25, "num": 4}
+        assert axes["longitude"] == {"start": 10.0, "stop": 11.0, "num": 3}
+        assert axes["t"] == {"values": [0]}
+
+    def test_irregular_axis_keeps_values(self):
+        latitudes = [49.4, 49.5, 50.0]
+        encoder = Covjsonkit({"compact_axes": True}).encode("CoverageCollection", "Grid")
+        axes = encoder.from_polytope(_grid_tree(latitudes, LONGITUDES))["coverages"][0]["domain"]["axes"]
+        assert axes["latitude"] == {"values": latitudes}
+        assert axes["longitude"] == {"start": 10.0, "stop": 11.0, "num": 3}
+
+    @pytest.mark.parametrize(
+        "latitudes, compacted",
+        [
+            (LATITUDES, True),
+            (np.linspace(30.0, 70.0, 401).tolist(), True),
+            ([round(70 - 0.1 * i, 1) for i in range(401)], False),
+        ],
+        ids=["quarter-degree", "linspace", "rounded"],
+    )
+    def test_decoded(self, latitudes, compacted):
+        tree = _grid_tree(latitudes, LONGITUDES)
+        compact = Covjsonkit({"compact_axes": True}).encode("CoverageCollection", "Grid").from_polytope(tree)
+        plain = Covjsonkit().encode("CoverageCollection", "Grid").from_polytope(tree)
+        assert ("values" not in compact["coverages"][0]["domain"]["axes"]["latitude"]) == compacted
+        compact, plain = orjson.loads(orjson.dumps(compact)), orjson.loads(orjson.dumps(plain))
+        ds = Grid.Grid(compact).to_xarray()
+        expected = Grid.Grid(plain).to_xarray()
+        np.testing.assert_array_equal(ds["latitude"].values, expected["latitude"].values)
+        np.testing.assert_array_equal(ds["longitude"].values, expected["longitude"].values)
+        np.testing.assert_array_equal(ds["2t"].values, expected["2t"].values)
+
+
+class TestExpandRegularAxes:
+    def test_expanded(self):
+        collection = {
+            "type": "CoverageCollection",
+            "coverages": [
+                {
+                    "domain": {
+                        "axes": {
+                            "x": {"start": 0.0, "stop": 1.0, "num": 5},
+                            "z": {"start": 1000, "stop": 500, "num": 3},
+                        }
+                    }
+                }
+            ],
+        }
+        expanded = expand_regular_axes(collection)
+        axes = expanded["coverages"][0]["domain"]["axes"]
+        assert axes["x"]["values"] == [0.0, 0.25, 0.5, 0.75, 1.0]
+        assert axes["z"].get("values") == [1000, 750, 500]
+        assert collection["coverages"][0]["domain"]["axes"]["x"] == {"start": 0.0, "stop": 1.0, "num": 5}
+
+    def test_unchanged_without_regular_axes(self):
+        collection = {"type": "CoverageCollection", "coverages": [{"domain": {"axes": {"x": {"values": [1, 2]}}}}]}
+        assert expand_regular_axes(collection) is collection
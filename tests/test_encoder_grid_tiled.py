@@ -0,0 +1,120 @@
+import numpy as np
+import orjson
+import pytest
+from conftest import chain, make_point, node, tip
+from polytope_feature.datacube.tensor_index_tree import TensorIndexTree
+
+from covjsonkit.api import Covjsonkit
+
+# Two steps on a 2x3 grid; each leaf holds [step 0, step 6]
+GRID_POINTS = [
+    (48.0, 11.0, [1.0, 11.0]),
+    (48.0, 12.0, [2.0, 12.0]),
+    (48.0, 13.0, [3.0, 13.0]),
+    (50.0, 11.0, [4.0, 14.0]),
+    (50.0, 12.0, [5.0, 15.0]),
+    (50.0, 13.0, [6.0, 16.0]),
+]
+
+
+def _grid(config=None):
+    tree = chain(
+        TensorIndexTree(),
+        node("class", ("od",)),
+        node("date", (np.datetime64("2025-01-01T00:00:00"),)),
+        node("domain", ("g",)),
+        node("expver", ("0001",)),
+        node("levtype", ("sfc",)),
+        node("param", ("167",)),
+        node("step", (0, 6)),
+        node("stream", ("oper",)),
+        node("type", ("an",)),
+    )
+    parent = tip(tree)
+    for lat, lon, vals in GRID_POINTS:
+        parent.add_child(make_point(lat, lon, vals))
+    encoder = Covjsonkit(config).encode("CoverageCollection", "Grid")
+    encoder.from_polytope(tree)
+    return encoder
+
+
+def _tile(store, path):
+    return orjson.loads(store[path])
+
+
+class TestGridTiled:
+    def test_one_tile_per_step(self):
+        encoder = _grid()
+        ndarray = encoder.covjson["coverages"][0]["ranges"]["2t"]
+        assert ndarray["shape"] == [2, 1, 2, 3]
+        store = {}
+        covjson = encoder.to_tiled([[1, 1, None, None]], "{coverage}/{parameter}/{t}-{levelist}.covjson", store)
+        assert covjson["coverages"][0]["ranges"]["2t"] == {
+            "type": "TiledNdArray",
+            "dataType": "float",
+            "axisNames": ["t", "levelist", "latitude", "longitude"],
+            "shape": [2, 1, 2, 3],
+            "tileSets": [{"tileShape": [1, 1, None, None], "urlTemplate": "0/2t/{t}-{levelist}.covjson"}],
+        }
+        assert sorted(store) == ["0/2t/0-0.covjson", "0/2t/1-0.covjson"]
+        assert _tile(store, "0/2t/1-0.covjson") == {
+            "type": "NdArray",
+            "dataType": "float",
+            "axisNames": ["t", "levelist", "latitude", "longitude"],
+            "shape": [1, 1, 2, 3],
+            "values": [11.0, 12.0, 13.0, 14.0, 15.0, 16.0],
+        }
+        # Domain and parameters are left as they were
+        assert covjson["coverages"][0]["domain"]["axes"]["longitude"]["values"] == [11.0, 12.0, 13.0]
+        assert "2t" in orjson.loads(encoder.get_json())["parameters"]
+
+    def test_spatial_tiles_with_partial_edge(self):
+        store = {}
+        _grid().to_tiled([[None, None, 1, 2]], "{parameter}/{latitude}/{longitude}.covjson", store)
+        assert sorted(store) == ["2t/0/0.covjson", "2t/0/1.covjson", "2t/1/0.covjson", "2t/1/1.covjson"]
+        edge = _tile(store, "2t/1/1.covjson")
+        assert edge["shape"] == [2, 1, 1, 1]
+        assert edge["values"] == [6.0, 16.0]
+        assert _tile(store, "2t/0/0.covjson")["values"] == [1.0, 2.0, 11.0, 12.0]
+
+    def test_tiles_reassemble_the_values(self):
+        encoder = _grid()
+        values = list(encoder.covjson["coverages"][0]["ranges"]["2t"]["values"])
+        store = {}
+        tile_shapes = [[1, None, None, None], [None, None, 1, 1]]
+        covjson = encoder.to_tiled(tile_shapes, "{tileset}/{t}_{latitude}_{longitude}.covjson", store, "https://x/")
+        tile_sets = covjson["coverages"][0]["ranges"]["2t"]["tileSets"]
+        assert [tile_set["urlTemplate"] for tile_set in tile_sets] == [
+            "https://x/0/{t}_{latitude}_{longitude}.covjson",
+            "https://x/1/{t}_{latitude}_{longitude}.covjson",
+        ]
+        steps = [_tile(store, f"0/{t}_{{latitude}}_{{longitude}}.covjson")["values"] for t in range(2)]
+        assert steps[0] + steps[1] == values
+        cube = np.array(values).reshape(2, 1, 2, 3)
+        for lat in range(2):
+            for lon in range(3):
+                tile = _tile(store, f"1/{{t}}_{lat}_{lon}.covjson")
+                assert tile["values"] == cube[:, :, lat, lon].reshape(-1).tolist()
+
+    def test_written_to_directory(self, tmp_path):
+        _grid({"range_dtype": "float32"}).to_tiled([[1, 1, None, None]], "{parameter}/{t}.json", str(tmp_path))
+        assert orjson.loads((tmp_path / "2t" / "0.json").read_bytes())["values"] == [1.0, 2.0, 3.0, 4.0, 5.0, 6.0]
+
+    def test_missing_placeholder(self):
+        with pytest.raises(ValueError, match=r"placeholder for the tiled axes \['t'\]"):
+            _grid().to_tiled([[1, 1, None, None]], "{parameter}.json", {})
+
+    def test_several_tile_sets_need_tileset_placeholder(self):
+        with pytest.raises(ValueError, match="tileset"):
+            _grid().to_tiled([[1, 1, None, None], [None, None, 1, 1]], "{t}-{latitude}-{longitude}.json", {})
+
+    def test_colliding_paths(self):
+        encoder = _grid()
+        coverage = encoder.covjson["coverages"][0]
+        encoder.covjson["coverages"].append(dict(coverage, ranges=dict(coverage["ranges"])))
+        with pytest.raises(ValueError, match="written twice"):
+            encoder.to_tiled([[1, 1, None, None]], "{parameter}/{t}-{levelist}.json", {})
+
+    def test_wrong_tile_rank(self):
+        with pytest.raises(ValueError, match="does not match"):
+            _grid().to_tiled([[1, None]], "{t}.json", {})
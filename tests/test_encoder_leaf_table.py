@@ -0,0 +1,130 @@
+import numpy as np
+import pytest
+from conftest import chain, make_point, node, tip
+from polytope_feature.datacube.tensor_index_tree import TensorIndexTree
+
+from covjsonkit.api import Covjsonkit
+from covjsonkit.encoder.batch import ResultBatch
+
+DATES = (np.datetime64("2025-01-01T00:00:00"), np.datetime64("2025-01-02T00:00:00"))
+LEVELS = (500, 850)
+NUMBERS = (1, 2)
+PARAMS = ("130", "157")
+STEPS = (0, 6)
+SIZE = len(LEVELS) * len(NUMBERS) * len(PARAMS) * len(STEPS)
+
+
+def ensemble_tree(dates=DATES, missing=()):
+    """Forecast tree with a two-longitude leaf and a single point per date.
+
+    The dates in ``missing`` have no values at their single point.
+    """
+    root = TensorIndexTree()
+    klass = node("class", ("od",))
+    root.add_child(klass)
+    for d, date in enumerate(dates):
+        branch = chain(
+            node("date", (date,)),
+            node("domain", ("g",)),
+            node("expver", ("0001",)),
+            node("levelist", LEVELS),
+            node("levtype", ("pl",)),
+            node("number", NUMBERS),
+            node("param", PARAMS),
+            node("step", STEPS),
+            node("stream", ("enfo",)),
+            node("type", ("pf",)),
+        )
+        klass.add_child(branch)
+        parent = tip(branch)
+        # Leaf results are laid out [levelist][number][param][step][longitude]
+        latitude = node("latitude", (48.0,))
+        leaf = node("longitude", (11.0, 12.0))
+        leaf.result = [np.float64(1000 * d + i) for i in range(SIZE * 2)]
+        latitude.add_child(leaf)
+        parent.add_child(latitude)
+        point = make_point(50.0, 13.0, [1000 * d + 500 + i for i in range(SIZE)])
+        if date in missing:
+            tip(point).result = [None] * SIZE
+        parent.add_child(point)
+    return root
+
+
+def _fields():
+    return {"lat": 0, "param": 0, "number": [0], "step": [0], "dates": [], "levels": [0]}
+
+
+def _walk(config, tree):
+    encoder = Covjsonkit(config).encode("CoverageCollection", "BoundingBox")
+    range_dict = {}
+    table = encoder.walk_leaf_table(tree, _fields(), {}, {}, range_dict)
+    return table, range_dict
+
+
+class TestLeafTable:
+    def test_columns(self):
+        table, range_dict = _walk({"numpy_ranges": True}, ensemble_tree(DATES[:1]))
+        assert range_dict == {}
+        assert table.dates == ["2025-01-01T00:00:00Z"]
+        assert list(table.axes) == ["levels", "number", "param", "step"]
+        np.testing.assert_array_equal(table.date, [0, 0, 0])
+        np.testing.assert_array_equal(table.lat, [48.0, 48.0, 50.0])
+        np.testing.assert_array_equal(table.lon, [11.0, 12.0, 13.0])
+        assert table.values.shape == (3, len(LEVELS), len(NUMBERS), len(PARAMS), len(STEPS))
+        # Second longitude, levelist 850, number 1, param 157, step 6
+        assert table.values[1, 1, 0, 1, 1] == (((1 * 2 + 0) * 2 + 1) * 2 + 1) * 2 + 1
+        assert table.values[2, 1, 0, 1, 1] == 500 + ((1 * 2 + 0) * 2 + 1) * 2 + 1
+        assert not table.mask.any()
+
+    def test_ranges_match_range_dict(self):
+        table, _ = _walk({"numpy_ranges": True}, ensemble_tree())
+        _, range_dict = _walk({}, ensemble_tree())
+        for date in table.dates:
+            rows = table.rows(date)
+            for number in NUMBERS:
+                for param in PARAMS:
+                    for step in STEPS:
+                        expected = []
+                        for level in LEVELS:
+                            expected += range_dict[(date, level, number, param, step)]
+                        values = table.range(rows, number=number, param=param, step=step)
+                        np.testing.assert_array_equal(values, expected)
+
+    def test_missing_values_masked(self):
+        tree = ensemble_tree(DATES[:1])
+        tip(tip(tree).parent.parent.children[1]).result[SIZE - 1] = None
+        table, _ = _walk({"numpy_ranges": True}, tree)
+        assert table.mask.sum() == 1
+        assert table.mask[2, -1, -1, -1, -1]
+
+    @pytest.mark.parametrize("config", [{}, {"numpy_ranges": False}])
+    def test_lists_fill_range_dict(self, config):
+        table, range_dict = _walk(config, ensemble_tree())
+        assert table is None
+        assert len(range_dict) == len(DATES) * SIZE
+
+    def test_batch_fills_range_dict(self):
+        table, range_dict = _walk({"numpy_ranges": True}, ResultBatch([ensemble_tree(DATES[:1])]))
+        assert table is None
+        assert len(range_dict) == SIZE
+
+
+class TestBoundingBoxLeafTable:
+    @pytest.mark.parametrize(
+        "config",
+        [{"numpy_ranges": True}, {"range_dtype": "float32"}, {"range_decimals": {"default": 1}}],
+        ids=["numpy", "float32", "decimals"],
+    )
+    @pytest.mark.parametrize("missing", [(), DATES[1:]], ids=["complete", "missing-date"])
+    def test_matches_lists(self, config, missing):
+        expected = Covjsonkit().encode("CoverageCollection", "BoundingBox")
+        expected.from_polytope(ensemble_tree(missing=missing))
+        encoder = Covjsonkit(config).encode("CoverageCollection", "BoundingBox")
+        encoder.from_polytope(ensemble_tree(missing=missing))
+        coverages = encoder.covjson["coverages"]
+        assert len(coverages) == (len(DATES) - len(missing)) * len(NUMBERS) * len(STEPS)
+        for coverage, reference in zip(coverages, expected.covjson["coverages"], strict=True):
+            assert coverage["mars:metadata"] == reference["mars:metadata"]
+            assert coverage["domain"] == reference["domain"]
+            for param, values in coverage["ranges"].items():
+                np.testing.assert_array_equal(values["values"], reference["ranges"][param]["values"])
@@ -0,0 +1,64 @@
+import numpy as np
+import orjson
+import pytest
+
+from covjsonkit.api import Covjsonkit
+from covjsonkit.utils import NPY_RANGE_KEY, load_npy_ranges, read_covjson
+
+
+@pytest.fixture
+def points(points):
+    """The shared points, with the value of the second one at step 6 missing."""
+    lat, lon, values = points[1]
+    return [points[0], (lat, lon, [values[0], None])]
+
+
+class TestNpySidecars:
+    def test_document_refers_to_sidecars(self, tmp_path, encode):
+        encoder = encode()
+        path = encoder.write_npy(str(tmp_path))
+        assert path == str(tmp_path / "covjson.json")
+        document = orjson.loads((tmp_path / "covjson.json").read_bytes())
+        ranges = [coverage["ranges"]["2t"] for coverage in document["coverages"]]
+        assert [ndarray[NPY_RANGE_KEY] for ndarray in ranges] == ["ranges/0/2t.npy", "ranges/1/2t.npy"]
+        assert all("values" not in ndarray for ndarray in ranges)
+        assert ranges[0]["shape"] == [2]
+        # The encoder's own collection is left untouched
+        assert isinstance(encoder.covjson["coverages"][0]["ranges"]["2t"]["values"], list)
+        values = np.load(tmp_path / "ranges" / "1" / "2t.npy")
+        assert values.dtype == np.dtype("<f8")
+        assert values[0] == 270.1 and np.isnan(values[1])
+
+    def test_round_trip(self, tmp_path, encode):
+        encoder = encode()
+        covjson = read_covjson(encoder.write_npy(str(tmp_path)))
+        values = covjson["coverages"][0]["ranges"]["2t"]["values"]
+        assert isinstance(values.base, np.memmap)
+        assert orjson.dumps(covjson, option=orjson.OPT_SERIALIZE_NUMPY) == encoder.get_json()
+
+    def test_float32(self, tmp_path, encode):
+        encoder = encode(config={"range_dtype": "float32"})
+        covjson = read_covjson(encoder.write_npy(str(tmp_path)))
+        values = covjson["coverages"][0]["ranges"]["2t"]["values"]
+        assert values.dtype == np.dtype("<f4")
+        assert orjson.dumps(covjson, option=orjson.OPT_SERIALIZE_NUMPY) == encoder.get_json()
+
+    def test_decoded(self, tmp_path, encode):
+        path = encode().write_npy(str(tmp_path))
+        expected = Covjsonkit().decode(orjson.loads(encode().get_json())).to_xarray()
+        decoded = Covjsonkit().decode(path).to_xarray()
+        # Missing values come back as NaN rather than None
+        np.testing.assert_array_equal(decoded["2t"].values, expected["2t"].values.astype(float))
+
+    def test_without_sidecars_unchanged(self, encode):
+        covjson = orjson.loads(encode().get_json())
+        assert load_npy_ranges(covjson, ".") is covjson
+
+    def test_path_outside_directory(self, tmp_path, encode):
+        encoder = encode()
+        with open(encoder.write_npy(str(tmp_path / "doc")), "rb") as fp:
+            covjson = orjson.loads(fp.read())
+        covjson["coverages"][0]["ranges"]["2t"][NPY_RANGE_KEY] = "../elsewhere.npy"
+        np.save(tmp_path / "elsewhere.npy", np.zeros(2))
+        with pytest.raises(ValueError, match="outside"):
+            load_npy_ranges(covjson, str(tmp_path / "doc"))
@@ -0,0 +1,96 @@
+import io
+
+import numpy as np
+import orjson
+import pytest
+from conftest import forecast_tree, month_tree
+
+from covjsonkit.api import Covjsonkit
+
+FEATURES = ["BoundingBox", "Circle", "Frame", "Shapefile", "Polygon", "PointSeries"]
+
+
+class TestNumpyRanges:
+    def test_disabled_by_default(self, points):
+        encoder = Covjsonkit().encode("CoverageCollection", "BoundingBox")
+        assert not encoder.numpy_ranges
+        covjson = encoder.from_polytope(forecast_tree(points))
+        assert isinstance(covjson["coverages"][0]["ranges"]["2t"]["values"], list)
+
+    @pytest.mark.parametrize("feature", FEATURES)
+    def test_output_unchanged(self, feature, encode):
+        encoder = encode(feature, {"numpy_ranges": True})
+        for coverage in encoder.covjson["coverages"]:
+            for parameter in coverage["ranges"].values():
+                assert isinstance(parameter["values"], np.ndarray)
+                assert parameter["values"].dtype == np.float64
+        plain = encode(feature, {"numpy_ranges": False})
+        assert encoder.get_json() == plain.get_json()
+        assert b"".join(encoder.iter_json(chunk_size=16)) == plain.get_json()
+
+    def test_month(self, make_encoder, points):
+        tree = month_tree(points)
+        encoder = make_encoder("BoundingBox", {"numpy_ranges": True})
+        encoder.from_polytope_month(tree)
+        plain = make_encoder("BoundingBox", {"numpy_ranges": False})
+        plain.from_polytope_month(tree)
+        assert encoder.get_json() == plain.get_json()
+
+    def test_streamed(self, encode):
+        sink = io.BytesIO()
+        encode("BoundingBox", {"numpy_ranges": True}, sink=sink)
+        assert sink.getvalue() == encode("BoundingBox", {"numpy_ranges": False}).get_json()
+
+    def test_missing_values_written_as_null(self, make_encoder):
+        encoder = make_encoder("BoundingBox", {"numpy_ranges": True})
+        coverage = {"ranges": {}}
+        encoder.add_range(coverage, {"167": [1.5, None, float("nan")]})
+        values = coverage["ranges"]["2t"]["values"]
+        assert np.isnan(values[1:]).all()
+        assert orjson.loads(orjson.dumps(coverage, option=orjson.OPT_SERIALIZE_NUMPY))["ranges"]["2t"]["values"] == [
+            1.5,
+            None,
+            None,
+        ]
+
+
+PRECISE_POINTS = [(48.0, 11.0, [264.912345678, 270.1]), (50.0, 12.0, [265.1, 101325.123456])]
+
+
+def _values(config, feature="BoundingBox"):
+    encoder = Covjsonkit(config).encode("CoverageCollection", feature)
+    encoder.from_polytope(forecast_tree(PRECISE_POINTS))
+    return orjson.loads(encoder.get_json())["coverages"][0]["ranges"]["2t"]["values"]
+
+
+class TestRangePrecision:
+    def test_float32(self):
+        assert _values({"range_dtype": "float32"}) == [264.91235, 270.1, 265.1, 101325.125]
+
+    def test_decimals(self):
+        assert _values({"range_decimals": {"2t": 2}}) == [264.91, 270.1, 265.1, 101325.12]
+        assert _values({"range_decimals": {"default": 1}}) == [264.9, 270.1, 265.1, 101325.1]
+        assert _values({"range_decimals": {"tp": 1}}) == [264.912345678, 270.1, 265.1, 101325.123456]
+
+    def test_decimals_and_float32(self):
+        assert _values({"range_decimals": {"default": 1}, "range_dtype": "float32"}) == [
+            264.9,
+            270.1,
+            265.1,
+            101325.1,
+        ]
+
+    @pytest.mark.parametrize("feature", FEATURES)
+    def test_applied_by_every_encoder(self, feature):
+        values = _values({"range_decimals": {"default": 0}}, feature)
+        assert values and all(value == round(value) for value in values)
+
+    def test_missing_values_stay_null(self):
+        encoder = Covjsonkit({"range_dtype": "float32"}).encode("CoverageCollection", "BoundingBox")
+        values = encoder.range_values([1.5, None], "2t")
+        assert values.dtype == np.float32
+        assert orjson.dumps(values, option=orjson.OPT_SERIALIZE_NUMPY) == b"[1.5,null]"
+
+    def test_unsupported_dtype(self):
+        with pytest.raises(ValueError, match="range_dtype"):
+            Covjsonkit({"range_dtype": "int8"}).encode("CoverageCollection", "BoundingBox")
@@ -0,0 +1,80 @@
+import numpy as np
+import pytest
+from conftest import chain, make_point, node, tip
+from polytope_feature.datacube.tensor_index_tree import TensorIndexTree
+
+from covjsonkit.api import Covjsonkit
+
+DATES = (np.datetime64("2025-01-01T00:00:00"), np.datetime64("2025-01-02T00:00:00"))
+NUMBERS = (1, 2, 3)
+STEPS = (0, 6)
+POINTS = [(48.0, 11.0), (50.0, 12.0)]
+
+
+def ensemble_tree(levels=(0,)):
+    """Forecast tree over two dates and three ensemble members, with distinct values everywhere."""
+    root = TensorIndexTree()
+    klass = node("class", ("od",))
+    root.add_child(klass)
+    size = len(levels) * len(NUMBERS) * 2 * len(STEPS)
+    for d, date in enumerate(DATES):
+        branch = chain(
+            node("date", (date,)),
+            node("domain", ("g",)),
+            node("expver", ("0001",)),
+            node("levelist", levels),
+            node("levtype", ("pl",)),
+            node("number", NUMBERS),
+            node("param", ("130", "157")),
+            node("step", STEPS),
+            node("stream", ("enfo",)),
+            node("type", ("pf",)),
+        )
+        klass.add_child(branch)
+        parent = tip(branch)
+        for p, (lat, lon) in enumerate(POINTS):
+            parent.add_child(make_point(lat, lon, [1000.0 * d + 100.0 * p + 0.123456 * i for i in range(size)]))
+    return root
+
+
+def _encode(config, levels):
+    return Covjsonkit(config).encode("CoverageCollection", "BoundingBox").from_polytope(ensemble_tree(levels))
+
+
+class TestParallelGather:
+    @pytest.mark.parametrize(
+        "config",
+        [{}, {"numpy_ranges": True}, {"range_dtype": "float32"}, {"range_decimals": {"t": 2, "default": 1}}],
+        ids=["lists", "numpy", "float32", "decimals"],
+    )
+    @pytest.mark.parametrize("levels", [(0,), (500, 850)])
+    def test_matches_serial(self, config, levels):
+        serial = Covjsonkit(config).encode("CoverageCollection", "BoundingBox")
+        serial.from_polytope(ensemble_tree(levels))
+        parallel = Covjsonkit({**config, "workers": 3}).encode("CoverageCollection", "BoundingBox")
+        parallel.from_polytope(ensemble_tree(levels))
+        assert len(parallel.covjson["coverages"]) == len(DATES) * len(NUMBERS) * len(STEPS)
+        assert parallel.get_json() == serial.get_json()
+
+    def test_streamed(self, tmp_path):
+        encoder = Covjsonkit({"numpy_ranges": True, "workers": 2}).encode("CoverageCollection", "BoundingBox")
+        with open(tmp_path / "out.json", "wb") as sink:
+            encoder.from_polytope(ensemble_tree(), sink=sink)
+        expected = Covjsonkit({"numpy_ranges": True}).encode("CoverageCollection", "BoundingBox")
+        expected.from_polytope(ensemble_tree())
+        assert (tmp_path / "out.json").read_bytes() == expected.get_json()
+
+    def test_map_partitions_keeps_order(self):
+        encoder = Covjsonkit({"workers": 4}).encode("CoverageCollection", "BoundingBox")
+        assert list(encoder.map_partitions(pow, [(2, n) for n in range(10)])) == [2**n for n in range(10)]
+
+    def test_serial_is_lazy(self):
+        encoder = Covjsonkit().encode("CoverageCollection", "BoundingBox")
+        calls = []
+        results = encoder.map_partitions(lambda n: calls.append(n) or n, [(n,) for n in range(3)])
+        assert next(results) == 0
+        assert calls == [0]
+
+    def test_invalid_workers(self):
+        with pytest.raises(ValueError, match="workers"):
+            Covjsonkit({"workers": 0}).encode("CoverageCollection", "BoundingBox")
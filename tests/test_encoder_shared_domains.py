@@ -0,0 +1,81 @@
+import io
+
+import orjson
+import pytest
+from conftest import forecast_tree, month_tree
+
+from covjsonkit.api import Covjsonkit
+from covjsonkit.utils import merge_coverage_collections, resolve_shared_domains
+
+FEATURES = ["BoundingBox", "Circle", "Frame", "Shapefile", "Polygon"]
+
+
+@pytest.fixture
+def collection(encode):
+    """Factory for the collection encoded by ``encode``, with or without shared domains, as plain JSON."""
+
+    def collection(feature, shared, method="from_polytope", tree=None):
+        return orjson.loads(encode(feature, {"shared_domains": shared}, method, tree).get_json())
+
+    return collection
+
+
+class TestSharedDomains:
+    def test_disabled_by_default(self, collection):
+        assert "domains" not in collection("BoundingBox", False)
+        assert not Covjsonkit().encode("CoverageCollection", "BoundingBox").shared_domains
+
+    @pytest.mark.parametrize("feature", FEATURES)
+    def test_coverages_refer_to_one_domain(self, feature, collection):
+        covjson = collection(feature, True)
+        assert len(covjson["coverages"]) == 2
+        assert [coverage["domain"] for coverage in covjson["coverages"]] == ["#domain0", "#domain0"]
+        assert covjson["domains"]["domain0"]["axes"]["composite"]["values"] == [[48.0, 11.0, 0], [50.0, 12.0, 0]]
+
+    @pytest.mark.parametrize("feature", FEATURES)
+    def test_resolves_to_inline_domains(self, feature, collection):
+        assert resolve_shared_domains(collection(feature, True)) == collection(feature, False)
+
+    def test_month(self, collection, points):
+        tree = month_tree(points)
+        shared = collection("BoundingBox", True, "from_polytope_month", tree)
+        assert sorted(shared["domains"]) == ["domain0", "domain1"]
+        assert resolve_shared_domains(shared) == collection(
+            "BoundingBox", False, "from_polytope_month", month_tree(points)
+        )
+
+    def test_smaller_payload(self):
+        many_steps = [(lat, lat, [1.0] * 10) for lat in range(20)]
+        tree = forecast_tree(many_steps, step=tuple(range(10)))
+        shared = Covjsonkit({"shared_domains": True}).encode("CoverageCollection", "BoundingBox")
+        shared.from_polytope(tree)
+        inline = Covjsonkit().encode("CoverageCollection", "BoundingBox")
+        inline.from_polytope(forecast_tree(many_steps, step=tuple(range(10))))
+        assert shared.get_json().count(b'"composite"') == 1
+        assert inline.get_json().count(b'"composite"') == 10
+        assert len(shared.get_json()) < len(inline.get_json())
+
+    def test_streaming(self, encode, collection):
+        sink = io.BytesIO()
+        encode("BoundingBox", {"shared_domains": True}, sink=sink)
+        assert resolve_shared_domains(orjson.loads(sink.getvalue())) == collection("BoundingBox", False)
+
+    def test_decode(self, collection):
+        shared = Covjsonkit().decode(collection("BoundingBox", True))
+        inline = Covjsonkit().decode(collection("BoundingBox", False))
+        assert shared.get_coordinates() == inline.get_coordinates()
+        assert shared.get_values() == inline.get_values()
+        assert shared.to_xarray().identical(inline.to_xarray())
+
+    def test_merge(self, collection):
+        first = collection("BoundingBox", True)
+        second = collection("BoundingBox", True)
+        assert merge_coverage_collections(first, second) == merge_coverage_collections(
+            collection("BoundingBox", False), collection("BoundingBox", False)
+        )
+
+    def test_unknown_domain(self, collection):
+        covjson = collection("BoundingBox", True)
+        covjson["coverages"][0]["domain"] = "#missing"
+        with pytest.raises(ValueError):
+            resolve_shared_domains(covjson)
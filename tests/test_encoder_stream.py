@@ -0,0 +1,130 @@
+import gzip
+import io
+
+import numpy as np
+import orjson
+import pytest
+from conftest import forecast_tree, month_tree, reforecast_branch, reforecast_tree
+
+from covjsonkit.api import Covjsonkit
+from covjsonkit.encoder import stream
+from covjsonkit.encoder.stream import CompressedSink, CoverageWriter
+
+
+class TestStreaming:
+    @pytest.mark.parametrize("feature", ["BoundingBox", "Circle", "Frame", "Shapefile", "Polygon", "PointSeries"])
+    def test_matches_get_json(self, feature, make_encoder, encode, points):
+        sink = io.BytesIO()
+        encoder = make_encoder(feature)
+        covjson = encoder.from_polytope(forecast_tree(points, step=(0, 6)), sink=sink)
+        assert sink.getvalue() == encode(feature).get_json()
+        assert covjson is encoder.covjson
+        assert covjson["coverages"] == []
+        assert "parameters" in covjson
+
+    def test_month(self, encode, points):
+        tree = month_tree(points)
+        sink = io.BytesIO()
+        encode(method="from_polytope_month", tree=tree, sink=sink)
+        assert sink.getvalue() == encode(method="from_polytope_month", tree=tree).get_json()
+
+    def test_reforecast(self, encode):
+        tree = reforecast_tree(
+            [
+                reforecast_branch(np.datetime64("2004-03-01"), [(48.0, 11.0, [1.0])]),
+                reforecast_branch(np.datetime64("2005-03-01"), [(48.0, 11.0, [2.0])]),
+            ]
+        )
+        sink = io.BytesIO()
+        encode(method="from_polytope_reforecast", tree=tree, sink=sink)
+        assert sink.getvalue() == encode(method="from_polytope_reforecast", tree=tree).get_json()
+        assert len(orjson.loads(sink.getvalue())["coverages"]) == 2
+
+    def test_coverages_written_one_at_a_time(self, encode):
+        writes = []
+
+        class Sink:
+            def write(self, data):
+                writes.append(bytes(data))
+
+        encode(sink=Sink())
+        coverages = [orjson.loads(data) for data in writes if data.startswith(b'{"mars:metadata"')]
+        assert [coverage["mars:metadata"]["step"] for coverage in coverages] == [0, 6]
+
+    def test_no_coverages(self):
+        encoder = Covjsonkit().encode("CoverageCollection", "BoundingBox")
+        encoder.add_parameter(167)
+        sink = io.BytesIO()
+        encoder.covjson["coverages"] = CoverageWriter(encoder, sink)
+        encoder.covjson["coverages"].close()
+        encoder.covjson["coverages"] = []
+        assert sink.getvalue() == encoder.get_json()
+
+
+class TestChunkedOutput:
+    @pytest.mark.parametrize("chunk_size", [1, 7, 64, 1 << 20])
+    def test_chunks_match_get_json(self, chunk_size, encode):
+        encoder = encode()
+        chunks = list(encoder.iter_json(chunk_size))
+        assert b"".join(chunks) == encoder.get_json()
+        assert all(len(chunk) == chunk_size for chunk in chunks[:-1])
+        assert 0 < len(chunks[-1]) <= chunk_size
+
+    def test_coverages_serialised_lazily(self, encode):
+        encoder = encode()
+        chunks = encoder.iter_json(16)
+        first = next(chunks)
+        encoder.covjson["coverages"][-1]["mars:metadata"]["step"] = 12
+        assert orjson.loads(first + b"".join(chunks))["coverages"][-1]["mars:metadata"]["step"] == 12
+
+    def test_write_to(self, encode):
+        encoder = encode()
+        fp = io.BytesIO()
+        assert encoder.write_to(fp, chunk_size=100) == len(encoder.get_json())
+        assert fp.getvalue() == encoder.get_json()
+
+
+class TestCompression:
+    def test_streamed_gzip(self, encode):
+        sink = io.BytesIO()
+        encode(sink=sink, compression="gzip")
+        assert gzip.decompress(sink.getvalue()) == encode().get_json()
+
+    def test_compression_without_sink(self, make_encoder, points):
+        encoder = make_encoder()
+        with pytest.raises(ValueError, match="sink"):
+            encoder.from_polytope(forecast_tree(points), compression="gzip")
+        assert encoder.covjson["coverages"] == []
+
+    def test_iter_json_gzip(self, encode):
+        encoder = encode()
+        assert gzip.decompress(b"".join(encoder.iter_json(16, compression="gzip"))) == encoder.get_json()
+
+    def test_write_to_gzip(self, encode):
+        encoder = encode()
+        fp = io.BytesIO()
+        written = encoder.write_to(fp, compression="gzip", level=9)
+        assert written == len(fp.getvalue())
+        assert gzip.decompress(fp.getvalue()) == encoder.get_json()
+
+    def test_zstd(self, encode):
+        zstandard = pytest.importorskip("zstandard")
+        encoder = encode()
+        compressed = b"".join(encoder.iter_json(compression="zstd"))
+        assert zstandard.ZstdDecompressor().decompressobj().decompress(compressed) == encoder.get_json()
+
+    def test_zstd_not_installed(self, monkeypatch, encode):
+        monkeypatch.setattr(stream, "zstandard", None)
+        with pytest.raises(ImportError, match="zstandard"):
+            list(encode().iter_json(compression="zstd"))
+
+    def test_unknown_compression(self, encode):
+        with pytest.raises(ValueError, match="brotli"):
+            encode().write_to(io.BytesIO(), compression="brotli")
+
+    def test_compressed_sink_leaves_sink_open(self):
+        sink = io.BytesIO()
+        with CompressedSink(sink) as compressed:
+            assert compressed.write(b"covjson") == 7
+        assert not sink.closed
+        assert gzip.decompress(sink.getvalue()) == b"covjson"
@@ -1,4 +1,5 @@
 import json
+from datetime import timedelta
 
 import numpy as np
 import orjson
@@ -7,6 +8,7 @@ from conftest import chain, make_leaf, make_point, node, tip
 from polytope_feature.datacube.tensor_index_tree import TensorIndexTree
 
 from covjsonkit.api import Covjsonkit
+from covjsonkit.encoder.encoder import forecast_times
 
 # Axis ordering for hdate reforecast (between hdate and latitude in the tree)
 HDATE_SUFFIX = [
@@ -492,3 +494,48 @@ class TestTimeseriesFromPolytopeReforecast:
         # Round-trip through the JSON module to ensure it can be deserialised back to a dict
         deserialised = json_module.loads(serialised)
         assert deserialised == covjson
+
+
+class TestForecastTimes:
+    def test_table(self):
+        times = forecast_times(["2025-01-01T00:00:00Z", "2025-01-02T12:00:00Z"], [0, 6, "12", timedelta(minutes=90)])
+        assert times == {
+            "2025-01-01T00:00:00Z": [
+                "2025-01-01T00:00:00Z",
+                "2025-01-01T06:00:00Z",
+                "2025-01-01T12:00:00Z",
+                "2025-01-01T01:30:00Z",
+            ],
+            "2025-01-02T12:00:00Z": [
+                "2025-01-02T12:00:00Z",
+                "2025-01-02T18:00:00Z",
+                "2025-01-03T00:00:00Z",
+                "2025-01-02T13:30:00Z",
+            ],
+        }
+
+    def test_sub_second_steps(self):
+        assert forecast_times(["2025-01-01T00:00:00Z"], [timedelta(milliseconds=1500)]) == {
+            "2025-01-01T00:00:00Z": ["2025-01-01T00:00:01.500000Z"]
+        }
+
+    def test_shared_by_points(self):
+        tree = chain(
+            TensorIndexTree(),
+            node("class", ("od",)),
+            node("date", (np.datetime64("2025-01-01T00:00:00"),)),
+            node("domain", ("g",)),
+            node("expver", ("0001",)),
+            node("levtype", ("sfc",)),
+            node("param", ("167",)),
+            node("step", (0, 6)),
+            node("stream", ("oper",)),
+            node("type", ("fc",)),
+        )
+        parent = tip(tree)
+        parent.add_child(make_point(48.0, 11.0, [264.9, 265.1]))
+        parent.add_child(make_point(50.0, 12.0, [266.3, 267.5]))
+        covjson = Covjsonkit().encode("CoverageCollection", "PointSeries").from_polytope(tree)
+        first, second = (coverage["domain"]["axes"]["t"]["values"] for coverage in covjson["coverages"])
+        assert first == ["2025-01-01T00:00:00Z", "2025-01-01T06:00:00Z"]
+        assert second is first
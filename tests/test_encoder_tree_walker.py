@@ -0,0 +1,231 @@
+import sys
+from itertools import product
+
+import numpy as np
+import pytest
+from conftest import (
+    chain,
+    forecast_tree,
+    make_point,
+    month_tree,
+    node,
+    reforecast_branch,
+    reforecast_tree,
+    tip,
+)
+from polytope_feature.datacube.tensor_index_tree import TensorIndexTree
+
+from covjsonkit.api import Covjsonkit
+from covjsonkit.encoder.encoder import TraversalPlan, tree_axis_order
+
+
+def _deep(tree_top, depth):
+    """Insert ``depth`` single-valued metadata axes below the tip of ``tree_top``."""
+    parent = tip(tree_top)
+    for i in range(depth):
+        child = node(f"axis{i}", (i,))
+        parent.add_child(child)
+        parent = child
+    return parent
+
+
+class TestTreeWalker:
+    def test_deeper_than_recursion_limit(self):
+        depth = sys.getrecursionlimit() + 100
+        tree = chain(TensorIndexTree(), node("date", (np.datetime64("2025-01-01T00:00:00"),)), node("param", ("167",)))
+        _deep(tree, depth).add_child(make_point(48.0, 11.0, [264.9]))
+        covjson = Covjsonkit().encode("CoverageCollection", "BoundingBox").from_polytope(tree)
+        coverage = covjson["coverages"][0]
+        assert coverage["ranges"]["2t"]["values"] == [264.9]
+        assert coverage["mars:metadata"][f"axis{depth - 1}"] == depth - 1
+
+    def test_month_deeper_than_recursion_limit(self):
+        depth = sys.getrecursionlimit() + 100
+        tree = month_tree([])
+        _deep(tree, depth).add_child(make_point(48.0, 11.0, [1.0, 2.0]))
+        covjson = Covjsonkit().encode("CoverageCollection", "BoundingBox").from_polytope_month(tree)
+        assert [cov["ranges"]["2t"]["values"] for cov in covjson["coverages"]] == [[1.0], [2.0]]
+
+    def test_sibling_order_preserved(self):
+        points = [(48.0, 11.0, [1.0]), (50.0, 12.0, [2.0]), (49.0, 10.0, [3.0])]
+        fields = {"lat": 0, "param": 0, "number": [0], "step": [0], "dates": [], "levels": [0]}
+        coords, mars_metadata, range_dict = {}, {}, {}
+        encoder = Covjsonkit().encode("CoverageCollection", "BoundingBox")
+        encoder.walk_tree(forecast_tree(points), fields, coords, mars_metadata, range_dict)
+        composite = coords["2025-01-01T00:00:00Z"]["composite"]
+        # polytope keeps children sorted by value, the walk visits them in that order
+        assert composite == [[48.0, 11.0], [49.0, 10.0], [50.0, 12.0]]
+        assert range_dict[("2025-01-01T00:00:00Z", 0, 0, "167", 0)] == [1.0, 3.0, 2.0]
+
+
+class TestTraversalPlan:
+    def test_axis_order(self):
+        tree = forecast_tree([(48.0, 11.0, [1.0])])
+        assert tree_axis_order(tree) == (
+            "class",
+            "date",
+            "domain",
+            "expver",
+            "levtype",
+            "param",
+            "step",
+            "stream",
+            "type",
+            "latitude",
+            "longitude",
+        )
+
+    def test_forecast_plan(self):
+        plan = TraversalPlan.forecast(forecast_tree([(48.0, 11.0, [1.0])]), date_key="hdate")
+        assert plan.handlers["hdate"] == plan.handlers["time"] == "handle_forecast_date"
+        assert "date" not in plan.handlers
+        assert plan.key_axes == ("levels", "number", "param", "step")
+        # levelist and number are not in the tree and keep their place after the others
+        assert plan.strided_axes == ("param", "step", "levels", "number")
+
+    def test_leaf_layout_follows_axis_order(self):
+        # number above levelist: leaf results are laid out [number][levelist][step]
+        tree = chain(
+            TensorIndexTree(),
+            node("class", ("od",)),
+            node("date", (np.datetime64("2025-01-01T00:00:00"),)),
+            node("number", (1, 2)),
+            node("param", ("130",)),
+            node("levelist", (500, 850)),
+            node("step", (0, 6)),
+        )
+        tip(tree).add_child(make_point(48.0, 11.0, [float(i) for i in range(8)]))
+        plan = TraversalPlan.forecast(tree)
+        assert plan.strided_axes == ("number", "param", "levels", "step")
+
+        fields = {"lat": 0, "param": 0, "number": [0], "step": [0], "dates": [], "levels": [0]}
+        range_dict = {}
+        Covjsonkit().encode("CoverageCollection", "BoundingBox").walk_tree(tree, fields, {}, {}, range_dict)
+        date = "2025-01-01T00:00:00Z"
+        assert range_dict[(date, 850, 1, "130", 0)] == [2.0]
+        assert range_dict[(date, 500, 2, "130", 6)] == [5.0]
+        assert range_dict[(date, 850, 2, "130", 6)] == [7.0]
+
+    def test_month_plan_follows_axis_order(self):
+        assert TraversalPlan.month(month_tree([(48.0, 11.0, [1.0])])).year_is_outer
+        tree = chain(TensorIndexTree(), node("param", ("167",)), node("month", (1, 2)), node("year", (2020, 2021)))
+        tip(tree).add_child(make_point(48.0, 11.0, [1.0, 2.0, 3.0, 4.0]))
+        assert not TraversalPlan.month(tree).year_is_outer
+
+        fields = {"lat": 0, "param": 0, "number": [0], "years": [], "months": [], "dates": [], "levels": [0]}
+        range_dict = {}
+        encoder = Covjsonkit().encode("CoverageCollection", "BoundingBox")
+        encoder.walk_tree_month(tree, fields, {}, {}, range_dict)
+        assert fields["dates"] == ["2020-01", "2020-02", "2021-01", "2021-02"]
+        assert range_dict[("2021-01", 0, 0, "167")] == [[2.0]]
+        assert range_dict[("2020-02", 0, 0, "167")] == [[3.0]]
+
+    @pytest.mark.parametrize(
+        "order",
+        [("levelist", "param", "year", "month"), ("levelist", "month", "param", "year")],
+        ids=["above", "alphabetical"],
+    )
+    def test_month_levels_and_params_above_dates(self, order):
+        # clmn trees sort their axes by name, so levelist and param come before year
+        axes = {"levelist": (500, 850), "month": (1, 2), "param": ("130", "157"), "year": (2020, 2021)}
+        tree = chain(TensorIndexTree(), node("class", ("od",)), *(node(name, axes[name]) for name in order))
+        # Leaf results are laid out over the axes in tree order
+        expected = {}
+        for values in product(*(axes[name] for name in order)):
+            point = dict(zip(order, values))
+            key = (f"{point['year']}-{point['month']:02d}", point["levelist"], 0, point["param"])
+            expected[key] = float(len(expected))
+        tip(tree).add_child(make_point(48.0, 11.0, list(expected.values())))
+
+        fields = {"lat": 0, "param": 0, "number": [0], "years": [], "months": [], "dates": [], "levels": [0]}
+        range_dict = {}
+        encoder = Covjsonkit().encode("CoverageCollection", "BoundingBox")
+        encoder.walk_tree_month(tree, fields, {}, {}, range_dict)
+        assert sorted(fields["dates"]) == ["2020-01", "2020-02", "2021-01", "2021-02"]
+        assert range_dict == {key: [[value]] for key, value in expected.items()}
+
+
+def nullable_point(lat, lon, result):
+    """Like ``make_point``, but keeps a result of all ``None`` (a leaf that returned no data)."""
+    point = make_point(lat, lon, [0.0 if val is None else val for val in result])
+    if all(val is None for val in result):
+        point.children[0].result = list(result)
+    return point
+
+
+class TestEmptyLeaves:
+    def test_empty_hdate_dropped(self):
+        tree = reforecast_tree(
+            [
+                reforecast_branch(np.datetime64("2004-03-01"), [(48.0, 11.0, [1.0])]),
+                reforecast_branch(np.datetime64("2005-03-01"), [(48.0, 11.0, [None])], point_factory=nullable_point),
+            ]
+        )
+        covjson = Covjsonkit().encode("CoverageCollection", "BoundingBox").from_polytope_reforecast(tree)
+        assert [cov["mars:metadata"]["Forecast date"] for cov in covjson["coverages"]] == ["2004-03-01Z"]
+        assert covjson["coverages"][0]["ranges"]["2t"]["values"] == [1.0]
+
+    def test_missing_mask(self):
+        points = [(48.0, 11.0, [1.0, 2.0]), (50.0, 12.0, [None, None])]
+        tree = forecast_tree(points, step=(0, 6), point_factory=nullable_point)
+        fields = {"lat": 0, "param": 0, "number": [0], "step": [0], "dates": [], "levels": [0]}
+        range_dict = {}
+        encoder = Covjsonkit().encode("CoverageCollection", "BoundingBox")
+        walker = encoder.walk(TraversalPlan.forecast(tree), tree, fields, {}, {}, range_dict)
+        assert walker.missing == {"2025-01-01T00:00:00Z"}
+        assert fields["dates"] == []
+        assert range_dict == {}
+
+    def test_empty_month_leaf(self):
+        points = [(48.0, 11.0, [1.0, 2.0]), (50.0, 12.0, [None, None])]
+        tree = month_tree(points, years=(2020, 2021), point_factory=nullable_point)
+        fields = {"lat": 0, "param": 0, "number": [0], "years": [], "months": [], "dates": [], "levels": [0]}
+        range_dict = {}
+        Covjsonkit().encode("CoverageCollection", "BoundingBox").walk_tree_month(tree, fields, {}, {}, range_dict)
+        assert fields["dates"] == []
+        assert range_dict == {}
+
+
+def _two_date_tree():
+    root = chain(TensorIndexTree(), node("class", ("od",)))
+    for d, date in enumerate(("2025-01-01T00:00:00", "2025-01-02T00:00:00")):
+        branch = chain(node("date", (np.datetime64(date),)), node("param", ("167", "168")), node("step", (0, 3)))
+        parent = tip(branch)
+        parent.add_child(make_point(48.0, 11.0, [10.0 * d + i for i in range(4)]))
+        parent.add_child(make_point(50.0, 12.0, [None, 20.0 * d, 1.5, None]))
+        root.children[0].add_child(branch)
+    return root
+
+
+def _forecast_fields():
+    return {"lat": 0, "param": 0, "number": [0], "step": [0], "dates": [], "levels": [0]}
+
+
+def _walk(config, walk, tree, fields):
+    range_dict = {}
+    getattr(Covjsonkit(config).encode("CoverageCollection", "BoundingBox"), walk)(tree, fields, {}, {}, range_dict)
+    return range_dict
+
+
+class TestArrayRanges:
+    def test_forecast_ranges_are_arrays(self):
+        lists = _walk(None, "walk_tree", _two_date_tree(), _forecast_fields())
+        arrays = _walk({"numpy_ranges": True}, "walk_tree", _two_date_tree(), _forecast_fields())
+        assert list(arrays) == list(lists)
+        for key, values in lists.items():
+            assert arrays[key].dtype == np.float64
+            np.testing.assert_array_equal(arrays[key], np.array(values, dtype=np.float64))
+        np.testing.assert_array_equal(arrays[("2025-01-02T00:00:00Z", 0, 0, "167", 3)], [11.0, 20.0])
+        assert np.isnan(arrays[("2025-01-02T00:00:00Z", 0, 0, "167", 0)][1])
+
+    def test_missing_date_dropped(self):
+        points = [(48.0, 11.0, [1.0, 2.0]), (50.0, 12.0, [None, None])]
+        tree = forecast_tree(points, step=(0, 6), point_factory=nullable_point)
+        fields = _forecast_fields()
+        assert _walk({"range_dtype": "float32"}, "walk_tree", tree, fields) == {}
+        assert fields["dates"] == []
+
+    def test_month_ranges_stay_lists(self):
+        fields = {"lat": 0, "param": 0, "number": [0], "years": [], "months": [], "dates": [], "levels": [0]}
+        range_dict = _walk({"numpy_ranges": True}, "walk_tree_month", month_tree([(48.0, 11.0, [1.0, 2.0])]), fields)
+        assert all(isinstance(values, list) for values in range_dict.values())
@@ -0,0 +1,153 @@
+import json
+import os
+import subprocess
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+from conflator import Conflator
+
+from covjsonkit import param_db
+from covjsonkit.api import Covjsonkit
+from covjsonkit.config import load_config
+
+
+class TestParamCatalogue:
+    def test_catalogue_is_shared_between_encoders(self):
+        encoder1 = Covjsonkit().encode("CoverageCollection", "BoundingBox")
+        encoder2 = Covjsonkit().encode("CoverageCollection", "PointSeries")
+        assert encoder1.catalogue is encoder2.catalogue
+        assert encoder1.params is encoder2.params
+
+    def test_catalogue_keyed_by_provider(self):
+        ecmwf = param_db.get_catalogue("ecmwf")
+        dwd = param_db.get_catalogue("dwd")
+        assert ecmwf is not dwd
+        assert ecmwf.provider == "ecmwf"
+        assert dwd.provider == "dwd"
+        assert Covjsonkit({"param_db": "dwd"}).encode("CoverageCollection", "Grid").catalogue is dwd
+
+    def test_catalogue_contents(self):
+        catalogue = param_db.get_catalogue("ecmwf")
+        assert catalogue.params["167"]["shortname"] == "2t"
+        assert catalogue.param_ids["2t"] == "167"
+        assert catalogue.units["2"]["name"] == "K"
+
+    def test_concurrent_first_use_loads_once(self, monkeypatch):
+        monkeypatch.setattr(param_db, "_catalogues", {})
+        loads = []
+        original = param_db.ParamCatalogue.__init__
+
+        def counting_init(self, provider):
+            loads.append(provider)
+            original(self, provider)
+
+        monkeypatch.setattr(param_db.ParamCatalogue, "__init__", counting_init)
+
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(param_db.get_catalogue("ecmwf"))) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert loads == ["ecmwf"]
+        assert all(catalogue is results[0] for catalogue in results)
+
+    def test_preload(self, monkeypatch):
+        monkeypatch.setattr(param_db, "_catalogues", {})
+        Covjsonkit({"param_db": "dwd"}).preload_param_db()
+        assert list(param_db._catalogues) == ["dwd"]
+
+    def test_index_matches_json_tables(self):
+        catalogue = param_db.ParamCatalogue("ecmwf")
+        for name, keys in (("param", ["1", "167", "228"]), ("param_id", ["2t", "tp", "strf"]), ("unit", ["1", "2"])):
+            index = catalogue._index(name)
+            table = catalogue._table(name)
+            assert len(index) == len(table)
+            for key in keys:
+                assert key in index
+                assert index[key] == table[key]
+
+    def test_index_missing_key(self):
+        index = param_db.ParamCatalogue("ecmwf")._index("param")
+        assert "not-a-param" not in index
+        with pytest.raises(KeyError):
+            index["not-a-param"]
+
+    def test_index_built_in_cache(self, param_db_cache):
+        param_db.ParamCatalogue("dwd").get_unit(2)
+        assert (param_db_cache / "param_db" / "dwd" / "unit.idx").exists()
+        assert not list((Path(param_db.__file__).parent / "data").glob("*/*.idx"))
+
+    def test_lookup_does_not_load_json_tables(self, monkeypatch):
+        monkeypatch.setattr(param_db, "_catalogues", {})
+        encoder = Covjsonkit().encode("CoverageCollection", "BoundingBox")
+        encoder.add_parameter(167)
+        assert encoder.convert_param_id_to_param(167) == "2t"
+        assert encoder.convert_param_to_param_id("2t") == "167"
+        assert encoder.covjson["parameters"]["2t"]["unit"] == {"symbol": "K"}
+        assert encoder.catalogue._tables == {}
+
+    def test_stale_index_rebuilt(self, tmp_path, monkeypatch):
+        monkeypatch.setenv("COVJSONKIT_CACHE_DIR", str(tmp_path / "cache"))
+        monkeypatch.setattr(param_db, "_table_path", lambda provider, filename: str(tmp_path / provider / filename))
+        (tmp_path / "custom").mkdir()
+        table = tmp_path / "custom" / "unit.json"
+        table.write_text(json.dumps({"1": {"name": "m"}}))
+        assert param_db.ParamCatalogue("custom").get_unit(1) == {"name": "m"}
+
+        table.write_text(json.dumps({"1": {"name": "km"}, "2": {"name": "K"}}))
+        os.utime(table, ns=(0, 0))
+        catalogue = param_db.ParamCatalogue("custom")
+        assert catalogue.get_unit(1) == {"name": "km"}
+        assert catalogue.get_unit(2) == {"name": "K"}
+        assert catalogue._tables == {}
+
+    def test_index_of_other_format_rebuilt(self, tmp_path, monkeypatch):
+        monkeypatch.setenv("COVJSONKIT_CACHE_DIR", str(tmp_path))
+        path = tmp_path / "param_db" / "ecmwf" / "unit.idx"
+        path.parent.mkdir(parents=True)
+        path.write_bytes(b"CJKIDX01" + bytes(4))
+        assert param_db.ParamCatalogue("ecmwf").get_unit(2)["name"] == "K"
+        assert path.read_bytes().startswith(param_db.INDEX_MAGIC)
+
+    def test_falls_back_to_json_without_index(self, tmp_path, monkeypatch):
+        # A cache directory that cannot be created
+        (tmp_path / "file").write_text("")
+        monkeypatch.setenv("COVJSONKIT_CACHE_DIR", str(tmp_path / "file" / "cache"))
+        catalogue = param_db.ParamCatalogue("ecmwf")
+        assert catalogue.get_param(167)["shortname"] == "2t"
+        assert "param" in catalogue._tables
+
+    def test_import_does_not_load_config(self):
+        code = (
+            "import conflator\n"
+            "def fail(self):\n"
+            "    raise AssertionError('config loaded at import')\n"
+            "conflator.Conflator.load = fail\n"
+            "import covjsonkit.param_db\n"
+            "import covjsonkit.api\n"
+            "from covjsonkit.api import Covjsonkit\n"
+            "Covjsonkit({'param_db': 'ecmwf'}).encode('CoverageCollection', 'BoundingBox').add_parameter(167)\n"
+        )
+        subprocess.run([sys.executable, "-c", code], check=True)
+
+    def test_default_config_loaded_once(self, monkeypatch):
+        load_config.cache_clear()
+        calls = []
+        original = Conflator.load
+
+        def counting_load(self):
+            calls.append(self)
+            return original(self)
+
+        monkeypatch.setattr(Conflator, "load", counting_load)
+        try:
+            assert Covjsonkit().conf is Covjsonkit().conf
+            assert param_db.get_catalogue().provider == Covjsonkit().conf.param_db
+            assert param_db.param_dir == Covjsonkit().conf.param_db
+            assert len(calls) == 1
+        finally:
+            load_config.cache_clear()
@@ -64,3 +64,21 @@ class TestMultipointXarray:
         assert "t" in ds.data_vars, f"Expected 't' in data_vars, got {list(ds.data_vars)}"
         # Time dimension is 'datetimes', not 't'
         assert "datetimes" in ds.dims
+
+    def test_from_xarray_round_trip(self):
+        ds = Covjsonkit().decode(self.test_covjson).to_xarray()
+        covjson_result = Covjsonkit().encode("CoverageCollection", "BoundingBox").from_xarray(ds)
+        for result, expected in zip(covjson_result["coverages"], self.test_covjson["coverages"]):
+            assert result["mars:metadata"]["number"] == expected["mars:metadata"]["number"]
+            assert result["mars:metadata"]["step"] == expected["mars:metadata"]["step"]
+            for param in ("2t", "10v"):
+                assert result["ranges"][param]["values"] == expected["ranges"][param]["values"]
+
+    def test_from_xarray_dimension_order(self):
+        """Data variables with their dimensions in another order give the same coverages."""
+        ds = Covjsonkit().decode(self.test_covjson).to_xarray()
+        transposed = ds.transpose("points", "steps", "datetimes", "number")
+
+        expected = Covjsonkit().encode("CoverageCollection", "BoundingBox").from_xarray(ds)
+        result = Covjsonkit().encode("CoverageCollection", "BoundingBox").from_xarray(transposed)
+        assert result["coverages"] == expected["coverages"]